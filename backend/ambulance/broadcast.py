@@ -0,0 +1,177 @@
+"""
+In-process broadcaster behind the live ambulance stream.
+
+Every server process holds one :data:`ambulance_broadcaster`. It keeps the
+current public state of every ambulance in memory and fans changes out to
+the queues of the connected stream clients, so a new viewer gets its
+snapshot from memory and thousands of viewers cost no database queries.
+
+Changes reach the broadcaster from the ``post_save``/``post_delete``
+handlers in ``ambulance.signals`` and from the location ingestion flushes,
+which may run in any thread. While at least one client is connected, the
+broadcaster also reloads the state from the database every
+``STREAM_REFRESH_INTERVAL`` seconds and publishes the differences, which
+picks up changes made by other server processes.
+"""
+
+import asyncio
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+
+from ambulance.constants import STREAM_QUEUE_SIZE, STREAM_REFRESH_INTERVAL
+from ambulance.models import Ambulance
+
+logger = logging.getLogger(__name__)
+
+STATE_FIELDS = (
+    "id",
+    "registration_number",
+    "driver_name",
+    "contact_number",
+    "current_location",
+    "latitude",
+    "longitude",
+    "is_available",
+)
+
+
+def ambulance_state(ambulance):
+    """Return the public state of an ambulance as sent to stream clients."""
+    return {field: getattr(ambulance, field) for field in STATE_FIELDS}
+
+
+class Subscription:
+    """The event queue of one connected client."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        # Set when events were dropped because the client fell behind; the
+        # client is then sent a fresh snapshot instead.
+        self.lagged = False
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    def send(self, event):
+        """Queue an event from any thread."""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+
+class AmbulanceBroadcaster:
+    """Fans ambulance changes out to the subscribed stream clients."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+        self._subscriptions = set()
+        self._refresher = None
+
+    def _load(self):
+        return {
+            row["id"]: row
+            for row in Ambulance.objects.order_by("id").values(*STATE_FIELDS)
+        }
+
+    def snapshot(self):
+        """
+        Return the state of every ambulance, loading it on first use.
+
+        Returns:
+            list: Ambulance states ordered by id.
+        """
+        if self._state is None:
+            state = self._load()
+            with self._lock:
+                if self._state is None:
+                    self._state = state
+        with self._lock:
+            return [dict(self._state[pk]) for pk in sorted(self._state)]
+
+    def publish(self, state, deleted=False):
+        """
+        Record an ambulance change and send it to every client.
+
+        Args:
+            state (dict): The ambulance state, see :func:`ambulance_state`.
+            deleted (bool): Whether the ambulance was deleted.
+        """
+        with self._lock:
+            if self._state is not None:
+                if deleted:
+                    self._state.pop(state["id"], None)
+                elif self._state.get(state["id"]) == state:
+                    return
+                else:
+                    self._state[state["id"]] = dict(state)
+            subscriptions = list(self._subscriptions)
+        event = ("delete", {"id": state["id"]}) if deleted else ("update", state)
+        for subscription in subscriptions:
+            subscription.send(event)
+
+    def refresh(self):
+        """Reload the state from the database and publish the differences."""
+        if self._state is None:
+            return
+        current = self._load()
+        with self._lock:
+            previous = dict(self._state)
+        for pk, state in current.items():
+            if previous.get(pk) != state:
+                self.publish(state)
+        for pk in previous.keys() - current.keys():
+            self.publish(previous[pk], deleted=True)
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(STREAM_REFRESH_INTERVAL)
+            try:
+                await sync_to_async(self.refresh)()
+            except Exception:
+                logger.exception("Refreshing the ambulance stream state failed")
+
+    def subscribe(self):
+        """
+        Register a client on the running event loop.
+
+        Returns:
+            Subscription: The client's subscription.
+        """
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(loop)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if self._refresher is None or self._refresher.done():
+                self._refresher = loop.create_task(self._refresh_periodically())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Unregister a client.
+
+        The last client stops the periodic refresh and drops the state, which
+        would otherwise go stale; the next client loads it again.
+        """
+        with self._lock:
+            self._subscriptions.discard(subscription)
+            if not self._subscriptions:
+                if self._refresher is not None:
+                    self._refresher.cancel()
+                    self._refresher = None
+                self._state = None
+
+    def invalidate(self):
+        """Drop the state so the next snapshot reloads it."""
+        with self._lock:
+            self._state = None
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+
+ambulance_broadcaster = AmbulanceBroadcaster()
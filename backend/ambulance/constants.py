@@ -0,0 +1,38 @@
+# Side of a spatial index cell, in degrees (about 5.5 km of latitude)
+INDEX_CELL_SIZE = 0.05
+
+# Seconds after which the spatial index is rebuilt from the database, so
+# location changes made by other worker processes are picked up
+INDEX_MAX_AGE = 60
+
+# Mean radius of the Earth, in kilometres
+EARTH_RADIUS_KM = 6371.0088
+
+# Average ambulance speed and the ratio of road to straight-line distance,
+# used to estimate arrival times
+AVERAGE_SPEED_KMH = 30
+ROAD_DISTANCE_FACTOR = 1.3
+
+DEFAULT_NEAREST_COUNT = 5
+MAX_NEAREST_COUNT = 20
+
+# Most GPS pings accepted in one ingestion request
+MAX_PINGS_PER_BATCH = 1000
+
+# Vehicles buffered before a flush is forced ahead of the flush interval
+MAX_BUFFERED_VEHICLES = 5000
+
+# Events queued for one live stream client before it is considered lagging
+# and sent a fresh snapshot instead
+STREAM_QUEUE_SIZE = 100
+
+# Seconds between reloads of the live stream state from the database, which
+# pick up changes made by other worker processes
+STREAM_REFRESH_INTERVAL = 5
+
+# Seconds of silence after which a keep-alive comment is sent to stream
+# clients, so proxies do not close idle connections
+STREAM_KEEPALIVE_INTERVAL = 15
+
+# Milliseconds browsers wait before reconnecting to the stream
+STREAM_RETRY_MS = 5000
@@ -0,0 +1,226 @@
+import asyncio
+import json
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from hmac import compare_digest
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from ambulance.broadcast import ambulance_broadcaster
+from ambulance.constants import (
+    DEFAULT_NEAREST_COUNT,
+    MAX_NEAREST_COUNT,
+    MAX_PINGS_PER_BATCH,
+    STREAM_KEEPALIVE_INTERVAL,
+    STREAM_RETRY_MS,
+)
+from ambulance.ingestion import location_buffer
+from ambulance.spatial import ambulance_index, estimate_eta_minutes
+
+
+def _parse_coordinate(value, limit):
+    coordinate = float(value)
+    if not -limit <= coordinate <= limit:
+        raise ValueError(f"coordinate out of range: {value}")
+    return coordinate
+
+
+@require_GET
+def nearest_ambulances(request):
+    """
+    Return the available ambulances closest to the caller.
+
+    Query parameters:
+    - lat, lon: The caller's coordinates in degrees.
+    - k (optional): Number of ambulances, at most ``MAX_NEAREST_COUNT``.
+    - max_km (optional): Ignore ambulances farther than this.
+
+    The lookup is answered from the in-memory spatial index, without a
+    database query.
+
+    Parameters:
+    - request: HttpRequest object containing metadata about the request.
+
+    Returns:
+    - JsonResponse: The ambulances closest first, each with its straight-line
+      distance in kilometres and an estimated time of arrival in minutes.
+    - JsonResponse: A 400 error response if the parameters are invalid.
+    """
+    try:
+        latitude = _parse_coordinate(request.GET["lat"], 90)
+        longitude = _parse_coordinate(request.GET["lon"], 180)
+        k = int(request.GET.get("k", DEFAULT_NEAREST_COUNT))
+        max_distance_km = request.GET.get("max_km")
+        max_distance_km = float(max_distance_km) if max_distance_km else None
+    except (KeyError, ValueError):
+        return JsonResponse(
+            {"error": "Valid lat and lon query parameters are required."}, status=400
+        )
+    k = max(1, min(k, MAX_NEAREST_COUNT))
+
+    results = [
+        {
+            "id": entry["id"],
+            "registration_number": entry["registration_number"],
+            "driver_name": entry["driver_name"],
+            "contact_number": entry["contact_number"],
+            "current_location": entry["current_location"],
+            "latitude": entry["latitude"],
+            "longitude": entry["longitude"],
+            "distance_km": round(distance, 3),
+            "eta_minutes": round(estimate_eta_minutes(distance), 1),
+        }
+        for distance, entry in ambulance_index.nearest(
+            latitude, longitude, k, max_distance_km
+        )
+    ]
+    return JsonResponse({"results": results})
+
+
+def _parse_ping(ping):
+    """Validate one ping and return it as a buffer tuple."""
+    registration_number = ping["registration_number"]
+    if not isinstance(registration_number, str) or not registration_number:
+        raise ValueError("registration_number must be a non-empty string")
+    latitude = _parse_coordinate(ping["lat"], 90)
+    longitude = _parse_coordinate(ping["lon"], 180)
+    timestamp = ping["timestamp"]
+    if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        timestamp = datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+    else:
+        timestamp = parse_datetime(str(timestamp))
+        if timestamp is None:
+            raise ValueError("timestamp must be ISO 8601 or seconds since the epoch")
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp, dt_timezone.utc)
+    return registration_number, latitude, longitude, timestamp
+
+
+@csrf_exempt
+@require_POST
+def ingest_ambulance_pings(request):
+    """
+    Accept a batch of GPS pings from ambulance trackers.
+
+    The body is a JSON object ``{"pings": [...]}`` whose items carry
+    ``registration_number``, ``lat``, ``lon`` and ``timestamp`` (ISO 8601, or
+    seconds since the epoch). Trackers authenticate with the
+    ``AMBULANCE_INGEST_TOKEN`` bearer token. Valid pings are buffered and
+    only the newest position per vehicle is written to the database by the
+    next periodic flush.
+
+    Parameters:
+    - request: HttpRequest object containing metadata about the request.
+
+    Returns:
+    - JsonResponse: 202 response with the number of accepted pings and the
+      index and error of every rejected one.
+    - JsonResponse: 400 error response if the body is not a valid batch.
+    - HttpResponseForbidden: If the bearer token is missing or wrong.
+    """
+    token = settings.AMBULANCE_INGEST_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if not token or not compare_digest(authorization, f"Bearer {token}"):
+        return HttpResponseForbidden("You are not authorized to view this page.")
+
+    try:
+        pings = json.loads(request.body)["pings"]
+        if not isinstance(pings, list):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse(
+            {"error": 'The body must be a JSON object with a "pings" list.'},
+            status=400,
+        )
+    if len(pings) > MAX_PINGS_PER_BATCH:
+        return JsonResponse(
+            {"error": f"At most {MAX_PINGS_PER_BATCH} pings per batch."}, status=400
+        )
+
+    accepted, rejected = [], []
+    for index, ping in enumerate(pings):
+        try:
+            accepted.append(_parse_ping(ping))
+        except (KeyError, TypeError, ValueError) as e:
+            rejected.append({"index": index, "error": str(e) or "Invalid ping."})
+    location_buffer.add(accepted)
+    return JsonResponse({"accepted": len(accepted), "rejected": rejected}, status=202)
+
+
+def _server_sent_event(event, data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def _snapshot_event(snapshot):
+    return f"retry: {STREAM_RETRY_MS}\n" + _server_sent_event("snapshot", snapshot)
+
+
+def _snapshot_only():
+    # Without an event loop serving the connection, send the snapshot and let
+    # the browser reconnect after STREAM_RETRY_MS.
+    yield _snapshot_event(ambulance_broadcaster.snapshot())
+
+
+async def _ambulance_events():
+    # Subscribe before taking the snapshot so no change falls in between;
+    # a change seen in both is harmless.
+    subscription = ambulance_broadcaster.subscribe()
+    try:
+        snapshot = await sync_to_async(ambulance_broadcaster.snapshot)()
+        yield _snapshot_event(snapshot)
+        while True:
+            try:
+                event, data = await asyncio.wait_for(
+                    subscription.queue.get(), STREAM_KEEPALIVE_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if subscription.lagged:
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.lagged = False
+                snapshot = await sync_to_async(ambulance_broadcaster.snapshot)()
+                yield _snapshot_event(snapshot)
+            else:
+                yield _server_sent_event(event, data)
+    finally:
+        ambulance_broadcaster.unsubscribe(subscription)
+
+
+@require_GET
+async def ambulance_stream(request):
+    """
+    Stream ambulance availability and position changes as server-sent events.
+
+    A client first gets a ``snapshot`` event with every ambulance, then an
+    ``update`` event for every saved or moved ambulance and a ``delete``
+    event for every deleted one. All clients of a server process are fed by
+    the in-process ``ambulance_broadcaster``, so connected viewers cost no
+    database queries.
+
+    The stream stays open only when served by the ASGI application; under
+    WSGI the response ends after the snapshot and browsers reconnect every
+    ``STREAM_RETRY_MS`` milliseconds.
+
+    Parameters:
+    - request: HttpRequest object containing metadata about the request.
+
+    Returns:
+    - StreamingHttpResponse: The ``text/event-stream`` response.
+    """
+    live = isinstance(request, ASGIRequest)
+    return StreamingHttpResponse(
+        _ambulance_events() if live else _snapshot_only(),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
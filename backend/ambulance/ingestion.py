@@ -0,0 +1,148 @@
+"""
+Coalescing buffer for high-frequency ambulance GPS pings.
+
+The ingestion API hands every accepted ping to :data:`location_buffer`,
+which keeps only the newest position per vehicle in memory. A background
+thread flushes the buffer every ``AMBULANCE_PING_FLUSH_INTERVAL`` seconds
+(or earlier once ``MAX_BUFFERED_VEHICLES`` vehicles are waiting) with one
+``bulk_update`` of the changed ambulances, so hundreds of pings per second
+turn into a handful of writes.
+
+``bulk_update`` bypasses the model signals, so a flush also moves the
+flushed ambulances in the spatial index, pushes them to the live stream
+clients and invalidates the cached ambulance pages itself.
+"""
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from ambulance.broadcast import ambulance_broadcaster, ambulance_state
+from ambulance.constants import MAX_BUFFERED_VEHICLES
+from ambulance.models import Ambulance
+from ambulance.spatial import ambulance_index
+from core.general.cache import bump_model_version
+
+logger = logging.getLogger(__name__)
+
+
+class LocationBuffer:
+    """Latest buffered position per vehicle, flushed in bulk."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._positions = {}
+        self._flusher = None
+        self._wakeup = threading.Event()
+
+    def add(self, pings):
+        """
+        Buffer pings, keeping the newest position of every vehicle.
+
+        Args:
+            pings (iterable): ``(registration_number, latitude, longitude,
+                timestamp)`` tuples; timestamps are aware datetimes.
+        """
+        with self._lock:
+            for registration_number, latitude, longitude, timestamp in pings:
+                buffered = self._positions.get(registration_number)
+                if buffered is None or buffered[2] < timestamp:
+                    self._positions[registration_number] = (
+                        latitude,
+                        longitude,
+                        timestamp,
+                    )
+            pending = len(self._positions)
+
+        if not settings.AMBULANCE_PING_FLUSH_INTERVAL:
+            self.flush()
+            return
+        self._ensure_flusher()
+        if pending >= MAX_BUFFERED_VEHICLES:
+            self._wakeup.set()
+
+    def __len__(self):
+        return len(self._positions)
+
+    def flush(self):
+        """
+        Write the buffered positions to the database.
+
+        Positions older than the one already stored (e.g. pings delivered
+        out of order across flushes) are dropped.
+
+        Returns:
+            int: The number of ambulances updated.
+        """
+        with self._flush_lock:
+            with self._lock:
+                positions, self._positions = self._positions, {}
+            if not positions:
+                return 0
+
+            try:
+                changed = self._write(positions)
+            except Exception:
+                # Keep the positions for the next flush unless newer ones
+                # arrived meanwhile
+                with self._lock:
+                    for registration_number, position in positions.items():
+                        self._positions.setdefault(registration_number, position)
+                raise
+
+            for ambulance in changed:
+                ambulance_index.update(ambulance)
+                ambulance_broadcaster.publish(ambulance_state(ambulance))
+            if changed:
+                bump_model_version(Ambulance)
+            return len(changed)
+
+    def _write(self, positions):
+        """Apply newer positions in one bulk update; return the changed rows."""
+        with transaction.atomic():
+            ambulances = Ambulance.objects.select_for_update().in_bulk(
+                list(positions), field_name="registration_number"
+            )
+            changed = []
+            for registration_number, ambulance in ambulances.items():
+                latitude, longitude, timestamp = positions[registration_number]
+                stored = ambulance.location_updated_at
+                if stored is not None and stored >= timestamp:
+                    continue
+                ambulance.latitude = latitude
+                ambulance.longitude = longitude
+                ambulance.location_updated_at = timestamp
+                changed.append(ambulance)
+            Ambulance.objects.bulk_update(
+                changed, ["latitude", "longitude", "location_updated_at"]
+            )
+        return changed
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run, name="ambulance-location-flusher", daemon=True
+                )
+                self._flusher.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(settings.AMBULANCE_PING_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing ambulance positions failed")
+            finally:
+                close_old_connections()
+
+
+location_buffer = LocationBuffer()
@@ -8,6 +8,9 @@ class Ambulance(models.Model):
     latitude = models.FloatField(null=True, blank=True)  # Allow null values initially
     longitude = models.FloatField(null=True, blank=True)
     is_available = models.BooleanField(default=True)
+    location_updated_at = models.DateTimeField(
+        null=True, blank=True, help_text="GPS time of the latest position."
+    )
 
     def __str__(self):
         return f"Ambulance {self.registration_number}"
\ No newline at end of file
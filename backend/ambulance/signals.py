@@ -0,0 +1,45 @@
+"""
+Signal handlers keeping the cached ambulance pages, the spatial index and
+the live stream in sync with the ambulances.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ambulance.broadcast import ambulance_broadcaster, ambulance_state
+from ambulance.models import Ambulance
+from ambulance.spatial import ambulance_index
+from core.general.cache import bump_model_version
+
+
+@receiver(post_save, sender=Ambulance)
+@receiver(post_delete, sender=Ambulance)
+def invalidate_ambulance_pages(sender, **kwargs):
+    """Drop every cached page showing ambulances."""
+    bump_model_version(Ambulance)
+
+
+@receiver(post_save, sender=Ambulance)
+def index_ambulance(sender, instance, raw=False, **kwargs):
+    """Move a saved ambulance in the spatial index."""
+    if not raw:
+        ambulance_index.update(instance)
+
+
+@receiver(post_delete, sender=Ambulance)
+def unindex_ambulance(sender, instance, **kwargs):
+    """Remove a deleted ambulance from the spatial index."""
+    ambulance_index.remove(instance.pk)
+
+
+@receiver(post_save, sender=Ambulance)
+def broadcast_ambulance(sender, instance, raw=False, **kwargs):
+    """Push a saved ambulance to the live stream clients."""
+    if not raw:
+        ambulance_broadcaster.publish(ambulance_state(instance))
+
+
+@receiver(post_delete, sender=Ambulance)
+def broadcast_ambulance_deletion(sender, instance, **kwargs):
+    """Tell the live stream clients an ambulance was deleted."""
+    ambulance_broadcaster.publish(ambulance_state(instance), deleted=True)
@@ -0,0 +1,231 @@
+"""
+In-memory spatial index answering nearest-available-ambulance lookups.
+
+Available ambulances with known coordinates are bucketed into a grid of
+``INDEX_CELL_SIZE`` degree cells. A lookup visits the cells in rings of
+growing size around the caller's cell and stops as soon as no unvisited
+cell can hold an ambulance closer than the k-th one found, so its cost
+depends on the number of ambulances near the caller rather than on the
+size of the fleet.
+
+The index is built lazily from the database. The ``post_save`` and
+``post_delete`` handlers in ``ambulance.signals`` (and the bulk location
+updates of the ingestion API) update single entries, and the whole index is
+rebuilt after ``INDEX_MAX_AGE`` seconds to pick up changes made by other
+worker processes.
+"""
+
+import heapq
+import math
+import threading
+import time
+
+from ambulance.constants import (
+    AVERAGE_SPEED_KMH,
+    EARTH_RADIUS_KM,
+    INDEX_CELL_SIZE,
+    INDEX_MAX_AGE,
+    ROAD_DISTANCE_FACTOR,
+)
+from ambulance.models import Ambulance
+
+# Length of one degree of latitude (and of longitude at the equator)
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+ENTRY_FIELDS = (
+    "id",
+    "registration_number",
+    "driver_name",
+    "contact_number",
+    "current_location",
+    "latitude",
+    "longitude",
+)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Return the great-circle distance between two points.
+
+    Args:
+        lat1 (float): Latitude of the first point, in degrees.
+        lon1 (float): Longitude of the first point, in degrees.
+        lat2 (float): Latitude of the second point, in degrees.
+        lon2 (float): Longitude of the second point, in degrees.
+
+    Returns:
+        float: The distance in kilometres.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def estimate_eta_minutes(distance_km):
+    """Estimate the driving time for a straight-line distance."""
+    return distance_km * ROAD_DISTANCE_FACTOR / AVERAGE_SPEED_KMH * 60
+
+
+def _cell(latitude, longitude):
+    return (
+        math.floor(latitude / INDEX_CELL_SIZE),
+        math.floor(longitude / INDEX_CELL_SIZE),
+    )
+
+
+def _ring(center, radius):
+    """Yield the cells at Chebyshev distance ``radius`` from ``center``."""
+    row, column = center
+    if radius == 0:
+        yield center
+        return
+    for offset in range(-radius, radius + 1):
+        yield row - radius, column + offset
+        yield row + radius, column + offset
+    for offset in range(-radius + 1, radius):
+        yield row + offset, column - radius
+        yield row + offset, column + radius
+
+
+class AmbulanceIndex:
+    """A lazily built, thread-safe grid index of available ambulances."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._cells = {}
+        self._entries = {}
+        self._built_at = None
+
+    def invalidate(self):
+        """Mark the index stale; it is rebuilt on the next lookup."""
+        self._built_at = None
+
+    def _ensure_fresh(self):
+        built_at = self._built_at
+        if built_at is not None and time.monotonic() - built_at < INDEX_MAX_AGE:
+            return
+        with self._lock:
+            if self._built_at is not built_at:
+                return
+            self._cells, self._entries = {}, {}
+            rows = Ambulance.objects.filter(
+                is_available=True, latitude__isnull=False, longitude__isnull=False
+            ).values(*ENTRY_FIELDS)
+            for entry in rows.iterator():
+                self._add(entry)
+            self._built_at = time.monotonic()
+
+    def _add(self, entry):
+        self._entries[entry["id"]] = entry
+        cell = _cell(entry["latitude"], entry["longitude"])
+        self._cells.setdefault(cell, {})[entry["id"]] = entry
+
+    def _discard(self, ambulance_id):
+        entry = self._entries.pop(ambulance_id, None)
+        if entry is None:
+            return
+        cell = _cell(entry["latitude"], entry["longitude"])
+        bucket = self._cells[cell]
+        del bucket[ambulance_id]
+        if not bucket:
+            del self._cells[cell]
+
+    def update(self, ambulance):
+        """
+        Add, move or remove one ambulance after it changed.
+
+        Args:
+            ambulance (Ambulance): The saved ambulance.
+        """
+        if self._built_at is None:
+            return
+        with self._lock:
+            self._discard(ambulance.pk)
+            if (
+                ambulance.is_available
+                and ambulance.latitude is not None
+                and ambulance.longitude is not None
+            ):
+                self._add({field: getattr(ambulance, field) for field in ENTRY_FIELDS})
+
+    def remove(self, ambulance_id):
+        """Remove a deleted ambulance."""
+        if self._built_at is None:
+            return
+        with self._lock:
+            self._discard(ambulance_id)
+
+    def nearest(self, latitude, longitude, k, max_distance_km=None):
+        """
+        Return the ``k`` available ambulances closest to a point.
+
+        Args:
+            latitude (float): Latitude of the caller, in degrees.
+            longitude (float): Longitude of the caller, in degrees.
+            k (int): Maximum number of ambulances to return.
+            max_distance_km (float): Ignore ambulances farther than this.
+
+        Returns:
+            list: ``(distance_km, entry)`` tuples, closest first; entries
+                hold the ``ENTRY_FIELDS`` of the ambulance.
+        """
+        self._ensure_fresh()
+        with self._lock:
+            cells = self._cells
+            if k <= 0:
+                return []
+            center = _cell(latitude, longitude)
+            best = []  # max-heap of (-distance, id, entry) holding the k best
+
+            def consider(bucket):
+                for entry in bucket.values():
+                    distance = haversine_km(
+                        latitude, longitude, entry["latitude"], entry["longitude"]
+                    )
+                    if max_distance_km is not None and distance > max_distance_km:
+                        continue
+                    item = (-distance, entry["id"], entry)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+
+            remaining = len(self._entries)
+            radius = 0
+            while remaining:
+                if 8 * radius > len(cells):
+                    # The ring has more cells than the index; scan the
+                    # remaining occupied cells directly instead.
+                    for (row, column), bucket in cells.items():
+                        if max(abs(row - center[0]), abs(column - center[1])) >= radius:
+                            consider(bucket)
+                    break
+                for cell in _ring(center, radius):
+                    bucket = cells.get(cell)
+                    if bucket:
+                        remaining -= len(bucket)
+                        consider(bucket)
+                # Every unvisited cell is at least this far from the caller;
+                # longitude degrees shrink towards the poles, so use the
+                # highest latitude of the searched square.
+                widest = min(89.0, abs(latitude) + (radius + 1) * INDEX_CELL_SIZE)
+                bound = (
+                    radius
+                    * INDEX_CELL_SIZE
+                    * KM_PER_DEGREE
+                    * math.cos(math.radians(widest))
+                )
+                if max_distance_km is not None and bound > max_distance_km:
+                    break
+                if len(best) == k and -best[0][0] <= bound:
+                    break
+                radius += 1
+        return [(-distance, entry) for distance, _, entry in sorted(best, reverse=True)]
+
+
+ambulance_index = AmbulanceIndex()
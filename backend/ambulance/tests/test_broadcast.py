@@ -0,0 +1,163 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ambulance.broadcast import ambulance_broadcaster, ambulance_state
+from ambulance.models import Ambulance
+
+
+def _parse_event(chunk):
+    if isinstance(chunk, bytes):
+        chunk = chunk.decode()
+    fields = dict(
+        line.split(": ", 1) for line in chunk.strip().splitlines() if ": " in line
+    )
+    return fields.get("event"), json.loads(fields["data"])
+
+
+class AmbulanceBroadcasterTests(TestCase):
+    def setUp(self):
+        ambulance_broadcaster.invalidate()
+        self.addCleanup(ambulance_broadcaster.invalidate)
+        self.ambulance = Ambulance.objects.create(
+            registration_number="JU-1",
+            driver_name="Karim",
+            contact_number="01700000000",
+            current_location="Campus",
+            latitude=23.88,
+            longitude=90.26,
+        )
+
+    def test_snapshot_is_loaded_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            first = ambulance_broadcaster.snapshot()
+            second = ambulance_broadcaster.snapshot()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]["registration_number"], "JU-1")
+
+    def test_saves_update_the_snapshot_without_queries(self):
+        ambulance_broadcaster.snapshot()
+        self.ambulance.is_available = False
+        self.ambulance.save()
+        Ambulance.objects.create(
+            registration_number="JU-2",
+            driver_name="Rahim",
+            contact_number="01800000000",
+            current_location="Gate",
+        )
+        with CaptureQueriesContext(connection) as queries:
+            snapshot = ambulance_broadcaster.snapshot()
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(
+            [a["registration_number"] for a in snapshot], ["JU-1", "JU-2"]
+        )
+        self.assertFalse(snapshot[0]["is_available"])
+
+        self.ambulance.delete()
+        self.assertEqual(
+            [a["registration_number"] for a in ambulance_broadcaster.snapshot()],
+            ["JU-2"],
+        )
+
+    def test_changes_are_fanned_out_to_every_subscriber(self):
+        async def scenario():
+            first = ambulance_broadcaster.subscribe()
+            second = ambulance_broadcaster.subscribe()
+            try:
+                state = ambulance_state(self.ambulance)
+                state["is_available"] = False
+                # Publishers run in worker threads
+                await asyncio.to_thread(ambulance_broadcaster.publish, state)
+                return [
+                    await asyncio.wait_for(subscription.queue.get(), 1)
+                    for subscription in (first, second)
+                ]
+            finally:
+                ambulance_broadcaster.unsubscribe(first)
+                ambulance_broadcaster.unsubscribe(second)
+
+        events = asyncio.run(scenario())
+        self.assertEqual([event for event, _ in events], ["update", "update"])
+        self.assertFalse(events[0][1]["is_available"])
+        self.assertEqual(len(ambulance_broadcaster), 0)
+
+    def test_lagging_subscriber_is_flagged(self):
+        async def scenario():
+            subscription = ambulance_broadcaster.subscribe()
+            try:
+                with patch.object(subscription.queue, "_maxsize", 1):
+                    for pk in (1, 2):
+                        ambulance_broadcaster.publish({"id": pk}, deleted=True)
+                    await asyncio.sleep(0)
+                return subscription.queue.qsize(), subscription.lagged
+            finally:
+                ambulance_broadcaster.unsubscribe(subscription)
+
+        self.assertEqual(asyncio.run(scenario()), (1, True))
+
+    def test_refresh_publishes_changes_made_elsewhere(self):
+        ambulance_broadcaster.snapshot()
+        # A queryset update bypasses the signals, like another process would
+        Ambulance.objects.filter(pk=self.ambulance.pk).update(latitude=24.0)
+        with patch.object(ambulance_broadcaster, "publish") as publish:
+            ambulance_broadcaster.refresh()
+        publish.assert_called_once()
+        self.assertEqual(publish.call_args.args[0]["latitude"], 24.0)
+
+
+class AmbulanceStreamTests(TestCase):
+    def setUp(self):
+        ambulance_broadcaster.invalidate()
+        self.addCleanup(ambulance_broadcaster.invalidate)
+        self.ambulance = Ambulance.objects.create(
+            registration_number="JU-1",
+            driver_name="Karim",
+            contact_number="01700000000",
+            current_location="Campus",
+        )
+        self.url = reverse("ambulance:ambulance-stream")
+
+    async def test_stream_sends_snapshot_then_updates(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        chunks = asyncio.Queue()
+
+        async def consume():
+            async for chunk in response.streaming_content:
+                chunks.put_nowait(chunk)
+
+        consumer = asyncio.create_task(consume())
+        try:
+            event, data = _parse_event(await asyncio.wait_for(chunks.get(), 1))
+            self.assertEqual(event, "snapshot")
+            self.assertEqual(data[0]["registration_number"], "JU-1")
+            self.assertEqual(len(ambulance_broadcaster), 1)
+
+            self.ambulance.is_available = False
+            await self.ambulance.asave()
+            event, data = _parse_event(await asyncio.wait_for(chunks.get(), 1))
+            self.assertEqual(event, "update")
+            self.assertFalse(data["is_available"])
+        finally:
+            # Like the ASGI handler when the client disconnects
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+        self.assertEqual(len(ambulance_broadcaster), 0)
+
+    def test_wsgi_stream_ends_after_snapshot(self):
+        response = self.client.get(self.url)
+        chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 1)
+        self.assertIn(b"retry: ", chunks[0])
+        self.assertEqual(_parse_event(chunks[0])[0], "snapshot")
+
+    def test_post_is_rejected(self):
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,134 @@
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ambulance.ingestion import LocationBuffer
+from ambulance.models import Ambulance
+from ambulance.spatial import ambulance_index
+
+NOW = datetime(2025, 3, 1, 10, 0, tzinfo=timezone.utc)
+
+
+@override_settings(AMBULANCE_PING_FLUSH_INTERVAL=5)
+class LocationBufferTests(TestCase):
+    def setUp(self):
+        ambulance_index.invalidate()
+        self.ambulance = Ambulance.objects.create(
+            registration_number="JU-1",
+            driver_name="Karim",
+            contact_number="01700000000",
+            current_location="Campus",
+        )
+        self.buffer = LocationBuffer()
+        patcher = patch.object(LocationBuffer, "_ensure_flusher")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_only_latest_position_is_written(self):
+        self.buffer.add(
+            [
+                ("JU-1", 23.80, 90.40, NOW + timedelta(seconds=2)),
+                ("JU-1", 23.70, 90.30, NOW),
+                ("JU-9", 23.00, 90.00, NOW),
+            ]
+        )
+        self.buffer.add([("JU-1", 23.81, 90.41, NOW + timedelta(seconds=1))])
+        self.assertEqual(len(self.buffer), 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.buffer.flush(), 1)
+        # One SELECT and one UPDATE, whatever the number of pings
+        statements = [
+            query["sql"].split()[0]
+            for query in queries.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+        self.assertEqual(statements, ["SELECT", "UPDATE"])
+        self.assertEqual(len(self.buffer), 0)
+        self.ambulance.refresh_from_db()
+        self.assertEqual(
+            (self.ambulance.latitude, self.ambulance.longitude), (23.8, 90.4)
+        )
+
+    def test_stale_ping_is_ignored(self):
+        self.buffer.add([("JU-1", 23.80, 90.40, NOW)])
+        self.buffer.flush()
+        self.buffer.add([("JU-1", 23.70, 90.30, NOW - timedelta(minutes=1))])
+        self.assertEqual(self.buffer.flush(), 0)
+        self.ambulance.refresh_from_db()
+        self.assertEqual(self.ambulance.latitude, 23.80)
+
+    def test_flush_moves_ambulance_in_index(self):
+        ambulance_index.nearest(23.8, 90.4, 1)
+        self.buffer.add([("JU-1", 23.80, 90.40, NOW)])
+        self.buffer.flush()
+        distance, entry = ambulance_index.nearest(23.8, 90.4, 1)[0]
+        self.assertEqual(entry["registration_number"], "JU-1")
+        self.assertAlmostEqual(distance, 0)
+
+    def test_failed_flush_keeps_positions(self):
+        self.buffer.add([("JU-1", 23.80, 90.40, NOW)])
+        with patch.object(LocationBuffer, "_write", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.buffer.flush()
+        self.assertEqual(len(self.buffer), 1)
+
+
+@override_settings(
+    AMBULANCE_INGEST_TOKEN="tracker-secret", AMBULANCE_PING_FLUSH_INTERVAL=0
+)
+class IngestAmbulancePingsTests(TestCase):
+    def setUp(self):
+        Ambulance.objects.create(
+            registration_number="JU-1",
+            driver_name="Karim",
+            contact_number="01700000000",
+            current_location="Campus",
+        )
+        self.url = reverse("ambulance:ingest-ambulance-pings")
+
+    def post(self, body, token="tracker-secret"):
+        return self.client.post(
+            self.url,
+            json.dumps(body),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+
+    def test_batch_is_ingested(self):
+        response = self.post(
+            {
+                "pings": [
+                    {
+                        "registration_number": "JU-1",
+                        "lat": 23.88,
+                        "lon": 90.27,
+                        "timestamp": "2025-03-01T10:00:00Z",
+                    },
+                    {
+                        "registration_number": "JU-1",
+                        "lat": 23.89,
+                        "lon": 90.28,
+                        "timestamp": NOW.timestamp() + 5,
+                    },
+                    {"registration_number": "JU-1", "lat": 123, "lon": 90},
+                ]
+            }
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["accepted"], 2)
+        self.assertEqual(response.json()["rejected"][0]["index"], 2)
+        ambulance = Ambulance.objects.get()
+        self.assertEqual((ambulance.latitude, ambulance.longitude), (23.89, 90.28))
+
+    def test_wrong_token(self):
+        self.assertEqual(self.post({"pings": []}, token="nope").status_code, 403)
+
+    def test_invalid_body(self):
+        self.assertEqual(self.post({"ping": []}).status_code, 400)
+        self.assertEqual(self.post({"pings": [{}] * 1001}).status_code, 400)
@@ -0,0 +1,108 @@
+import random
+
+from django.test import TestCase
+from django.urls import reverse
+
+from ambulance.models import Ambulance
+from ambulance.spatial import AmbulanceIndex, ambulance_index, haversine_km
+
+
+def create_ambulance(number, latitude, longitude, is_available=True):
+    return Ambulance.objects.create(
+        registration_number=f"JU-{number}",
+        driver_name=f"Driver {number}",
+        contact_number="01700000000",
+        current_location="Campus",
+        latitude=latitude,
+        longitude=longitude,
+        is_available=is_available,
+    )
+
+
+class AmbulanceIndexTests(TestCase):
+    def setUp(self):
+        ambulance_index.invalidate()
+
+    def test_haversine(self):
+        # Dhaka to Savar is about 16 km as the crow flies
+        self.assertAlmostEqual(
+            haversine_km(23.8103, 90.4125, 23.8583, 90.2667), 15.7, delta=0.5
+        )
+        self.assertEqual(haversine_km(23.8, 90.4, 23.8, 90.4), 0)
+
+    def test_nearest_matches_brute_force(self):
+        rng = random.Random(3)
+        points = [
+            (rng.uniform(23.5, 24.2), rng.uniform(90.0, 90.8)) for _ in range(300)
+        ]
+        for number, (latitude, longitude) in enumerate(points):
+            create_ambulance(number, latitude, longitude)
+
+        index = AmbulanceIndex()
+        with self.assertNumQueries(1):
+            for _ in range(20):
+                latitude, longitude = rng.uniform(23.4, 24.3), rng.uniform(89.9, 90.9)
+                expected = sorted(
+                    haversine_km(latitude, longitude, *point) for point in points
+                )[:7]
+                found = [
+                    distance for distance, _ in index.nearest(latitude, longitude, 7)
+                ]
+                self.assertEqual(len(found), 7)
+                for got, want in zip(found, expected):
+                    self.assertAlmostEqual(got, want)
+
+    def test_far_away_caller_and_small_fleet(self):
+        create_ambulance(1, 23.88, 90.27)
+        create_ambulance(2, 22.35, 91.78)
+        found = AmbulanceIndex().nearest(51.5, -0.12, 5)
+        self.assertEqual(
+            [entry["registration_number"] for _, entry in found], ["JU-1", "JU-2"]
+        )
+
+    def test_index_follows_updates(self):
+        ambulance = create_ambulance(1, 23.88, 90.27)
+        create_ambulance(2, 23.90, 90.30, is_available=False)
+        self.assertEqual(len(ambulance_index.nearest(23.88, 90.27, 5)), 1)
+
+        ambulance.latitude, ambulance.longitude = 22.35, 91.78
+        ambulance.save()
+        distance, entry = ambulance_index.nearest(22.35, 91.78, 1)[0]
+        self.assertEqual(entry["registration_number"], "JU-1")
+        self.assertAlmostEqual(distance, 0)
+
+        ambulance.is_available = False
+        ambulance.save()
+        self.assertEqual(ambulance_index.nearest(22.35, 91.78, 5), [])
+
+    def test_max_distance(self):
+        create_ambulance(1, 23.88, 90.27)
+        create_ambulance(2, 22.35, 91.78)
+        found = ambulance_index.nearest(23.88, 90.27, 5, max_distance_km=50)
+        self.assertEqual(len(found), 1)
+
+
+class NearestAmbulancesControllerTests(TestCase):
+    def setUp(self):
+        ambulance_index.invalidate()
+        create_ambulance(1, 23.8800, 90.2700)
+        create_ambulance(2, 23.9000, 90.2700)
+        create_ambulance(3, 23.7000, 90.4000)
+
+    def test_nearest_ambulances(self):
+        response = self.client.get(
+            reverse("ambulance:nearest-ambulances"),
+            {"lat": 23.8810, "lon": 90.2700, "k": 2},
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(
+            [result["registration_number"] for result in results], ["JU-1", "JU-2"]
+        )
+        self.assertLess(results[0]["distance_km"], results[1]["distance_km"])
+        self.assertGreater(results[1]["eta_minutes"], 0)
+
+    def test_invalid_coordinates(self):
+        url = reverse("ambulance:nearest-ambulances")
+        for params in ({}, {"lat": "abc", "lon": 90}, {"lat": 95, "lon": 90}):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
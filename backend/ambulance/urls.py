@@ -0,0 +1,14 @@
+from django.urls import path
+
+from ambulance.controllers import (
+    ambulance_stream,
+    ingest_ambulance_pings,
+    nearest_ambulances,
+)
+
+app_name = "ambulance"
+urlpatterns = [
+    path("nearest/", nearest_ambulances, name="nearest-ambulances"),
+    path("pings/", ingest_ambulance_pings, name="ingest-ambulance-pings"),
+    path("stream/", ambulance_stream, name="ambulance-stream"),
+]
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import DoctorAppointment, TestAppointment
+from .models import DoctorAppointment, DoctorWorkingHours, TestAppointment
 
 admin.site.register(DoctorAppointment)
+admin.site.register(DoctorWorkingHours)
 admin.site.register(TestAppointment)
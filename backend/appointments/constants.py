@@ -3,3 +3,30 @@ STATUS_CHOICES = [
     ("completed", "Completed"),
     ("canceled", "Canceled"),
 ]
+
+WEEKDAY_CHOICES = [
+    (0, "Monday"),
+    (1, "Tuesday"),
+    (2, "Wednesday"),
+    (3, "Thursday"),
+    (4, "Friday"),
+    (5, "Saturday"),
+    (6, "Sunday"),
+]
+
+# Length of an appointment slot, in minutes, unless a doctor's working hours
+# say otherwise
+DEFAULT_SLOT_MINUTES = 15
+
+# Days ahead searched for free slots
+SCHEDULING_HORIZON_DAYS = 14
+
+# Free slots offered when booking an appointment
+NEXT_FREE_SLOTS = 10
+
+# Upper bound on the slots returned by the free slots endpoint
+MAX_FREE_SLOTS = 50
+
+# Seconds after which a doctor's triage queue is rebuilt from the database, so
+# appointments booked through other worker processes are picked up
+TRIAGE_MAX_AGE = 60
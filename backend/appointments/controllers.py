@@ -1,12 +1,30 @@
 from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.views.decorators.http import require_GET, require_POST
 from .models import DoctorAppointment
 from django.contrib import messages
 from users.models import Patient, Doctor, LabTechnician
+from users.counters import adjust_doctor_counters
 from datetime import timedelta
 from django.utils import timezone
 from appointments.forms import DoctorAppointmentCreationForm, RescheduleAppointmentForm
+from appointments.constants import MAX_FREE_SLOTS, NEXT_FREE_SLOTS
 from appointments.models import TestAppointment
+from appointments.scheduling import (
+    SlotUnavailable,
+    free_slots,
+    lock_doctor_schedule,
+    next_free_slots,
+    slot_error,
+)
+from appointments.triage import triage_board
+from core.general.utils.dates import day_bounds
+from medical_tests.constants import LAB_WORKLIST_SIZE
+from medical_tests.worklist import pending_worklist
 
 
 # Doctor part start
@@ -33,12 +51,75 @@ def get_doctor_appointments(doctor):
     return appointments
 
 
+def get_doctor_appointments_on(doctor, day):
+    """
+    Retrieves a doctor's scheduled appointments of one day in time order.
+
+    Parameters:
+        doctor (Doctor): The Doctor instance.
+        day (date): The day, in the current time zone.
+
+    Returns:
+        QuerySet: The DoctorAppointment objects of that day.
+    """
+    start, end = day_bounds(day)
+    return get_doctor_appointments(doctor).filter(
+        appointment_date_time__gte=start, appointment_date_time__lt=end
+    )
+
+
+def get_test_appointments(lab_technician):
+    """
+    Retrieves the test appointments of a lab technician in time order.
+
+    Parameters:
+        lab_technician (LabTechnician): The lab technician.
+
+    Returns:
+        QuerySet: The technician's TestAppointment objects.
+    """
+    return TestAppointment.objects.filter(lab_technician=lab_technician).order_by(
+        "appointment_date_time"
+    )
+
+
+def get_monthly_appointment_counts(doctor, year):
+    """
+    Counts a doctor's scheduled appointments per month of the given year.
+
+    The counting is done by the database with ``TruncMonth``/``Count``, so only
+    up to twelve rows are transferred however many appointments the doctor has.
+
+    Parameters:
+        doctor (Doctor): The Doctor instance whose appointments are counted.
+        year (int): The calendar year (in the current time zone) to count.
+
+    Returns:
+        list: Twelve integers, the number of appointments from January to December.
+    """
+    rows = (
+        get_doctor_appointments(doctor)
+        .filter(appointment_date_time__year=year)
+        .annotate(month=TruncMonth("appointment_date_time"))
+        .order_by()
+        .values("month")
+        .annotate(count=Count("id"))
+    )
+    counts = [0] * 12
+    for row in rows:
+        counts[row["month"].month - 1] = row["count"]
+    return counts
+
+
 def delete_doctor_appointment(request, pk):
     """
     Deletes a specific doctor appointment.
 
-    This function retrieves an appointment by its primary key (pk), deletes it, and updates
-    the associated doctor's appointment count. It also sends a success message to the user.
+    This function retrieves an appointment by its primary key (pk), deletes it, and
+    atomically adjusts the associated doctor's counters: the appointment count if it was
+    still scheduled, the prescriptions deleted with it, and the patient count if it was
+    the patient's last appointment with the doctor. It also sends a success message to
+    the user.
 
     Parameters:
         request (HttpRequest): The HTTP request object.
@@ -48,15 +129,53 @@ def delete_doctor_appointment(request, pk):
         HttpResponseRedirect: A redirect to the doctor dashboard after deletion.
     """
     appointment = get_object_or_404(DoctorAppointment, pk=pk)
-    doctor = appointment.doctor
-    appointment.delete()
-    if doctor.no_of_appointments > 0:
-        doctor.no_of_appointments -= 1
-        doctor.save()
+    with transaction.atomic():
+        prescriptions = appointment.doctor_appointments.count()
+        appointment.delete()
+        last_with_doctor = not DoctorAppointment.objects.filter(
+            doctor_id=appointment.doctor_id, patient_id=appointment.patient_id
+        ).exists()
+        adjust_doctor_counters(
+            appointment.doctor_id,
+            appointments=-1 if appointment.status == "scheduled" else 0,
+            patients=-1 if last_with_doctor else 0,
+            prescriptions=-prescriptions,
+        )
     messages.success(request, "Appointment deleted successfully.")
     return redirect("users:doctor-dashboard")
 
 
+@login_required
+@require_POST
+def call_next_patient(request):
+    """
+    Calls in the logged-in doctor's next waiting patient.
+
+    Today's scheduled appointments are served from the doctor's in-memory
+    triage queue (see `appointments.triage`): emergencies first, then the
+    patient waiting the longest. Each call pops the queue instead of
+    re-reading the day's appointments, and a called patient is not offered
+    again.
+
+    Parameters:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponseRedirect: A redirect to the consultation of the called
+        patient, or to the doctor dashboard when nobody is waiting.
+    """
+    doctor = get_object_or_404(Doctor, user=request.user)
+    appointment = triage_board.call_next(doctor.id)
+    if appointment is None:
+        messages.info(request, "No patients are waiting.")
+        return redirect("users:doctor-dashboard")
+    emergency = " (emergency)" if appointment.is_emergency else ""
+    messages.success(request, f"Calling {appointment.patient.user.name}{emergency}.")
+    return redirect(
+        "medicines:get-information-for-prescription", appointment_id=appointment.id
+    )
+
+
 def get_patient_information(request, pk):
     """
     Retrieves and displays information about a patient associated with a specific appointment.
@@ -139,7 +258,7 @@ def test_appointments_list(request):
             )
             return redirect("users:users-login")
 
-        appointments = TestAppointment.objects.filter(lab_technician=lab_technician)
+        appointments = get_test_appointments(lab_technician)
 
         return render(
             request,
@@ -152,18 +271,40 @@ def test_appointments_list(request):
 
 @login_required(login_url="users:users-login")
 def labt_dashboard(request):
+    """
+    Displays the lab technician's landing page.
+
+    Lists the pending slice of the lab worklist, emergencies first and then in
+    arrival order, followed by the technician's test appointments.
+
+    Parameters
+    ----------
+    request : HttpRequest
+        The HTTP request object from the logged-in user.
+
+    Returns
+    -------
+    HttpResponse
+        Renders 'lab_technician_dashboard_list.htm' with the worklist, the
+        appointments and the lab technician context.
+    """
     try:
         lab_technician = LabTechnician.objects.get(user=request.user)
     except LabTechnician.DoesNotExist:
         messages.error(request, "You do not have permission to view test appointments.")
         return redirect("users:users-login")
 
-    appointments = TestAppointment.objects.filter(lab_technician=lab_technician)
+    appointments = get_test_appointments(lab_technician)
+    worklist = pending_worklist()[:LAB_WORKLIST_SIZE]
 
     return render(
         request,
         "lab_technician/lab_technician_dashboard_list.htm",
-        {"appointments": appointments, "lab_technician": lab_technician},
+        {
+            "appointments": appointments,
+            "worklist": worklist,
+            "lab_technician": lab_technician,
+        },
     )
 
 
@@ -235,11 +376,14 @@ def create_doctor_appointment(request):
     appointment.
 
     If the form data is valid:
+        - It locks the doctor's row and checks the slot again, so concurrent bookings
+          of the doctor cannot both take the same or overlapping times.
         - It associates the appointment with the current patient.
         - It checks if the patient has any previous appointments with the selected doctor.
           If not, it increments the doctor's `no_of_patients` by one.
         - It increments the doctor’s `no_of_appointments` by one, regardless of whether the
-          patient is new to this doctor.
+          patient is new to this doctor. Counters are updated atomically through
+          `users.counters.adjust_doctor_counters`.
         - The appointment is saved to the database and a success message is displayed.
         - The user is redirected to the list of their appointments.
 
@@ -263,33 +407,102 @@ def create_doctor_appointment(request):
         )
         return redirect("users:users-login")
 
+    slots = []
     if request.method == "POST":
         form = DoctorAppointmentCreationForm(request.POST)
         if form.is_valid():
-            appointment = form.save(commit=False)
-            appointment.patient = patient
-            appointment.save()
-
-            # Retrieve the selected doctor and check for existing appointments with the patient
             doctor = form.cleaned_data["doctor"]
-            has_existing_appointments = (
-                DoctorAppointment.objects.filter(doctor=doctor, patient=patient)
-                .exclude(id=appointment.id)
-                .exists()
-            )
-
-            # Update doctor's patient and appointment counts
-            if not has_existing_appointments:
-                doctor.no_of_patients += 1
-            doctor.no_of_appointments += 1
-            doctor.save()
-
-            messages.success(request, "Doctor appointment created successfully.")
-            return redirect("appointments:doctor-appointment-list-for-patient")
+            try:
+                with transaction.atomic():
+                    # Bookings of the doctor are checked and inserted one at a
+                    # time, as the constraint only refuses identical times
+                    lock_doctor_schedule(doctor)
+                    if not form.cleaned_data["is_emergency"]:
+                        error = slot_error(
+                            doctor, form.cleaned_data["appointment_date_time"]
+                        )
+                        if error:
+                            raise SlotUnavailable(error)
+                    appointment = form.save(commit=False)
+                    appointment.patient = patient
+                    appointment.save()
+
+                    # Check for existing appointments of the patient with the doctor
+                    has_existing_appointments = (
+                        DoctorAppointment.objects.filter(doctor=doctor, patient=patient)
+                        .exclude(id=appointment.id)
+                        .exists()
+                    )
+
+                    # Update doctor's patient and appointment counts
+                    adjust_doctor_counters(
+                        doctor.id,
+                        appointments=1,
+                        patients=0 if has_existing_appointments else 1,
+                    )
+            except SlotUnavailable as error:
+                # Another patient booked the slot since the form was validated
+                form.add_error("appointment_date_time", str(error))
+            except IntegrityError:
+                form.add_error(
+                    "appointment_date_time",
+                    f"Dr. {doctor.user.name} is already booked at that time.",
+                )
+            else:
+                messages.success(request, "Doctor appointment created successfully.")
+                return redirect("appointments:doctor-appointment-list-for-patient")
+        doctor = form.cleaned_data.get("doctor")
+        if doctor is not None:
+            slots = free_slots(doctor)[:NEXT_FREE_SLOTS]
     else:
         form = DoctorAppointmentCreationForm()
 
-    return render(request, "patients/make_doctor_appointment.html", {"form": form})
+    return render(
+        request,
+        "patients/make_doctor_appointment.html",
+        {"form": form, "free_slots": slots},
+    )
+
+
+@login_required
+@require_GET
+def get_free_slots(request):
+    """
+    Returns the earliest free appointment slots across the doctors of a specialty.
+
+    Query parameters:
+        specialty: The doctors' specialty, e.g. "cardiology".
+        count (optional): Number of slots, at most ``MAX_FREE_SLOTS``.
+
+    Args:
+        request (HttpRequest): The request object containing metadata about the request.
+
+    Returns:
+        JsonResponse: The slots in time order, each with the doctor and the
+                      start and end times; a 400 error response if the
+                      parameters are invalid.
+    """
+    specialty = request.GET.get("specialty", "").strip().lower()
+    try:
+        count = int(request.GET.get("count", NEXT_FREE_SLOTS))
+    except ValueError:
+        count = 0
+    if not specialty or count < 1:
+        return JsonResponse(
+            {"error": "A specialty and a positive count are required."}, status=400
+        )
+
+    slots = next_free_slots(specialty, min(count, MAX_FREE_SLOTS))
+    results = [
+        {
+            "doctor_id": slot.doctor.id,
+            "doctor_name": slot.doctor.user.name,
+            "start": slot.start.isoformat(),
+            "end": slot.end.isoformat(),
+        }
+        for slot in slots
+    ]
+    return JsonResponse({"results": results})
 
 
 @login_required
@@ -1,5 +1,6 @@
 from django import forms
 from appointments.models import TestAppointment, DoctorAppointment
+from appointments.scheduling import slot_error
 from django.utils import timezone
 from users.models import Doctor
 
@@ -53,3 +54,18 @@ class DoctorAppointmentCreationForm(forms.ModelForm):
     class Meta:
         model = DoctorAppointment
         fields = ["doctor", "appointment_date_time", "reason", "is_emergency"]
+
+    def clean(self):
+        """
+        Refuses times outside the doctor's slots or already booked.
+
+        Emergencies are seen outside the slots and are not checked.
+        """
+        cleaned_data = super().clean()
+        doctor = cleaned_data.get("doctor")
+        appointment_date_time = cleaned_data.get("appointment_date_time")
+        if doctor and appointment_date_time and not cleaned_data.get("is_emergency"):
+            error = slot_error(doctor, appointment_date_time, exclude=self.instance.pk)
+            if error:
+                self.add_error("appointment_date_time", error)
+        return cleaned_data
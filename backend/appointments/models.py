@@ -1,5 +1,10 @@
 from django.db import models
-from appointments.constants import STATUS_CHOICES
+from django.db.models import F, Q
+from appointments.constants import (
+    DEFAULT_SLOT_MINUTES,
+    STATUS_CHOICES,
+    WEEKDAY_CHOICES,
+)
 from users.models import Doctor, Patient, LabTechnician
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -53,12 +58,41 @@ class DoctorAppointment(Appointment):
     Attributes:
         doctor (ForeignKey): A reference to the Doctor model, indicating the doctor assigned to this appointment.
         reason (CharField): A short description or reason for the appointment.
+        called_at (DateTimeField): When the doctor called the patient in from
+            the triage queue, if they have been.
     """
 
     doctor = models.ForeignKey(
         Doctor, on_delete=models.CASCADE, related_name="doctor_appointments"
     )
     reason = models.CharField(max_length=200, default="")
+    called_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["doctor", "appointment_date_time"],
+                name="doctor_appointment_slot_idx",
+            ),
+            # A doctor's scheduled (or completed) appointments in time order
+            models.Index(
+                fields=["doctor", "status", "appointment_date_time"],
+                name="doctor_appointment_status_idx",
+            ),
+            # A patient's history, newest first (see users.timeline)
+            models.Index(
+                fields=["patient", "-appointment_date_time"],
+                name="doctor_appointment_patient_idx",
+            ),
+        ]
+        constraints = [
+            # A slot holds one booking; emergencies are seen outside the slots
+            models.UniqueConstraint(
+                fields=["doctor", "appointment_date_time"],
+                condition=Q(is_emergency=False) & ~Q(status="canceled"),
+                name="unique_doctor_appointment_slot",
+            ),
+        ]
 
     def __str__(self):
         """
@@ -70,6 +104,51 @@ class DoctorAppointment(Appointment):
         return f"Appointment with Dr. {self.doctor.user.name} on {self.appointment_date_time}"
 
 
+class DoctorWorkingHours(models.Model):
+    """
+    A weekly period in which a doctor takes appointments, divided into slots.
+
+    A doctor may have several periods on the same day (e.g. morning and
+    evening). Doctors without working hours take appointments at any time.
+
+    Attributes:
+        doctor (ForeignKey): The doctor working these hours.
+        weekday (PositiveSmallIntegerField): Day of the week, Monday being 0.
+        start_time (TimeField): Start of the first slot.
+        end_time (TimeField): End of the period; the last slot ends by then.
+        slot_minutes (PositiveSmallIntegerField): Length of each slot.
+    """
+
+    doctor = models.ForeignKey(
+        Doctor, on_delete=models.CASCADE, related_name="working_hours"
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    slot_minutes = models.PositiveSmallIntegerField(default=DEFAULT_SLOT_MINUTES)
+
+    class Meta:
+        ordering = ["doctor", "weekday", "start_time"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["doctor", "weekday", "start_time"],
+                name="unique_doctor_working_hours",
+            ),
+            models.CheckConstraint(
+                condition=Q(end_time__gt=F("start_time")),
+                name="working_hours_end_after_start",
+            ),
+        ]
+        verbose_name_plural = "doctor working hours"
+
+    def __str__(self):
+        """Returns the doctor, the day and the hours."""
+        return (
+            f"{self.doctor} on {self.get_weekday_display()} "
+            f"{self.start_time:%H:%M}-{self.end_time:%H:%M}"
+        )
+
+
 class TestAppointment(Appointment):
     from medical_tests.models import Test
 
@@ -87,6 +166,15 @@ class TestAppointment(Appointment):
         Test, on_delete=models.CASCADE, related_name="test"
     )
 
+    class Meta:
+        indexes = [
+            # A lab technician's appointments in time order
+            models.Index(
+                fields=["lab_technician", "appointment_date_time"],
+                name="test_appointment_labt_idx",
+            ),
+        ]
+
     def __str__(self):
         """
         String representation of the TestAppointment object.
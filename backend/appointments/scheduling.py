@@ -0,0 +1,240 @@
+"""
+Slot-based scheduling of doctor appointments.
+
+A doctor's week is described by :class:`appointments.models.DoctorWorkingHours`
+periods, each divided into slots of ``slot_minutes``. A slot is free when no
+scheduled or completed, non-emergency appointment of the doctor starts in
+it; emergencies are seen outside the slots.
+
+Booked times are read with one range query per call on the
+``(doctor, appointment_date_time)`` index of ``DoctorAppointment``, and the
+slots themselves are generated in Python from the working hours, so nothing
+is stored per slot. Two patients booking the same slot at once are kept
+apart by the ``unique_doctor_appointment_slot`` constraint: the second
+``INSERT`` fails and :func:`appointments.controllers.create_doctor_appointment`
+reports the slot as taken.
+
+Doctors without working hours keep taking appointments at any time; only
+bookings closer than ``DEFAULT_SLOT_MINUTES`` to another one are refused.
+The constraint cannot see such near misses, so ``create_doctor_appointment``
+locks the doctor's row and runs :func:`slot_error` again in the booking's
+transaction: concurrent bookings of one doctor are checked one after the
+other.
+"""
+
+import heapq
+from bisect import bisect_left
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+from itertools import islice
+from operator import attrgetter
+
+from django.utils import timezone
+
+from appointments.constants import (
+    DEFAULT_SLOT_MINUTES,
+    NEXT_FREE_SLOTS,
+    SCHEDULING_HORIZON_DAYS,
+)
+from appointments.models import DoctorAppointment, DoctorWorkingHours
+from users.models import Doctor
+
+Slot = namedtuple("Slot", ["doctor", "start", "end"])
+
+
+class SlotUnavailable(Exception):
+    """
+    Raised inside a booking transaction when the wanted time was taken
+    since the form was validated.
+    """
+
+
+def booked_times(doctor_ids, start, end):
+    """
+    Return the start times of the bookings of some doctors in a period.
+
+    Args:
+        doctor_ids (iterable): Primary keys of the doctors.
+        start (datetime): Start of the period.
+        end (datetime): End of the period (excluded).
+
+    Returns:
+        dict: Sorted lists of appointment times, keyed by doctor id.
+    """
+    rows = (
+        DoctorAppointment.objects.filter(
+            doctor_id__in=doctor_ids,
+            appointment_date_time__gte=start,
+            appointment_date_time__lt=end,
+            is_emergency=False,
+        )
+        .exclude(status="canceled")
+        .values_list("doctor_id", "appointment_date_time")
+    )
+    booked = defaultdict(list)
+    for doctor_id, appointment_date_time in rows:
+        booked[doctor_id].append(appointment_date_time)
+    for times in booked.values():
+        times.sort()
+    return booked
+
+
+def _is_booked(booked, start, end):
+    index = bisect_left(booked, start)
+    return index < len(booked) and booked[index] < end
+
+
+def _day_slots(periods, day):
+    """Return the (start, end) of every slot of ``periods`` on ``day``."""
+    tz = timezone.get_current_timezone()
+    slots = set()
+    for period in periods:
+        if period.weekday != day.weekday():
+            continue
+        step = timedelta(minutes=period.slot_minutes)
+        start = timezone.make_aware(datetime.combine(day, period.start_time), tz)
+        end = timezone.make_aware(datetime.combine(day, period.end_time), tz)
+        while start + step <= end:
+            slots.add((start, start + step))
+            start += step
+    return sorted(slots)
+
+
+def _free_slots(doctor, periods, booked, start, end):
+    """Yield the free slots of a doctor between ``start`` and ``end`` in order."""
+    day = timezone.localtime(start).date()
+    last_day = timezone.localtime(end).date()
+    while day <= last_day:
+        for slot_start, slot_end in _day_slots(periods, day):
+            if slot_start < start:
+                continue
+            if slot_end > end:
+                return
+            if not _is_booked(booked, slot_start, slot_end):
+                yield Slot(doctor, slot_start, slot_end)
+        day += timedelta(days=1)
+
+
+def _period(start, days):
+    start = start or timezone.now()
+    return start, start + timedelta(days=days)
+
+
+def free_slots(doctor, start=None, days=SCHEDULING_HORIZON_DAYS):
+    """
+    List the free slots of a doctor.
+
+    Args:
+        doctor (Doctor): The doctor.
+        start (datetime): Earliest slot start; defaults to now.
+        days (int): Number of days searched from ``start``.
+
+    Returns:
+        list: :class:`Slot` tuples in time order; empty when the doctor has no
+            working hours.
+    """
+    start, end = _period(start, days)
+    periods = list(doctor.working_hours.all())
+    if not periods:
+        return []
+    booked = booked_times([doctor.id], start, end)[doctor.id]
+    return list(_free_slots(doctor, periods, booked, start, end))
+
+
+def next_free_slots(
+    specialty, count=NEXT_FREE_SLOTS, start=None, days=SCHEDULING_HORIZON_DAYS
+):
+    """
+    Find the earliest free slots across all doctors of a specialty.
+
+    Runs two queries whatever the number of doctors: one for the working
+    hours and one for the bookings. The slots of each doctor are generated
+    lazily and merged, so only about ``count`` slots are built.
+
+    Args:
+        specialty (str): The doctors' specialty, e.g. "cardiology".
+        count (int): Number of slots wanted.
+        start (datetime): Earliest slot start; defaults to now.
+        days (int): Number of days searched from ``start``.
+
+    Returns:
+        list: Up to ``count`` :class:`Slot` tuples in time order, ties broken
+            by doctor id.
+    """
+    start, end = _period(start, days)
+    periods = defaultdict(list)
+    doctors = {}
+    for period in DoctorWorkingHours.objects.filter(
+        doctor__specialty=specialty
+    ).select_related("doctor__user"):
+        periods[period.doctor_id].append(period)
+        doctors[period.doctor_id] = period.doctor
+    booked = booked_times(doctors, start, end)
+    slots = heapq.merge(
+        *(
+            _free_slots(doctor, periods[doctor_id], booked[doctor_id], start, end)
+            for doctor_id, doctor in sorted(doctors.items())
+        ),
+        key=attrgetter("start"),
+    )
+    return list(islice(slots, count))
+
+
+def lock_doctor_schedule(doctor):
+    """
+    Lock a doctor's row until the end of the transaction.
+
+    Bookings of the doctor that lock it first are checked and inserted one
+    after the other. SQLite ignores the row lock, but its write
+    transactions (opened ``IMMEDIATE``) are serialized anyway.
+
+    Args:
+        doctor (Doctor): The doctor being booked.
+    """
+    Doctor.objects.select_for_update().only("pk").get(pk=doctor.pk)
+
+
+def slot_error(doctor, appointment_date_time, exclude=None):
+    """
+    Check that a doctor can be booked at a given time.
+
+    Args:
+        doctor (Doctor): The doctor.
+        appointment_date_time (datetime): The wanted start time.
+        exclude (int): Primary key of an appointment to ignore, when moving it.
+
+    Returns:
+        str: Why the time cannot be booked, or None if it can.
+    """
+    periods = list(doctor.working_hours.all())
+    if periods:
+        local_date = timezone.localtime(appointment_date_time).date()
+        slot = next(
+            (
+                (slot_start, slot_end)
+                for slot_start, slot_end in _day_slots(periods, local_date)
+                if slot_start == appointment_date_time
+            ),
+            None,
+        )
+        if slot is None:
+            return f"Dr. {doctor.user.name} does not take appointments at that time."
+        overlapping = {
+            "appointment_date_time__gte": slot[0],
+            "appointment_date_time__lt": slot[1],
+        }
+    else:
+        margin = timedelta(minutes=DEFAULT_SLOT_MINUTES)
+        overlapping = {
+            "appointment_date_time__gt": appointment_date_time - margin,
+            "appointment_date_time__lt": appointment_date_time + margin,
+        }
+
+    bookings = DoctorAppointment.objects.filter(
+        doctor=doctor, is_emergency=False, **overlapping
+    ).exclude(status="canceled")
+    if exclude is not None:
+        bookings = bookings.exclude(pk=exclude)
+    if bookings.exists():
+        return f"Dr. {doctor.user.name} is already booked at that time."
+    return None
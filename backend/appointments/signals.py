@@ -0,0 +1,23 @@
+"""
+Signal handlers keeping the doctors' triage queues in sync with their
+appointments.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from appointments.models import DoctorAppointment
+from appointments.triage import triage_board
+
+
+@receiver(post_save, sender=DoctorAppointment)
+def queue_appointment(sender, instance, raw=False, **kwargs):
+    """Add, move or remove a saved appointment in the triage queues."""
+    if not raw:
+        triage_board.update(instance)
+
+
+@receiver(post_delete, sender=DoctorAppointment)
+def unqueue_appointment(sender, instance, **kwargs):
+    """Remove a deleted appointment from the triage queues."""
+    triage_board.remove(instance)
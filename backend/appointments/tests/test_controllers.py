@@ -6,7 +6,11 @@ from appointments.models import DoctorAppointment, TestAppointment
 from users.models import User, Patient, Doctor
 from datetime import date
 from django.utils import timezone
-from appointments.controllers import get_doctor_appointments, calculate_detailed_age
+from appointments.controllers import (
+    get_doctor_appointments,
+    get_monthly_appointment_counts,
+    calculate_detailed_age,
+)
 from appointments.forms import DoctorAppointmentCreationForm
 
 
@@ -43,6 +47,25 @@ class DoctorAppointmentControllersTest(TestCase):
         appointments = get_doctor_appointments(self.doctor)
         self.assertEqual(appointments.count(), 0)
 
+    def test_get_monthly_appointment_counts(self):
+        year = timezone.localdate().year
+        tz = timezone.get_current_timezone()
+        for month, day in [(2, 10), (2, 20), (7, 1)]:
+            DoctorAppointment.objects.create(
+                patient=self.patient,
+                doctor=self.doctor,
+                appointment_date_time=timezone.datetime(year, month, day, 10, tzinfo=tz),
+            )
+        DoctorAppointment.objects.create(
+            patient=self.patient,
+            doctor=self.doctor,
+            appointment_date_time=timezone.datetime(year - 1, 2, 10, 10, tzinfo=tz),
+        )
+        self.appointment.delete()
+
+        counts = get_monthly_appointment_counts(self.doctor, year)
+        self.assertEqual(counts, [0, 2, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0])
+
     def test_delete_doctor_appointment(self):
         response = self.client.delete(
             reverse(
@@ -0,0 +1,229 @@
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from appointments.forms import DoctorAppointmentCreationForm
+from appointments.models import DoctorAppointment, DoctorWorkingHours
+from appointments.scheduling import (
+    free_slots,
+    lock_doctor_schedule,
+    next_free_slots,
+    slot_error,
+)
+from users.models import Doctor, Patient, User
+
+
+class SlotSchedulingTests(TestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        # A Monday at least a week ahead
+        self.monday = today + timedelta(days=14 - today.weekday())
+        self.patient_user = User.objects.create_user(
+            email="patient@example.com",
+            name="John Doe",
+            role="Student",
+            blood_group="B+",
+            date_of_birth="1990-05-10",
+            gender="Male",
+            phone_number="+8801987654321",
+            role_id="slots-pat",
+            password="asdf1234@",
+        )
+        self.patient = Patient.objects.create(user=self.patient_user)
+        self.cardiologist = self.doctor("cardio", "cardiology")
+        self.second_cardiologist = self.doctor("cardio2", "cardiology")
+        self.dermatologist = self.doctor("derma", "dermatology")
+        self.work(self.cardiologist, time(9, 0), time(10, 0), 30)
+        self.work(self.second_cardiologist, time(9, 15), time(10, 0), 15)
+        self.work(self.dermatologist, time(8, 0), time(9, 0), 30)
+
+    def doctor(self, name, specialty):
+        user = User.objects.create_user(
+            email=f"{name}@example.com",
+            name=f"Dr. {name}",
+            role="Doctor",
+            blood_group="O+",
+            date_of_birth="1975-08-15",
+            gender="Male",
+            phone_number="+8801812345678",
+            role_id=f"slots-{name}",
+            password="asdf1234@",
+        )
+        return Doctor.objects.create(user=user, specialty=specialty)
+
+    def work(self, doctor, start_time, end_time, slot_minutes):
+        DoctorWorkingHours.objects.create(
+            doctor=doctor,
+            weekday=0,
+            start_time=start_time,
+            end_time=end_time,
+            slot_minutes=slot_minutes,
+        )
+
+    def at(self, hour, minute=0, day=None):
+        return timezone.make_aware(
+            datetime.combine(day or self.monday, time(hour, minute))
+        )
+
+    def book(self, doctor, when, **fields):
+        return DoctorAppointment.objects.create(
+            doctor=doctor, patient=self.patient, appointment_date_time=when, **fields
+        )
+
+    def starts(self, slots):
+        return [(slot.doctor, timezone.localtime(slot.start).time()) for slot in slots]
+
+    def test_free_slots_skip_bookings(self):
+        self.book(self.cardiologist, self.at(9, 30))
+        self.book(self.cardiologist, self.at(9, 0), status="canceled")
+        self.book(self.cardiologist, self.at(9, 0), is_emergency=True)
+
+        slots = free_slots(self.cardiologist, start=self.at(0), days=7)
+        self.assertEqual(self.starts(slots), [(self.cardiologist, time(9, 0))])
+        self.assertEqual(slots[0].end, self.at(9, 30))
+
+    def test_free_slots_repeat_every_week(self):
+        slots = free_slots(self.dermatologist, start=self.at(0), days=14)
+        self.assertEqual(
+            [slot.start for slot in slots],
+            [
+                self.at(8, 0),
+                self.at(8, 30),
+                self.at(8, 0, self.monday + timedelta(days=7)),
+                self.at(8, 30, self.monday + timedelta(days=7)),
+            ],
+        )
+
+    def test_next_free_slots_across_a_specialty(self):
+        self.book(self.second_cardiologist, self.at(9, 15))
+
+        with self.assertNumQueries(2):
+            slots = next_free_slots("cardiology", count=4, start=self.at(0))
+        self.assertEqual(
+            self.starts(slots),
+            [
+                (self.cardiologist, time(9, 0)),
+                (self.cardiologist, time(9, 30)),
+                (self.second_cardiologist, time(9, 30)),
+                (self.second_cardiologist, time(9, 45)),
+            ],
+        )
+        self.assertEqual(next_free_slots("neurology", start=self.at(0)), [])
+
+    def test_slot_error(self):
+        self.book(self.cardiologist, self.at(9, 0))
+
+        self.assertIsNone(slot_error(self.cardiologist, self.at(9, 30)))
+        self.assertIn("already booked", slot_error(self.cardiologist, self.at(9, 0)))
+        self.assertIn(
+            "does not take appointments", slot_error(self.cardiologist, self.at(9, 10))
+        )
+        self.assertIn(
+            "does not take appointments", slot_error(self.cardiologist, self.at(10, 0))
+        )
+
+    def test_doctor_without_working_hours_is_not_double_booked(self):
+        doctor = self.doctor("gp", "medicine")
+        self.book(doctor, self.at(11, 0))
+
+        self.assertIn("already booked", slot_error(doctor, self.at(11, 10)))
+        self.assertIsNone(slot_error(doctor, self.at(11, 15)))
+
+    def test_form_checks_the_slot(self):
+        self.book(self.cardiologist, self.at(9, 0))
+        data = {
+            "doctor": self.cardiologist.id,
+            "appointment_date_time": self.at(9, 0),
+            "reason": "Chest pain",
+        }
+        form = DoctorAppointmentCreationForm(data=data)
+        self.assertIn("appointment_date_time", form.errors)
+
+        form = DoctorAppointmentCreationForm(data={**data, "is_emergency": True})
+        self.assertTrue(form.is_valid())
+
+    def test_unique_constraint_refuses_a_second_booking(self):
+        self.book(self.cardiologist, self.at(9, 0))
+        with self.assertRaises(IntegrityError):
+            self.book(self.cardiologist, self.at(9, 0))
+
+    def test_booking_race_is_reported_as_taken_slot(self):
+        self.book(self.cardiologist, self.at(9, 0))
+        self.client.force_login(self.patient_user)
+
+        # The other booking lands between validation and insert
+        with mock.patch("appointments.forms.slot_error", return_value=None):
+            response = self.client.post(
+                reverse("appointments:create_doctor_appointment"),
+                {
+                    "doctor": self.cardiologist.id,
+                    "appointment_date_time": self.at(9, 0).strftime("%Y-%m-%d %H:%M"),
+                    "reason": "Chest pain",
+                },
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("already booked", str(response.context["form"].errors))
+        offered = [slot.start for slot in response.context["free_slots"]]
+        self.assertIn(self.at(9, 30), offered)
+        self.assertNotIn(self.at(9, 0), offered)
+        self.cardiologist.refresh_from_db()
+        self.assertEqual(self.cardiologist.no_of_appointments, 0)
+
+    def test_booking_is_checked_again_under_the_doctor_lock(self):
+        doctor = self.doctor("gp", "medicine")
+        self.book(doctor, self.at(11, 0))
+        self.client.force_login(self.patient_user)
+
+        # The constraint alone would accept a booking 5 minutes later
+        with mock.patch("appointments.forms.slot_error", return_value=None):
+            with mock.patch(
+                "appointments.controllers.lock_doctor_schedule"
+            ) as lock_doctor_schedule:
+                response = self.client.post(
+                    reverse("appointments:create_doctor_appointment"),
+                    {
+                        "doctor": doctor.id,
+                        "appointment_date_time": self.at(11, 5).strftime(
+                            "%Y-%m-%d %H:%M"
+                        ),
+                        "reason": "Fever",
+                    },
+                )
+        lock_doctor_schedule.assert_called_once_with(doctor)
+        self.assertIn("already booked", str(response.context["form"].errors))
+        self.assertEqual(DoctorAppointment.objects.filter(doctor=doctor).count(), 1)
+
+    def test_lock_doctor_schedule_selects_for_update(self):
+        with CaptureQueriesContext(connection) as queries, transaction.atomic():
+            lock_doctor_schedule(self.cardiologist)
+        [sql] = [
+            query["sql"]
+            for query in queries.captured_queries
+            if "users_doctor" in query["sql"]
+        ]
+        if connection.features.has_select_for_update:
+            self.assertIn("FOR UPDATE", sql)
+
+    def test_free_slots_endpoint(self):
+        self.client.force_login(self.patient_user)
+        url = reverse("appointments:free-slots")
+
+        with mock.patch("django.utils.timezone.now", return_value=self.at(0)):
+            response = self.client.get(url, {"specialty": "Cardiology", "count": 2})
+        self.assertEqual(
+            [
+                (result["doctor_name"], result["start"])
+                for result in response.json()["results"]
+            ],
+            [
+                ("Dr. cardio", self.at(9, 0).isoformat()),
+                ("Dr. cardio2", self.at(9, 15).isoformat()),
+            ],
+        )
+        response = self.client.get(url, {"count": "many"})
+        self.assertEqual(response.status_code, 400)
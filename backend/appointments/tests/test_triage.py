@@ -0,0 +1,160 @@
+import threading
+from datetime import datetime, time, timedelta
+from unittest.mock import Mock, patch
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from appointments.models import DoctorAppointment
+from appointments.triage import TriageQueue, triage_board, waiting_appointments
+from users.models import Doctor, Patient, User
+
+
+class TriageQueueTests(TestCase):
+    def setUp(self):
+        triage_board.invalidate()
+        self.today = timezone.localdate()
+        self.doctor_user = User.objects.create_user(
+            email="doctor@example.com",
+            name="Dr. Example",
+            role="Doctor",
+            blood_group="O+",
+            date_of_birth="1975-08-15",
+            gender="Male",
+            phone_number="+8801812345678",
+            role_id="triage-doc",
+            password="asdf1234@",
+        )
+        self.doctor = Doctor.objects.create(user=self.doctor_user)
+        self.patients = [
+            Patient.objects.create(
+                user=User.objects.create_user(
+                    email=f"patient{index}@example.com",
+                    name=f"Patient {index}",
+                    role="Student",
+                    blood_group="B+",
+                    date_of_birth="1990-05-10",
+                    gender="Male",
+                    phone_number="+8801987654321",
+                    role_id=f"triage-pat{index}",
+                    password="asdf1234@",
+                )
+            )
+            for index in range(3)
+        ]
+
+    def book(self, hour, is_emergency=False, day=None, **fields):
+        return DoctorAppointment.objects.create(
+            doctor=self.doctor,
+            patient=self.patients[hour % len(self.patients)],
+            appointment_date_time=timezone.make_aware(
+                datetime.combine(day or self.today, time(hour))
+            ),
+            is_emergency=is_emergency,
+            **fields,
+        )
+
+    def call_all(self):
+        called = []
+        while (appointment := triage_board.call_next(self.doctor.id)) is not None:
+            called.append(appointment)
+        return called
+
+    def test_queue_pops_emergencies_then_longest_waiting(self):
+        queue = TriageQueue(self.today)
+        queue.push(1, (True, 10))
+        queue.push(2, (False, 12))
+        queue.push(3, (True, 9))
+        queue.push(4, (False, 11))
+        queue.discard(3)
+        queue.push(1, (True, 8))
+
+        self.assertEqual(len(queue), 3)
+        self.assertEqual([queue.pop() for _ in range(4)], [4, 2, 1, None])
+
+    def test_call_next_orders_the_day(self):
+        late = self.book(11)
+        early = self.book(9)
+        emergency = self.book(10, is_emergency=True)
+        self.book(8, status="completed")
+        self.book(8, day=self.today + timedelta(days=1))
+
+        self.assertEqual(triage_board.waiting(self.doctor.id), 3)
+        self.assertEqual(self.call_all(), [emergency, early, late])
+        late.refresh_from_db()
+        self.assertIsNotNone(late.called_at)
+
+    def test_queue_follows_changes_without_rescanning(self):
+        first = self.book(9)
+        canceled = self.book(10)
+        self.book(11)
+        triage_board.waiting(self.doctor.id)
+
+        emergency = self.book(12, is_emergency=True)
+        canceled.status = "canceled"
+        canceled.save()
+        first.delete()
+        with self.assertNumQueries(2):
+            called = triage_board.call_next(self.doctor.id)
+        self.assertEqual(called, emergency)
+        self.assertEqual(triage_board.waiting(self.doctor.id), 1)
+
+    def test_patient_called_elsewhere_is_skipped(self):
+        first = self.book(9)
+        second = self.book(10)
+        triage_board.waiting(self.doctor.id)
+        # Another worker process calls the first patient
+        DoctorAppointment.objects.filter(pk=first.pk).update(called_at=timezone.now())
+
+        self.assertEqual(self.call_all(), [second])
+
+    def test_queue_is_read_outside_the_lock(self):
+        self.book(9)
+        lock_was_free = []
+
+        def try_lock():
+            acquired = triage_board._lock.acquire(timeout=1)
+            if acquired:
+                triage_board._lock.release()
+            lock_was_free.append(acquired)
+
+        def read_while_booking(doctor_id):
+            rows = list(
+                waiting_appointments(doctor_id).values_list(
+                    "id", "is_emergency", "appointment_date_time"
+                )
+            )
+            # Another doctor's board is not held up by this read
+            thread = threading.Thread(target=try_lock)
+            thread.start()
+            thread.join()
+            # A booking committed after the rows were read
+            self.book(10)
+            return Mock(values_list=Mock(return_value=rows))
+
+        with patch(
+            "appointments.triage.waiting_appointments", side_effect=read_while_booking
+        ):
+            self.assertEqual(triage_board.waiting(self.doctor.id), 2)
+        self.assertEqual(lock_was_free, [True])
+
+    def test_call_next_patient_endpoint(self):
+        appointment = self.book(9)
+        self.client.force_login(self.doctor_user)
+        url = reverse("appointments:call-next-patient")
+
+        self.assertEqual(self.client.get(url).status_code, 405)
+        response = self.client.post(url)
+        self.assertRedirects(
+            response,
+            reverse(
+                "medicines:get-information-for-prescription",
+                kwargs={"appointment_id": appointment.id},
+            ),
+            fetch_redirect_response=False,
+        )
+        response = self.client.post(url)
+        self.assertRedirects(
+            response, reverse("users:doctor-dashboard"), fetch_redirect_response=False
+        )
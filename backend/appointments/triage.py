@@ -0,0 +1,230 @@
+"""
+In-memory triage queues of the doctors' waiting patients.
+
+Each doctor's scheduled appointments of the day that have not been called in
+yet are kept in a binary heap ordered by emergency first, then by the
+appointment time (so the patient waiting the longest comes next). Calling
+the next patient pops the heap and adding an appointment pushes onto it,
+both in O(log n), instead of sorting the day's list on every request.
+
+A queue is built from the database the first time a doctor uses it after
+the server starts, and again on the next day or after ``TRIAGE_MAX_AGE``
+seconds, which picks up appointments booked through other worker processes.
+The ``post_save``/``post_delete`` handlers in ``appointments.signals`` keep
+loaded queues up to date in between. Changed or deleted appointments are
+dropped lazily: their heap entries are skipped when they reach the top. The
+board's lock only guards the in-memory queues; database reads and writes
+run outside it.
+
+Calling a patient stamps ``DoctorAppointment.called_at`` with a conditional
+``UPDATE``, so a patient is only called once even when several processes
+hold a queue for the same doctor.
+"""
+
+import heapq
+import threading
+import time
+
+from django.utils import timezone
+
+from appointments.constants import TRIAGE_MAX_AGE
+from appointments.models import DoctorAppointment
+from core.general.utils.dates import day_bounds
+
+
+def waiting_appointments(doctor_id):
+    """Return the doctor's appointments of today still waiting to be called."""
+    start, end = day_bounds(timezone.localdate())
+    return DoctorAppointment.objects.filter(
+        doctor_id=doctor_id,
+        status="scheduled",
+        appointment_date_time__gte=start,
+        appointment_date_time__lt=end,
+        called_at__isnull=True,
+    )
+
+
+def _priority(is_emergency, appointment_date_time):
+    return (not is_emergency, appointment_date_time)
+
+
+def _appointment_time(appointment):
+    """Return the time of an appointment saved with a datetime or a string."""
+    field = DoctorAppointment._meta.get_field("appointment_date_time")
+    value = field.to_python(appointment.appointment_date_time)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+class TriageQueue:
+    """A heap of one doctor's waiting appointments for one day."""
+
+    def __init__(self, day):
+        self.day = day
+        self.built_at = time.monotonic()
+        self._heap = []
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def push(self, appointment_id, priority):
+        """Add an appointment, or move it if its priority changed."""
+        entry = (*priority, appointment_id)
+        self._entries[appointment_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def discard(self, appointment_id):
+        """Drop an appointment; its heap entry is skipped when popped."""
+        self._entries.pop(appointment_id, None)
+
+    def pop(self):
+        """
+        Remove and return the most urgent appointment.
+
+        Returns:
+            int: The appointment id, or None when nobody is waiting.
+        """
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            appointment_id = entry[-1]
+            if self._entries.get(appointment_id) == entry:
+                del self._entries[appointment_id]
+                return appointment_id
+        return None
+
+
+class TriageBoard:
+    """The lazily built, thread-safe triage queues of every doctor."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._queues = {}
+        # Changes seen while queues are read from the database, per read
+        self._loading = {}
+
+    def invalidate(self):
+        """Drop every queue; they are rebuilt on next use."""
+        with self._lock:
+            self._queues = {}
+
+    @staticmethod
+    def _apply(doctor_id, queue, appointment, removed=False):
+        """Add, move or remove one changed appointment in a doctor's queue."""
+        queue.discard(appointment.pk)
+        if (
+            removed
+            or appointment.doctor_id != doctor_id
+            or appointment.status != "scheduled"
+            or appointment.called_at is not None
+        ):
+            return
+        appointment_date_time = _appointment_time(appointment)
+        if timezone.localdate(appointment_date_time) == queue.day:
+            queue.push(
+                appointment.pk,
+                _priority(appointment.is_emergency, appointment_date_time),
+            )
+
+    def _record(self, appointment, removed=False):
+        for changes in self._loading.values():
+            changes.append((appointment, removed))
+
+    def _queue(self, doctor_id):
+        """
+        Return a doctor's queue, rebuilding it when it is stale.
+
+        The rows are read without holding the lock, so a slow query does not
+        hold up the other doctors' queues. Appointments changed during the
+        read are replayed onto the new queue before it is swapped in.
+        """
+        with self._lock:
+            queue = self._queues.get(doctor_id)
+            if (
+                queue is not None
+                and queue.day == timezone.localdate()
+                and time.monotonic() - queue.built_at < TRIAGE_MAX_AGE
+            ):
+                return queue
+            token = object()
+            self._loading[token] = []
+        queue = TriageQueue(timezone.localdate())
+        try:
+            rows = list(
+                waiting_appointments(doctor_id).values_list(
+                    "id", "is_emergency", "appointment_date_time"
+                )
+            )
+        finally:
+            with self._lock:
+                changes = self._loading.pop(token)
+        for appointment_id, is_emergency, appointment_date_time in rows:
+            queue.push(appointment_id, _priority(is_emergency, appointment_date_time))
+        with self._lock:
+            current = self._queues.get(doctor_id)
+            # Another thread may have swapped in a queue read after this one
+            if current is not None and current.built_at > queue.built_at:
+                return current
+            for appointment, removed in changes:
+                self._apply(doctor_id, queue, appointment, removed)
+            self._queues[doctor_id] = queue
+            return queue
+
+    def waiting(self, doctor_id):
+        """Return the number of patients waiting to be called by a doctor."""
+        queue = self._queue(doctor_id)
+        with self._lock:
+            return len(queue)
+
+    def update(self, appointment):
+        """
+        Add, move or remove one appointment after it changed.
+
+        Args:
+            appointment (DoctorAppointment): The saved appointment.
+        """
+        with self._lock:
+            self._record(appointment)
+            # The appointment may have moved from another doctor
+            for doctor_id, queue in self._queues.items():
+                self._apply(doctor_id, queue, appointment)
+
+    def remove(self, appointment):
+        """Remove a deleted appointment."""
+        with self._lock:
+            self._record(appointment, removed=True)
+            queue = self._queues.get(appointment.doctor_id)
+            if queue is not None:
+                queue.discard(appointment.pk)
+
+    def call_next(self, doctor_id):
+        """
+        Call in the doctor's most urgent waiting patient.
+
+        Args:
+            doctor_id (int): Primary key of the doctor.
+
+        Returns:
+            DoctorAppointment: The called appointment, or None when nobody is
+                waiting.
+        """
+        while True:
+            queue = self._queue(doctor_id)
+            with self._lock:
+                appointment_id = queue.pop()
+            if appointment_id is None:
+                return None
+            # Skips appointments changed by update() or another process
+            called = (
+                waiting_appointments(doctor_id)
+                .filter(pk=appointment_id)
+                .update(called_at=timezone.now())
+            )
+            if called:
+                return DoctorAppointment.objects.select_related("patient__user").get(
+                    pk=appointment_id
+                )
+
+
+triage_board = TriageBoard()
@@ -6,9 +6,11 @@ including doctor and test appointments.
 
 Routes:
     - **delete-doctor-appointment/<int:pk>/**: Deletes a specific doctor appointment.
+    - **call-next-patient/**: Calls in the doctor's next waiting patient.
     - **patient-information/<int:pk>/**: Retrieves patient information by patient ID.
     - **create/**: Creates a new doctor appointment.
     - **doctor-appointment-list-for-patient/**: Lists doctor appointments for a specific patient.
+    - **free-slots/**: Returns the next free slots across the doctors of a specialty.
     - **test_appointment/reschedule/<int:appointment_id>/**: Reschedules a test appointment.
     - **test_appointments/**: Lists all test appointments.
     - **list/**: Displays the lab technician dashboard.
@@ -23,9 +25,11 @@ from appointments.controllers import (
     reschedule_test_appointment,
     labt_dashboard,
     delete_doctor_appointment,
+    call_next_patient,
     get_patient_information,
     create_doctor_appointment,
     get_doctor_appointment_list_for_patient,
+    get_free_slots,
 )
 
 app_name = "appointments"
@@ -36,6 +40,7 @@ urlpatterns = [
         delete_doctor_appointment,
         name="delete-doctor-appointment",
     ),
+    path("call-next-patient/", call_next_patient, name="call-next-patient"),
     path(
         "patient-information/<int:pk>/",
         get_patient_information,
@@ -47,6 +52,7 @@ urlpatterns = [
         get_doctor_appointment_list_for_patient,
         name="doctor-appointment-list-for-patient",
     ),
+    path("free-slots/", get_free_slots, name="free-slots"),
     path(
         "test_appointment/reschedule/<int:appointment_id>/",
         reschedule_test_appointment,
@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from blogs.forms import BlogForm
 from blogs.models import Blog
+from core.general.cache import cache_anonymous_page
 
 
 # blogPart Start (Hasan)
@@ -56,6 +57,7 @@ def blog_list_for_admin(request):
 # Blog Part (Hasan)
 
 
+@cache_anonymous_page(Blog)
 def blog_list(request):
     """
     Displays seasonal diseases portal
@@ -76,6 +78,7 @@ def blog_list(request):
     return render(request, "users/visit_seasonal_diseases.html", {"blogs": blogs})
 
 
+@cache_anonymous_page(Blog)
 def blog_detail(request, id):
     try:
         blog = Blog.objects.get(id=id)
@@ -1,5 +1,6 @@
 from django.db import models
 from users.models import User
+from core.general.storage import content_addressed_storage
 
 
 # Create your models here.
@@ -27,7 +28,12 @@ class Blog(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    image = models.ImageField(upload_to="blog_images/", null=True, blank=True)
+    image = models.ImageField(
+        upload_to="blog_images/",
+        storage=content_addressed_storage,
+        null=True,
+        blank=True,
+    )
     tags = models.CharField(max_length=255, null=True, blank=True)
 
     def __str__(self):
@@ -0,0 +1,16 @@
+"""
+Signal handlers invalidating the cached blog pages.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from blogs.models import Blog
+from core.general.cache import bump_model_version
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_delete, sender=Blog)
+def invalidate_blog_pages(sender, **kwargs):
+    """Drop every cached page showing blog posts."""
+    bump_model_version(Blog)
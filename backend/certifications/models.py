@@ -1,5 +1,6 @@
 from django.db import models
 from users.models import Patient
+from core.general.storage import content_addressed_storage
 
 
 # Create your models here.
@@ -8,7 +9,12 @@ class FundraisingRequest(models.Model):
     disease_name = models.CharField(max_length=255)
     amount_needed = models.DecimalField(max_digits=10, decimal_places=2)
     details = models.TextField(null=True, blank=True)
-    attachments = models.FileField(upload_to="fundraising/", null=True, blank=True)
+    attachments = models.FileField(
+        upload_to="fundraising/",
+        storage=content_addressed_storage,
+        null=True,
+        blank=True,
+    )
     is_approved = models.BooleanField(default=False)
     serial_number = models.CharField(max_length=255, unique=True, null=True, blank=True)
 
@@ -0,0 +1,31 @@
+from django.apps import AppConfig, apps
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_init, post_save
+
+
+class GeneralConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "core.general"
+    label = "general"
+
+    def ready(self):
+        from core.general.utils.database import configure_sqlite
+
+        connection_created.connect(configure_sqlite, dispatch_uid="configure_sqlite")
+
+        from core.general.signals import (
+            count_file_references,
+            release_file_references,
+            remember_file_names,
+        )
+        from core.general.storage import content_addressed_fields
+
+        for model in apps.get_models():
+            if not content_addressed_fields(model):
+                continue
+            uid = f"stored-files:{model._meta.label_lower}"
+            post_init.connect(remember_file_names, model, dispatch_uid=f"{uid}:init")
+            post_save.connect(count_file_references, model, dispatch_uid=f"{uid}:save")
+            post_delete.connect(
+                release_file_references, model, dispatch_uid=f"{uid}:delete"
+            )
@@ -0,0 +1,201 @@
+"""
+Versioned cache keys per model and page caching for anonymous visitors.
+
+Every model whose data ends up in cached content has a version number
+stored in the cache. Keys built with :func:`model_cache_key` embed the
+current versions of the models they depend on, so bumping a version with
+:func:`bump_model_version` (from the ``post_save``/``post_delete`` handlers
+of the model) makes every dependent key unreachable at once; the orphaned
+entries simply expire. :func:`object_cache_key` and
+:func:`bump_object_version` do the same for content depending on a single
+row, such as one patient's records.
+
+:func:`cache_anonymous_page` caches whole responses of public pages for
+anonymous visitors; authenticated users always get a freshly rendered page.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+
+VERSION_KEY_PREFIX = "model-version"
+PAGE_KEY_PREFIX = "page"
+
+
+def _model_label(model):
+    return model._meta.label_lower
+
+
+def _new_version():
+    # Start from the current time rather than 1, so a version that was
+    # evicted from the cache never comes back with a value that existing
+    # (possibly stale) keys still embed.
+    return time.time_ns() // 1000
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), timeout=None)
+
+
+def model_cache_version(model):
+    """
+    Return the current cache version of a model.
+
+    Args:
+        model: A model class.
+
+    Returns:
+        int: The version.
+    """
+    return _version(f"{VERSION_KEY_PREFIX}:{_model_label(model)}")
+
+
+def bump_model_version(model):
+    """
+    Invalidate every cache key depending on ``model``.
+
+    Args:
+        model: A model class.
+    """
+    _bump(f"{VERSION_KEY_PREFIX}:{_model_label(model)}")
+
+
+def object_cache_version(model, pk):
+    """
+    Return the current cache version of one row.
+
+    Args:
+        model: A model class.
+        pk: Primary key of the row.
+
+    Returns:
+        int: The version.
+    """
+    return _version(f"{VERSION_KEY_PREFIX}:{_model_label(model)}:{pk}")
+
+
+def bump_object_version(model, pk):
+    """
+    Invalidate every cache key depending on one row.
+
+    Args:
+        model: A model class.
+        pk: Primary key of the row.
+    """
+    _bump(f"{VERSION_KEY_PREFIX}:{_model_label(model)}:{pk}")
+
+
+def model_cache_key(prefix, models, *parts):
+    """
+    Build a cache key embedding the current versions of ``models``.
+
+    Args:
+        prefix (str): Namespace of the cached content.
+        models (iterable): Model classes the cached content is built from.
+        *parts: Further key components (e.g. object ids or paths).
+
+    Returns:
+        str: The cache key.
+    """
+    versions = ",".join(
+        f"{_model_label(model)}={model_cache_version(model)}"
+        for model in sorted(models, key=_model_label)
+    )
+    return ":".join([prefix, versions, *map(str, parts)])
+
+
+def object_cache_key(prefix, model, pk, *parts):
+    """
+    Build a cache key embedding the current version of one row.
+
+    Args:
+        prefix (str): Namespace of the cached content.
+        model: Model class of the row the cached content is built from.
+        pk: Primary key of the row.
+        *parts: Further key components (e.g. a page cursor).
+
+    Returns:
+        str: The cache key.
+    """
+    version = object_cache_version(model, pk)
+    return ":".join([prefix, f"{_model_label(model)}={pk}@{version}", *map(str, parts)])
+
+
+def _is_cacheable_request(request):
+    return (
+        request.method in ("GET", "HEAD")
+        and not request.user.is_authenticated
+        and not len(messages.get_messages(request))
+    )
+
+
+def _is_cacheable_response(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        # The page embeds a CSRF token tied to this visitor's cookie
+        and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+    )
+
+
+def cache_anonymous_page(*models, timeout=None):
+    """
+    Cache the responses of a view for anonymous visitors.
+
+    The cache key covers the full path (including the query string) and the
+    versions of ``models``, so saving or deleting any of them serves a
+    freshly rendered page on the next hit.
+
+    Args:
+        *models: Model classes the page is rendered from.
+        timeout (int): Seconds to keep a page; defaults to the
+            ``PAGE_CACHE_TIMEOUT`` setting.
+
+    Returns:
+        callable: The view decorator.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+
+            path = hashlib.md5(
+                request.get_full_path().encode("utf-8"), usedforsecurity=False
+            ).hexdigest()
+            key = model_cache_key(
+                f"{PAGE_KEY_PREFIX}:{view.__module__}.{view.__name__}", models, path
+            )
+            response = cache.get(key)
+            if response is not None:
+                return response
+
+            response = view(request, *args, **kwargs)
+            if _is_cacheable_response(request, response):
+                cache.set(
+                    key,
+                    response,
+                    settings.PAGE_CACHE_TIMEOUT if timeout is None else timeout,
+                )
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,168 @@
+"""
+Resized WebP and JPEG variants of uploaded images.
+
+Templates ask for an image at the size it is displayed with the
+``responsive_image`` tag of ``core.general.templatetags.images``. The size
+is rounded up to one of ``VARIANT_WIDTHS`` (so an image has a bounded set
+of variants), rendered with Pillow on first request in both WebP and
+JPEG, and kept in ``default_storage`` under ``image-variants/``.
+
+Variant names derive from the name of the source file. Content-addressed
+files never change under their name, so a variant never goes stale; the
+existence of every variant is also cached so rendering a page does not hit
+the disk once per image.
+"""
+
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+VARIANT_DIRECTORY = "image-variants"
+VARIANT_WIDTHS = (40, 80, 100, 200, 400, 800, 1200, 1600)
+VARIANT_FORMATS = {"webp": "WEBP", "jpg": "JPEG"}
+VARIANT_QUALITY = 80
+CACHE_KEY_PREFIX = "image-variant"
+CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def variant_size(width, height=None):
+    """
+    Round a display size up to the nearest variant width.
+
+    Args:
+        width (int): Wanted width in pixels.
+        height (int): Wanted height in pixels, or None to keep the aspect ratio.
+
+    Returns:
+        tuple: The variant width and height (height None when not given).
+    """
+    rounded = next((w for w in VARIANT_WIDTHS if w >= width), VARIANT_WIDTHS[-1])
+    if height is None:
+        return rounded, None
+    return rounded, max(1, round(height * rounded / width))
+
+
+def variant_name(source_name, width, height, crop, extension):
+    """
+    Return the storage name of a variant.
+
+    Args:
+        source_name (str): Storage name of the source image.
+        width (int): Variant width.
+        height (int): Variant height, or None to keep the aspect ratio.
+        crop (bool): Whether the image is cropped to fill ``width`` x ``height``.
+        extension (str): One of the ``VARIANT_FORMATS`` keys.
+
+    Returns:
+        str: The variant name.
+    """
+    digest = hashlib.sha256(source_name.encode("utf-8")).hexdigest()
+    box = f"{width}x{height or ''}{'c' if crop else ''}"
+    return f"{VARIANT_DIRECTORY}/{digest[:2]}/{digest}-{box}.{extension}"
+
+
+def render_variant(source, width, height, crop, image_format):
+    """
+    Resize an image with Pillow.
+
+    Images are never enlarged, and EXIF orientation is applied.
+
+    Args:
+        source: A readable binary file with the source image.
+        width (int): Wanted width.
+        height (int): Wanted height, or None to keep the aspect ratio.
+        crop (bool): Whether to crop to fill the box rather than fit in it.
+        image_format (str): Pillow format name, "WEBP" or "JPEG".
+
+    Returns:
+        bytes: The encoded variant.
+    """
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if crop and height:
+            scale = min(1, image.width / width, image.height / height)
+            box = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image = ImageOps.fit(image, box, Image.Resampling.LANCZOS)
+        else:
+            image.thumbnail((width, height or image.height), Image.Resampling.LANCZOS)
+
+        if image_format == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        output = BytesIO()
+        image.save(output, image_format, quality=VARIANT_QUALITY, optimize=True)
+        return output.getvalue()
+
+
+def _ensure_variant(field_file, name, width, height, crop, image_format):
+    if default_storage.exists(name):
+        return
+    with field_file.storage.open(field_file.name, "rb") as source:
+        data = render_variant(source, width, height, crop, image_format)
+    stored = default_storage.save(name, ContentFile(data))
+    if stored != name:
+        # Another request rendered it meanwhile
+        default_storage.delete(stored)
+
+
+def image_variants(field_file, width, height=None, crop=False):
+    """
+    Return the URLs of the variants of an image, rendering missing ones.
+
+    Args:
+        field_file (FieldFile): The image, e.g. ``blog.image``.
+        width (int): Display width in pixels.
+        height (int): Display height in pixels, or None to keep the aspect
+            ratio.
+        crop (bool): Whether to crop to fill the box rather than fit in it.
+
+    Returns:
+        dict: For each density ("1x", "2x"), a dict of variant URLs by
+            extension; None when the image cannot be read.
+    """
+    key = f"{CACHE_KEY_PREFIX}:{field_file.name}:{width}x{height}:{crop}"
+    variants = cache.get(key)
+    if variants is not None:
+        return variants
+
+    variants = {}
+    try:
+        for density, scale in (("1x", 1), ("2x", 2)):
+            size = variant_size(width * scale, height and height * scale)
+            urls = {}
+            for extension, image_format in VARIANT_FORMATS.items():
+                name = variant_name(field_file.name, *size, crop, extension)
+                _ensure_variant(field_file, name, *size, crop, image_format)
+                urls[extension] = default_storage.url(name)
+            variants[density] = urls
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        logger.warning("Could not render variants of %s", field_file.name)
+        return None
+    cache.set(key, variants, CACHE_TIMEOUT)
+    return variants
+
+
+def delete_variants(source_name):
+    """Delete every variant rendered from ``source_name``."""
+    digest = hashlib.sha256(source_name.encode("utf-8")).hexdigest()
+    directory = f"{VARIANT_DIRECTORY}/{digest[:2]}"
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for file_name in files:
+        if file_name.startswith(f"{digest}-"):
+            default_storage.delete(os.path.join(directory, file_name))
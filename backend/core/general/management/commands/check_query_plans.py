@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.general.query_plans import (
+    FULL_SCAN_PATTERNS,
+    QUERY_PLAN_CHECKS,
+    check_query_plans,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the main query of each controller and fail when the database "
+        "would read a whole table, e.g. after an index was dropped. Meant to "
+        "be run in CI against a migrated database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "checks",
+            nargs="*",
+            help="Names of the checks to run; all by default.",
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="The database to check.",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["checks"]) - set(QUERY_PLAN_CHECKS)
+        if unknown:
+            raise CommandError(f"Unknown checks: {', '.join(sorted(unknown))}")
+        vendor = connections[options["database"]].vendor
+        if vendor not in FULL_SCAN_PATTERNS:
+            raise CommandError(f"Query plans of {vendor} are not checked.")
+        plans = check_query_plans(options["checks"], using=options["database"])
+
+        failed = 0
+        for result in plans:
+            if result.full_scans:
+                failed += 1
+                tables = ", ".join(result.full_scans)
+                self.stdout.write(
+                    self.style.ERROR(f"{result.name}: full scan of {tables}")
+                )
+            else:
+                self.stdout.write(f"{result.name}: ok")
+            if result.sorts:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"{result.name}: {result.sorts} sorts not served by an index"
+                    )
+                )
+            if options["verbosity"] > 1:
+                self.stdout.write(result.plan)
+
+        if failed:
+            raise CommandError(f"{failed} queries scan whole tables.")
+        self.stdout.write(self.style.SUCCESS("No full table scans."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.general.storage import collect_unreferenced, recount_references
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the references to content-addressed files and remove the "
+        "files nothing references any more."
+    )
+
+    def handle(self, *args, **options):
+        fixed = recount_references()
+        removed = collect_unreferenced()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fixed {fixed} reference counts and removed {removed} files."
+            )
+        )
@@ -0,0 +1,241 @@
+"""
+In-process request metrics exposed in the Prometheus text format.
+
+:class:`core.general.middleware.InstrumentationMiddleware` records every
+request into the histograms of :data:`REGISTRY`, labelled by the resolved
+URL name, and :func:`metrics_view` renders them for Prometheus to scrape.
+
+The numbers live in the memory of each server process, so with several
+worker processes every worker has to be scraped (or run with a single
+worker behind the metrics endpoint); Prometheus aggregates the series.
+"""
+
+import threading
+from bisect import bisect_left
+from hmac import compare_digest
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return "{" + pairs + "}"
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    A Prometheus histogram with a fixed set of label names.
+
+    Args:
+        name (str): The metric name.
+        documentation (str): The ``# HELP`` text.
+        label_names (tuple): Names of the labels every observation carries.
+        buckets (tuple): Increasing upper bounds of the buckets; the ``+Inf``
+            bucket is implicit.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, label_names, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series = {}
+
+    def observe(self, value, *label_values):
+        """Record one observation for the given label values."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [
+                    [0] * (len(self.buckets) + 1),
+                    0,
+                    0,
+                ]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        """Yield ``(name, labels, value)`` samples with cumulative buckets."""
+        with self._lock:
+            series = {
+                labels: (list(counts), total, count)
+                for labels, (counts, total, count) in self._series.items()
+            }
+        for label_values, (counts, total, count) in sorted(series.items()):
+            labels = list(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                bucket_labels = [*labels, ("le", _format_number(bound))]
+                yield f"{self.name}_bucket", bucket_labels, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    """
+    A Prometheus counter with a fixed set of label names.
+
+    Args:
+        name (str): The metric name, ending in ``_total``.
+        documentation (str): The ``# HELP`` text.
+        label_names (tuple): Names of the labels every increment carries.
+    """
+
+    type = "counter"
+
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        """Increment the counter of the given label values."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            yield self.name, list(zip(self.label_names, label_values)), value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Registry:
+    """The metrics of this process, rendered together by :meth:`render`."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Drop every recorded sample (used by the tests)."""
+        for metric in self.metrics:
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "jumcms_request_duration_seconds",
+        "Wall time spent handling a request.",
+        ("view", "method"),
+        DURATION_BUCKETS,
+    )
+)
+REQUEST_DB_QUERIES = REGISTRY.register(
+    Histogram(
+        "jumcms_request_db_queries",
+        "Database queries executed while handling a request.",
+        ("view", "method"),
+        QUERY_COUNT_BUCKETS,
+    )
+)
+REQUEST_DB_DURATION = REGISTRY.register(
+    Histogram(
+        "jumcms_request_db_duration_seconds",
+        "Time spent in database queries while handling a request.",
+        ("view", "method"),
+        DURATION_BUCKETS,
+    )
+)
+REQUEST_TEMPLATE_DURATION = REGISTRY.register(
+    Histogram(
+        "jumcms_request_template_duration_seconds",
+        "Time spent rendering templates while handling a request.",
+        ("view", "method"),
+        DURATION_BUCKETS,
+    )
+)
+RESPONSE_SIZE = REGISTRY.register(
+    Histogram(
+        "jumcms_response_size_bytes",
+        "Size of the response body.",
+        ("view", "method"),
+        SIZE_BUCKETS,
+    )
+)
+RESPONSES = REGISTRY.register(
+    Counter(
+        "jumcms_responses_total",
+        "Responses sent, by view and status code.",
+        ("view", "method", "status"),
+    )
+)
+
+
+def metrics_view(request):
+    """
+    Expose the metrics of this process to Prometheus.
+
+    When ``METRICS_TOKEN`` is set, the scraper must send it as a bearer
+    token; otherwise the endpoint is open and should only be reachable from
+    the monitoring network.
+
+    Args:
+        request: The HTTP request object.
+
+    Returns:
+        HttpResponse: The metrics in the Prometheus text format, or 403 when
+            the bearer token is missing or wrong.
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if token:
+        authorization = request.headers.get("Authorization", "")
+        if not compare_digest(authorization, f"Bearer {token}"):
+            return HttpResponseForbidden("You are not authorized to view this page.")
+    return HttpResponse(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,125 @@
+"""
+Request instrumentation middleware.
+
+:class:`InstrumentationMiddleware` measures, for every request, the wall
+time, the number and total duration of the database queries, the time
+spent rendering templates and the size of the response, and records them
+in the histograms of ``core.general.metrics`` under the resolved URL name.
+
+Database queries are timed with a ``connection.execute_wrapper`` installed
+on every database connection for the duration of the request, so the
+numbers are available without ``DEBUG``. Template rendering is timed by
+wrapping the render method of the Django template backend once, when the
+middleware is loaded; only the outermost render of a request is timed so
+included templates are not counted twice.
+"""
+
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import connections
+from django.template.backends.django import Template as DjangoBackendTemplate
+
+from core.general.metrics import (
+    REQUEST_DB_DURATION,
+    REQUEST_DB_QUERIES,
+    REQUEST_DURATION,
+    REQUEST_TEMPLATE_DURATION,
+    RESPONSE_SIZE,
+    RESPONSES,
+)
+
+# Requests whose path does not resolve share one label value, so random
+# URLs cannot create new metric series.
+UNRESOLVED_VIEW = "<unresolved>"
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+_current_timings = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Database and template timings accumulated during one request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Execute wrapper timing every query of the request."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        timings = _current_timings.get()
+        if timings is None or timings.template_depth:
+            return render(self, *args, **kwargs)
+        timings.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timings.template_time += time.perf_counter() - started
+            timings.template_depth -= 1
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+def instrument_templates():
+    """Wrap the Django template backend's render method (only once)."""
+    if not getattr(DjangoBackendTemplate.render, "instrumented", False):
+        DjangoBackendTemplate.render = _timed_render(DjangoBackendTemplate.render)
+
+
+def _response_size(response):
+    if response.streaming:
+        return int(response.get("Content-Length", 0))
+    return len(response.content)
+
+
+class InstrumentationMiddleware:
+    """
+    Record latency, query, template and response size metrics per URL name.
+
+    Add it right after ``SecurityMiddleware`` so the measured time covers the
+    rest of the middleware stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_templates()
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.view_name if match is not None else UNRESOLVED_VIEW
+        method = request.method if request.method in KNOWN_METHODS else "OTHER"
+        REQUEST_DURATION.observe(elapsed, view, method)
+        REQUEST_DB_QUERIES.observe(timings.queries, view, method)
+        REQUEST_DB_DURATION.observe(timings.db_time, view, method)
+        REQUEST_TEMPLATE_DURATION.observe(timings.template_time, view, method)
+        RESPONSE_SIZE.observe(_response_size(response), view, method)
+        RESPONSES.inc(view, method, str(response.status_code))
+        return response
@@ -0,0 +1,26 @@
+from django.db import models
+from django.utils import timezone
+
+
+class StoredFile(models.Model):
+    """
+    A file kept once by ``ContentAddressedStorage``, whatever the number of
+    model fields referencing it.
+
+    Attributes:
+        name (CharField): Storage name, derived from the SHA-256 of the content.
+        size (BigIntegerField): Size of the file in bytes.
+        references (PositiveIntegerField): Number of model field values
+            currently pointing at the file.
+        stored_at (DateTimeField): When the content was last uploaded; files
+            are only removed once unreferenced for a grace period after it.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    references = models.PositiveIntegerField(default=0)
+    stored_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        """Returns the storage name and the reference count."""
+        return f"{self.name} ({self.references} references)"
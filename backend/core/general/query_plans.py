@@ -0,0 +1,165 @@
+"""
+Query plan checks for the main queries of the controllers.
+
+Each entry of :data:`QUERY_PLAN_CHECKS` builds the queryset a controller
+runs on every request, with placeholder keys. :func:`check_query_plans`
+asks the database how it would run each one with ``EXPLAIN`` and reports
+the tables it would read in full, so a dropped or mismatched index shows up
+before it slows down a page. The ``check_query_plans`` management command
+runs the checks and fails when a full scan is found.
+
+Supported databases are SQLite (``SCAN <table>`` in ``EXPLAIN QUERY PLAN``)
+and PostgreSQL (``Seq Scan on <table>``). PostgreSQL prefers sequential
+scans on small tables, so sequential scans are disabled for the checks: a
+``Seq Scan`` left in a plan then means no index can serve the query. Sorts
+the database has to do because no index gives the rows in order are
+reported too, but do not fail the checks.
+"""
+
+import re
+from collections import namedtuple
+
+from django.db import connections, transaction
+
+FULL_SCAN_PATTERNS = {
+    # "SCAN t USING [COVERING] INDEX i" reads the whole index, which is a
+    # full scan too; only constant rows and subquery results are exempt
+    "sqlite": re.compile(r"\bSCAN (?!CONSTANT ROW\b|SUBQUERY\b)(\w+)"),
+    "postgresql": re.compile(r"\bSeq Scan on (\w+)"),
+}
+
+SORT_PATTERNS = {
+    "sqlite": re.compile(r"\bUSE TEMP B-TREE FOR (?:ORDER BY|RIGHT PART OF ORDER BY)"),
+    "postgresql": re.compile(r"^\s*(?:->\s*)?(?:Incremental )?Sort\s+\(", re.M),
+}
+
+QueryPlan = namedtuple("QueryPlan", ["name", "plan", "full_scans", "sorts"])
+
+
+def _doctor_appointments():
+    from appointments.controllers import get_doctor_appointments
+    from users.models import Doctor
+
+    return get_doctor_appointments(Doctor(pk=1))
+
+
+def _doctor_appointments_today():
+    from django.utils import timezone
+
+    from appointments.controllers import get_doctor_appointments_on
+    from users.models import Doctor
+
+    return get_doctor_appointments_on(Doctor(pk=1), timezone.localdate())
+
+
+def _patient_doctor_appointments():
+    from appointments.models import DoctorAppointment
+
+    return DoctorAppointment.objects.filter(patient_id=1)
+
+
+def _test_appointments():
+    from appointments.controllers import get_test_appointments
+    from users.models import LabTechnician
+
+    return get_test_appointments(LabTechnician(pk=1))
+
+
+def _patient_test_reports():
+    from medical_tests.queries import patient_test_reports
+    from users.models import Patient
+
+    return patient_test_reports(Patient(pk=1))
+
+
+def _patient_timeline():
+    from users.timeline import timeline_appointments
+
+    return timeline_appointments(1)
+
+
+def _lab_worklist():
+    from medical_tests.worklist import pending_worklist
+
+    return pending_worklist()
+
+
+def _triage_queue():
+    from appointments.triage import waiting_appointments
+
+    return waiting_appointments(1)
+
+
+QUERY_PLAN_CHECKS = {
+    "users.doctor_dashboard (waiting patients)": _doctor_appointments,
+    "users.doctor_dashboard (today)": _doctor_appointments_today,
+    "appointments.get_doctor_appointment_list_for_patient": (
+        _patient_doctor_appointments
+    ),
+    "appointments.test_appointments_list": _test_appointments,
+    "appointments.labt_dashboard (worklist)": _lab_worklist,
+    "appointments.call_next_patient": _triage_queue,
+    "medical_tests.view_test_report": _patient_test_reports,
+    "users.patient_timeline": _patient_timeline,
+}
+
+
+def full_scans(plan, vendor):
+    """
+    Return the tables a query plan reads in full.
+
+    Args:
+        plan (str): The output of ``QuerySet.explain()``.
+        vendor (str): The database vendor, e.g. "sqlite".
+
+    Returns:
+        list: The table names, in plan order.
+    """
+    return FULL_SCAN_PATTERNS[vendor].findall(plan)
+
+
+def sorts(plan, vendor):
+    """
+    Return the number of sorts in a query plan that no index avoids.
+
+    Args:
+        plan (str): The output of ``QuerySet.explain()``.
+        vendor (str): The database vendor, e.g. "sqlite".
+
+    Returns:
+        int: The number of sorts.
+    """
+    return len(SORT_PATTERNS[vendor].findall(plan))
+
+
+def check_query_plans(names=None, using="default"):
+    """
+    Explain the main controller queries.
+
+    Args:
+        names (iterable): Names of the checks to run; all by default.
+        using (str): The database alias.
+
+    Returns:
+        list: A :class:`QueryPlan` per check.
+
+    Raises:
+        ValueError: When the database is neither SQLite nor PostgreSQL.
+    """
+    vendor = connections[using].vendor
+    if vendor not in FULL_SCAN_PATTERNS:
+        raise ValueError(f"Query plans of {vendor} are not checked.")
+
+    results = []
+    with transaction.atomic(using=using):
+        if vendor == "postgresql":
+            with connections[using].cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        for name, build in QUERY_PLAN_CHECKS.items():
+            if names and name not in names:
+                continue
+            plan = build().using(using).explain()
+            results.append(
+                QueryPlan(name, plan, full_scans(plan, vendor), sorts(plan, vendor))
+            )
+    return results
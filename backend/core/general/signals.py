@@ -0,0 +1,57 @@
+"""
+Signal handlers counting the references to content-addressed files.
+
+They are connected in ``GeneralConfig.ready`` to every model with a file
+field using ``ContentAddressedStorage``. The file names a model instance
+was loaded with are remembered on ``post_init``, so ``post_save`` can count
+a reference to the new file and drop the one to the replaced file.
+"""
+
+from core.general.storage import (
+    add_reference,
+    content_addressed_fields,
+    drop_reference,
+)
+
+
+def _file_name(value):
+    # Before the field is accessed, the instance holds the raw string
+    if isinstance(value, str):
+        return value or None
+    return getattr(value, "name", None) or None
+
+
+def remember_file_names(sender, instance, **kwargs):
+    """Remember the file names an instance was loaded or created with."""
+    instance._stored_file_names = {
+        field.attname: _file_name(instance.__dict__.get(field.attname))
+        for field in content_addressed_fields(sender)
+        if field.attname in instance.__dict__
+    }
+
+
+def count_file_references(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Move the references of the saved file fields to their new files."""
+    if raw:
+        return
+    names = instance.__dict__.setdefault("_stored_file_names", {})
+    for field in content_addressed_fields(sender):
+        if update_fields is not None and field.attname not in update_fields:
+            continue
+        old = names.get(field.attname)
+        new = _file_name(getattr(instance, field.attname))
+        if old != new:
+            if new:
+                add_reference(new)
+            if old:
+                drop_reference(field.storage, old)
+            names[field.attname] = new
+
+
+def release_file_references(sender, instance, **kwargs):
+    """Drop the references of a deleted instance."""
+    names = instance.__dict__.get("_stored_file_names", {})
+    for field in content_addressed_fields(sender):
+        name = names.get(field.attname) or _file_name(getattr(instance, field.attname))
+        if name:
+            drop_reference(field.storage, name)
@@ -0,0 +1,216 @@
+"""
+Content-addressed, deduplicated storage for uploaded files.
+
+:class:`ContentAddressedStorage` is a drop-in ``storage`` for ``FileField``
+and ``ImageField``. It streams every upload in chunks to a temporary file
+while hashing it, then stores the content once under a name derived from
+its SHA-256 (``cas/<2 hex digits>/<digest><extension>``); uploading the same
+content again reuses the stored file. Names of files stored before the
+field used this storage keep working.
+
+A :class:`core.general.models.StoredFile` row per stored content counts the
+model field values pointing at it. The ``post_save``/``post_delete``
+handlers of ``core.general.signals`` keep the counts up to date, and a
+file is removed once nothing references it any more and it has not been
+uploaded again for ``UNREFERENCED_GRACE_PERIOD`` (which protects uploads
+whose model is not saved yet). The ``collect_stored_files`` management
+command recounts the references, for changes made with ``update()`` or
+``bulk_update()``, and removes what is left unreferenced.
+"""
+
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+from functools import cache
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+from core.general.images import delete_variants
+from core.general.models import StoredFile
+
+CONTENT_DIRECTORY = "cas"
+INCOMING_DIRECTORY = ".incoming"
+UNREFERENCED_GRACE_PERIOD = timedelta(hours=1)
+
+
+@deconstructible(path="core.general.storage.ContentAddressedStorage")
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage keeping every distinct content once."""
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is only known once _save has hashed the content, and
+        # an existing file with that name is the content itself.
+        return name
+
+    def content_name(self, digest, name):
+        """
+        Return the storage name of a content.
+
+        Args:
+            digest (str): Hex SHA-256 of the content.
+            name (str): The uploaded name, only used for its extension.
+
+        Returns:
+            str: The storage name.
+        """
+        extension = os.path.splitext(name)[1].lower()
+        return f"{CONTENT_DIRECTORY}/{digest[:2]}/{digest}{extension}"
+
+    def _save(self, name, content):
+        incoming = os.path.join(self.location, INCOMING_DIRECTORY)
+        os.makedirs(incoming, exist_ok=True)
+        temporary = tempfile.NamedTemporaryFile(dir=incoming, delete=False)
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            with temporary:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    temporary.write(chunk)
+                    size += len(chunk)
+
+            name = self.content_name(digest.hexdigest(), name)
+            path = self.path(name)
+            # The row lock serializes this with the removal in release()
+            with transaction.atomic():
+                locked = StoredFile.objects.select_for_update()
+                stored, created = locked.get_or_create(
+                    name=name, defaults={"size": size}
+                )
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(temporary.name, path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(path, self.file_permissions_mode)
+                if not created:
+                    StoredFile.objects.filter(pk=stored.pk).update(
+                        stored_at=timezone.now()
+                    )
+        finally:
+            if os.path.exists(temporary.name):
+                os.remove(temporary.name)
+        return name
+
+    def delete(self, name):
+        """
+        Delete a file, unless it is stored by content.
+
+        Stored contents may be shared, so they are only removed by
+        :meth:`release` once nothing references them.
+        """
+        if name and not name.startswith(f"{CONTENT_DIRECTORY}/"):
+            super().delete(name)
+
+    def release(self, name):
+        """
+        Remove a stored content, and its resized variants, once nothing
+        references it.
+
+        Args:
+            name (str): The storage name.
+
+        Returns:
+            bool: Whether the file was removed.
+        """
+        cutoff = timezone.now() - UNREFERENCED_GRACE_PERIOD
+        with transaction.atomic():
+            stored = (
+                StoredFile.objects.select_for_update()
+                .filter(name=name, references=0, stored_at__lt=cutoff)
+                .first()
+            )
+            if stored is None:
+                return False
+            super().delete(name)
+            stored.delete()
+        delete_variants(name)
+        return True
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+@cache
+def content_addressed_fields(model):
+    """
+    Return the file fields of ``model`` using a content-addressed storage.
+
+    Args:
+        model: A model class.
+
+    Returns:
+        tuple: The fields.
+    """
+    return tuple(
+        field
+        for field in model._meta.concrete_fields
+        if isinstance(getattr(field, "storage", None), ContentAddressedStorage)
+    )
+
+
+def add_reference(name):
+    """Count one more reference to a stored content."""
+    StoredFile.objects.filter(name=name).update(references=F("references") + 1)
+
+
+def drop_reference(storage, name):
+    """Count one reference less, and remove the content once committed unused."""
+    dropped = StoredFile.objects.filter(name=name, references__gt=0).update(
+        references=F("references") - 1
+    )
+    if dropped:
+        transaction.on_commit(lambda: storage.release(name))
+
+
+def recount_references():
+    """
+    Recompute every reference count from the model fields.
+
+    Returns:
+        int: Number of stored files whose count was wrong.
+    """
+    counts = {}
+    for model in apps.get_models():
+        for field in content_addressed_fields(model):
+            rows = (
+                model._default_manager.filter(
+                    **{f"{field.attname}__startswith": f"{CONTENT_DIRECTORY}/"}
+                )
+                .values(field.attname)
+                .annotate(total=Count("pk"))
+                .order_by()
+            )
+            for row in rows:
+                name = row[field.attname]
+                counts[name] = counts.get(name, 0) + row["total"]
+
+    fixed = []
+    for stored in StoredFile.objects.only("id", "name", "references").iterator():
+        references = counts.get(stored.name, 0)
+        if stored.references != references:
+            stored.references = references
+            fixed.append(stored)
+    StoredFile.objects.bulk_update(fixed, ["references"], batch_size=500)
+    return len(fixed)
+
+
+def collect_unreferenced(storage=content_addressed_storage):
+    """
+    Remove every stored content left unreferenced past the grace period.
+
+    Returns:
+        int: Number of files removed.
+    """
+    cutoff = timezone.now() - UNREFERENCED_GRACE_PERIOD
+    names = StoredFile.objects.filter(
+        references=0, stored_at__lt=cutoff
+    ).values_list("name", flat=True)
+    return sum(storage.release(name) for name in list(names))
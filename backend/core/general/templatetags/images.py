@@ -0,0 +1,48 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from core.general.images import image_variants
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, width, height=None, crop=False, **attrs):
+    """
+    Render an ``<picture>`` serving ``image`` resized for its display size.
+
+    Browsers pick the WebP variant when they support it and the JPEG one
+    otherwise, and the 2x variant on high-density screens. When the image
+    cannot be resized, the original file is served.
+
+    Usage::
+
+        {% load images %}
+        {% responsive_image user.profile_picture 100 100 crop=True alt="Profile" %}
+
+    Args:
+        image (FieldFile): The image field value; nothing is rendered if empty.
+        width (int): Display width in pixels.
+        height (int): Display height in pixels; omit to keep the aspect ratio.
+        crop (bool): Whether to crop to fill the box rather than fit in it.
+        **attrs: Further attributes of the ``<img>`` tag (alt, class, style...).
+
+    Returns:
+        str: The HTML.
+    """
+    if not image:
+        return ""
+    img_attrs = flatatt({"width": width, "height": height, **attrs})
+    variants = image_variants(image, int(width), height and int(height), crop)
+    if variants is None:
+        return format_html('<img src="{}"{}>', image.url, img_attrs)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{} 1x, {} 2x">'
+        '<img src="{}" srcset="{} 2x"{} loading="lazy"></picture>',
+        variants["1x"]["webp"],
+        variants["2x"]["webp"],
+        variants["1x"]["jpg"],
+        variants["2x"]["jpg"],
+        img_attrs,
+    )
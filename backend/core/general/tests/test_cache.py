@@ -0,0 +1,110 @@
+from django.contrib.messages import constants
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ambulance.models import Ambulance
+from blogs.models import Blog
+from core.general.cache import (
+    bump_model_version,
+    model_cache_key,
+    model_cache_version,
+)
+from users.models import User
+
+
+class ModelCacheKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_changes_dependent_keys_only(self):
+        blog_key = model_cache_key("page", [Blog], "/blogs/")
+        both_key = model_cache_key("page", [Ambulance, Blog], "/")
+        ambulance_key = model_cache_key("page", [Ambulance], "/ambulance/")
+
+        bump_model_version(Blog)
+
+        self.assertNotEqual(model_cache_key("page", [Blog], "/blogs/"), blog_key)
+        self.assertNotEqual(model_cache_key("page", [Blog, Ambulance], "/"), both_key)
+        self.assertEqual(
+            model_cache_key("page", [Ambulance], "/ambulance/"), ambulance_key
+        )
+
+    def test_evicted_version_does_not_restart(self):
+        version = model_cache_version(Blog)
+        cache.clear()
+        self.assertNotEqual(model_cache_version(Blog), version)
+
+
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            email="admin@example.com",
+            name="Admin",
+            role="Admin",
+            blood_group="A+",
+            date_of_birth="1980-01-01",
+            gender="Male",
+            phone_number="+8801712345678",
+            role_id="cache-admin",
+            password="asdf1234@",
+        )
+        self.blog = Blog.objects.create(
+            title="Dengue season", author=self.author, content="Stay safe."
+        )
+
+    def test_anonymous_page_is_cached(self):
+        url = reverse("blogs:blog-list")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, "Dengue season")
+
+    def test_save_and_delete_invalidate(self):
+        url = reverse("blogs:blog-list")
+        self.client.get(url)
+
+        self.blog.title = "Influenza season"
+        self.blog.save()
+        self.assertContains(self.client.get(url), "Influenza season")
+
+        self.blog.delete()
+        self.assertNotContains(self.client.get(url), "Influenza season")
+
+    def test_ambulance_change_invalidates(self):
+        url = reverse("users:ambulance_info")
+        self.client.get(url)
+        Ambulance.objects.create(
+            registration_number="DHAKA-1234",
+            driver_name="Karim",
+            contact_number="01700000000",
+            current_location="Campus",
+        )
+        self.assertContains(self.client.get(url), "DHAKA-1234")
+
+    def test_authenticated_users_are_not_cached(self):
+        self.client.force_login(self.author)
+        url = reverse("blogs:blog-list")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertTrue(
+            any('"blogs_blog"' in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_pending_messages_bypass_cache(self):
+        url = reverse("blogs:blog-list")
+        self.client.get(url)
+
+        request = RequestFactory().get("/")
+        storage = CookieStorage(request)
+        storage.add(constants.INFO, "You have been logged out.")
+        response = self.client.get(url)
+        storage.update(response)
+        self.client.cookies.update(response.cookies)
+        response = self.client.get(url)
+        self.assertContains(response, "You have been logged out.")
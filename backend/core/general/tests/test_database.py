@@ -0,0 +1,67 @@
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.general.utils.database import postgresql_database, sqlite_database
+
+POSTGRES = {
+    "NAME": "jumcms",
+    "USER": "jumcms",
+    "PASSWORD": "secret",
+    "HOST": "db",
+    "PORT": 5432,
+    "POOL": False,
+    "POOL_MIN_SIZE": 2,
+    "POOL_MAX_SIZE": 20,
+    "POOL_TIMEOUT": 10,
+    "CONN_MAX_AGE": 600,
+}
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    def test_postgresql_persistent_connections(self):
+        database = postgresql_database(POSTGRES)
+        self.assertEqual(database["ENGINE"], "django.db.backends.postgresql")
+        self.assertEqual(database["PORT"], "5432")
+        self.assertEqual(database["CONN_MAX_AGE"], 600)
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+        self.assertNotIn("pool", database["OPTIONS"])
+
+    def test_postgresql_pool(self):
+        pool_module = mock.Mock()
+        with mock.patch.dict(sys.modules, {"psycopg_pool": pool_module}):
+            database = postgresql_database({**POSTGRES, "POOL": True})
+        self.assertEqual(database["CONN_MAX_AGE"], 0)
+        self.assertEqual(database["OPTIONS"]["pool"]["max_size"], 20)
+        self.assertIs(
+            database["OPTIONS"]["pool"]["check"],
+            pool_module.ConnectionPool.check_connection,
+        )
+
+    def test_postgresql_pool_without_psycopg_pool(self):
+        with mock.patch.dict(sys.modules, {"psycopg_pool": None}):
+            with self.assertRaises(ImproperlyConfigured):
+                postgresql_database({**POSTGRES, "POOL": True})
+
+    def test_sqlite(self):
+        database = sqlite_database(settings.BASE_DIR / "db.sqlite3")
+        self.assertEqual(database["ENGINE"], "django.db.backends.sqlite3")
+        self.assertTrue(database["NAME"].endswith("db.sqlite3"))
+
+
+class SqlitePragmaTests(TestCase):
+    def test_pragmas_are_applied(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(
+                cursor.fetchone()[0], settings.SQLITE_PRAGMAS["busy_timeout"]
+            )
+            cursor.execute("PRAGMA synchronous")
+            # 1 is NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
@@ -0,0 +1,119 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from blogs.models import Blog
+from core.general.images import image_variants, render_variant, variant_size
+from core.general.models import StoredFile
+from users.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def _png(width, height, mode="RGBA"):
+    output = BytesIO()
+    Image.new(mode, (width, height), (200, 30, 30, 128)[: len(mode)]).save(
+        output, "PNG"
+    )
+    return output.getvalue()
+
+
+class RenderVariantTests(TestCase):
+    def test_variant_size_rounds_up_to_a_bucket(self):
+        self.assertEqual(variant_size(90, 90), (100, 100))
+        self.assertEqual(variant_size(150, 100), (200, 133))
+        self.assertEqual(variant_size(5000), (1600, None))
+
+    def test_crop_fills_the_box(self):
+        data = render_variant(BytesIO(_png(600, 300)), 100, 100, True, "WEBP")
+        with Image.open(BytesIO(data)) as image:
+            self.assertEqual((image.format, image.size), ("WEBP", (100, 100)))
+
+    def test_fit_keeps_aspect_ratio_and_never_enlarges(self):
+        data = render_variant(BytesIO(_png(600, 300)), 200, None, False, "JPEG")
+        with Image.open(BytesIO(data)) as image:
+            self.assertEqual((image.format, image.size), ("JPEG", (200, 100)))
+        data = render_variant(BytesIO(_png(50, 20)), 400, None, False, "JPEG")
+        with Image.open(BytesIO(data)) as image:
+            self.assertEqual(image.size, (50, 20))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ResponsiveImageTagTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="author@example.com",
+            name="Author",
+            role="Doctor",
+            blood_group="A+",
+            date_of_birth="1980-01-01",
+            gender="Male",
+            phone_number="+8801712345678",
+            role_id="images-author",
+            password="asdf1234@",
+        )
+        self.blog = Blog(title="Flu <season>", author=self.user, content="Text")
+        self.blog.image.save("photo.png", ContentFile(_png(1000, 500)), save=False)
+        self.blog.save()
+
+    def render(self, source):
+        return Template("{% load images %}" + source).render(
+            Context({"blog": self.blog})
+        )
+
+    def test_tag_renders_webp_and_jpeg_variants(self):
+        html = self.render('{% responsive_image blog.image 400 alt=blog.title %}')
+        variants = image_variants(self.blog.image, 400)
+        self.assertIn(f'srcset="{variants["1x"]["webp"]} 1x', html)
+        self.assertIn(f'src="{variants["1x"]["jpg"]}"', html)
+        self.assertIn(f'srcset="{variants["2x"]["jpg"]} 2x"', html)
+        self.assertIn('alt="Flu &lt;season&gt;"', html)
+        self.assertIn('width="400"', html)
+        self.assertNotIn(self.blog.image.url, html)
+
+        name = variants["2x"]["webp"].removeprefix("/media/")
+        with default_storage.open(name) as variant, Image.open(variant) as image:
+            self.assertEqual(image.size, (800, 400))
+
+    def test_existing_variants_are_reused(self):
+        self.render("{% responsive_image blog.image 100 100 crop=True %}")
+        cache.clear()
+        with patch("core.general.images.render_variant") as render_variant:
+            html = self.render("{% responsive_image blog.image 100 100 crop=True %}")
+        render_variant.assert_not_called()
+        self.assertIn("<picture>", html)
+
+    def test_variants_are_deleted_with_the_stored_file(self):
+        variants = image_variants(self.blog.image, 200)
+        name = variants["1x"]["jpg"].removeprefix("/media/")
+        self.assertTrue(default_storage.exists(name))
+        StoredFile.objects.update(stored_at=timezone.now() - timedelta(days=1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.blog.delete()
+        self.assertFalse(default_storage.exists(name))
+
+    def test_unreadable_image_falls_back_to_original(self):
+        self.blog.image.save("broken.png", ContentFile(b"not an image"))
+        html = self.render("{% responsive_image blog.image 200 %}")
+        self.assertEqual(html, f'<img src="{self.blog.image.url}" width="200">')
+
+    def test_empty_image_renders_nothing(self):
+        self.blog.image = None
+        self.assertEqual(self.render("{% responsive_image blog.image 200 %}"), "")
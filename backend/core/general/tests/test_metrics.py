@@ -0,0 +1,82 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.general.metrics import REGISTRY, Histogram
+from users.models import Doctor, User
+
+
+class HistogramTests(TestCase):
+    def test_samples_are_cumulative(self):
+        histogram = Histogram("test_seconds", "Test.", ("view",), (0.1, 1))
+        for value in (0.05, 0.5, 0.5, 5):
+            histogram.observe(value, "home")
+
+        samples = {
+            (name, dict(labels).get("le")): value
+            for name, labels, value in histogram.samples()
+        }
+        self.assertEqual(samples[("test_seconds_bucket", "0.1")], 1)
+        self.assertEqual(samples[("test_seconds_bucket", "1")], 3)
+        self.assertEqual(samples[("test_seconds_bucket", "+Inf")], 4)
+        self.assertEqual(samples[("test_seconds_count", None)], 4)
+        self.assertAlmostEqual(samples[("test_seconds_sum", None)], 6.05)
+
+
+class InstrumentationMiddlewareTests(TestCase):
+    def setUp(self):
+        REGISTRY.clear()
+        self.user = User.objects.create_user(
+            email="doctor@example.com",
+            name="Doctor",
+            role="Doctor",
+            blood_group="A+",
+            date_of_birth="1980-01-01",
+            gender="Male",
+            phone_number="+8801712345678",
+            role_id="metrics-doc",
+            password="asdf1234@",
+        )
+        Doctor.objects.create(user=self.user)
+
+    def metrics(self, **headers):
+        return self.client.get(reverse("metrics"), **headers)
+
+    def test_request_is_recorded_per_url_name(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("users:doctor-dashboard"))
+        self.client.get("/no-such-page/")
+
+        body = self.metrics().content.decode()
+        self.assertIn(
+            "jumcms_request_duration_seconds_count"
+            '{view="users:doctor-dashboard",method="GET"} 1',
+            body,
+        )
+        self.assertIn(
+            'jumcms_responses_total{view="<unresolved>",method="GET",status="404"} 1',
+            body,
+        )
+        sums = {
+            line.split("{")[0]: float(line.split()[-1])
+            for line in body.splitlines()
+            if '_sum{view="users:doctor-dashboard"' in line
+        }
+        self.assertGreater(sums["jumcms_request_db_queries_sum"], 0)
+        self.assertGreater(sums["jumcms_request_db_duration_seconds_sum"], 0)
+        self.assertGreater(sums["jumcms_request_template_duration_seconds_sum"], 0)
+        self.assertGreater(sums["jumcms_response_size_bytes_sum"], 0)
+
+    def test_metrics_content_type(self):
+        response = self.metrics()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            "# TYPE jumcms_request_duration_seconds histogram",
+            response.content.decode(),
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        self.assertEqual(self.metrics().status_code, 403)
+        response = self.metrics(HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
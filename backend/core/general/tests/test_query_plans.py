@@ -0,0 +1,72 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from appointments.models import DoctorAppointment
+from core.general.query_plans import (
+    QUERY_PLAN_CHECKS,
+    check_query_plans,
+    full_scans,
+    sorts,
+)
+
+
+class QueryPlanParsingTests(SimpleTestCase):
+    def test_sqlite_plans(self):
+        plan = (
+            "3 0 0 SCAN appointments_doctorappointment\n"
+            "7 0 0 SEARCH users_user USING INTEGER PRIMARY KEY (rowid=?)\n"
+            "9 0 0 SCAN medical_tests_test USING COVERING INDEX name_idx\n"
+            "12 0 0 SCAN CONSTANT ROW\n"
+            "20 0 0 USE TEMP B-TREE FOR ORDER BY"
+        )
+        self.assertEqual(
+            full_scans(plan, "sqlite"),
+            ["appointments_doctorappointment", "medical_tests_test"],
+        )
+        self.assertEqual(sorts(plan, "sqlite"), 1)
+
+    def test_postgresql_plans(self):
+        plan = (
+            "Sort  (cost=10.1..10.2 rows=3 width=40)\n"
+            "  Sort Key: appointment_date_time\n"
+            "  ->  Nested Loop  (cost=0.3..10.0 rows=3 width=40)\n"
+            "        ->  Seq Scan on medicines_prescription  (cost=0.0..1.0)\n"
+            "        ->  Index Scan using users_user_pkey on users_user  (cost=0.1)"
+        )
+        self.assertEqual(full_scans(plan, "postgresql"), ["medicines_prescription"])
+        self.assertEqual(sorts(plan, "postgresql"), 1)
+
+
+class CheckQueryPlansCommandTests(TestCase):
+    def test_controller_queries_use_indexes(self):
+        out = StringIO()
+        call_command("check_query_plans", stdout=out)
+        self.assertIn("No full table scans.", out.getvalue())
+        for name in QUERY_PLAN_CHECKS:
+            self.assertIn(f"{name}: ok", out.getvalue())
+
+    def test_full_scan_fails(self):
+        checks = {"unindexed": lambda: DoctorAppointment.objects.filter(reason="x")}
+        out = StringIO()
+        with mock.patch.dict(QUERY_PLAN_CHECKS, checks, clear=True):
+            with self.assertRaisesMessage(CommandError, "1 queries scan whole"):
+                call_command("check_query_plans", stdout=out)
+        self.assertIn(
+            "unindexed: full scan of appointments_doctorappointment", out.getvalue()
+        )
+
+    def test_unknown_check(self):
+        with self.assertRaisesMessage(CommandError, "Unknown checks: nope"):
+            call_command("check_query_plans", "nope")
+
+    def test_unsupported_database(self):
+        with mock.patch.object(connection, "vendor", "oracle"):
+            with self.assertRaisesMessage(ValueError, "oracle are not checked"):
+                check_query_plans()
+            with self.assertRaisesMessage(CommandError, "oracle are not checked"):
+                call_command("check_query_plans")
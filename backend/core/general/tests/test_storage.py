@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from blogs.models import Blog
+from certifications.models import FundraisingRequest
+from core.general.models import StoredFile
+from core.general.storage import (
+    UNREFERENCED_GRACE_PERIOD,
+    content_addressed_storage,
+)
+from users.models import Patient, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="author@example.com",
+            name="Author",
+            role="Doctor",
+            blood_group="A+",
+            date_of_birth="1980-01-01",
+            gender="Male",
+            phone_number="+8801712345678",
+            role_id="storage-author",
+            password="asdf1234@",
+        )
+
+    def blog(self, content, name="image.png"):
+        blog = Blog(title="Post", author=self.user, content="Text")
+        blog.image.save(name, ContentFile(content), save=False)
+        blog.save()
+        return blog
+
+    def expire_grace_period(self):
+        StoredFile.objects.update(
+            stored_at=timezone.now() - UNREFERENCED_GRACE_PERIOD * 2
+        )
+
+    def test_identical_uploads_are_stored_once(self):
+        first = self.blog(b"same bytes", "first.PNG")
+        second = self.blog(b"same bytes", "second.png")
+        other = self.blog(b"other bytes")
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertRegex(first.image.name, r"^cas/[0-9a-f]{2}/[0-9a-f]{64}\.png$")
+        stored = StoredFile.objects.get(name=first.image.name)
+        self.assertEqual((stored.size, stored.references), (10, 2))
+        with first.image.open("rb") as image:
+            self.assertEqual(image.read(), b"same bytes")
+        self.assertEqual(os.listdir(os.path.join(MEDIA_ROOT, ".incoming")), [])
+
+    def test_file_is_removed_with_its_last_reference(self):
+        first = self.blog(b"shared")
+        second = self.blog(b"shared")
+        name = first.image.name
+        self.expire_grace_period()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(content_addressed_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(content_addressed_storage.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+
+    def test_recent_upload_survives_until_grace_period_ends(self):
+        blog = self.blog(b"fresh")
+        name = blog.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            blog.delete()
+        self.assertTrue(content_addressed_storage.exists(name))
+
+        self.expire_grace_period()
+        out = StringIO()
+        call_command("collect_stored_files", stdout=out)
+        self.assertIn("removed 1 files", out.getvalue())
+        self.assertFalse(content_addressed_storage.exists(name))
+
+    def test_replacing_a_file_moves_the_reference(self):
+        blog = self.blog(b"old")
+        old_name = blog.image.name
+        blog = Blog.objects.get(pk=blog.pk)
+        blog.image.save("new.png", ContentFile(b"new"))
+
+        self.assertEqual(StoredFile.objects.get(name=old_name).references, 0)
+        self.assertEqual(StoredFile.objects.get(name=blog.image.name).references, 1)
+        # Saving other fields leaves the counts alone
+        blog.title = "Renamed"
+        blog.save(update_fields=["title"])
+        blog.save()
+        self.assertEqual(StoredFile.objects.get(name=blog.image.name).references, 1)
+
+    def test_references_are_shared_across_models(self):
+        blog = self.blog(b"%PDF-1.4 report")
+        patient = Patient.objects.create(user=self.user)
+        request = FundraisingRequest.objects.create(
+            patient=patient, disease_name="Flu", amount_needed=100
+        )
+        request.attachments.save("report.png", ContentFile(b"%PDF-1.4 report"))
+        self.assertEqual(request.attachments.name, blog.image.name)
+        self.assertEqual(StoredFile.objects.get(name=blog.image.name).references, 2)
+
+    def test_recount_fixes_counts_after_queryset_updates(self):
+        blog = self.blog(b"counted")
+        Blog.objects.filter(pk=blog.pk).update(image="")
+        self.expire_grace_period()
+
+        out = StringIO()
+        call_command("collect_stored_files", stdout=out)
+        self.assertEqual(
+            out.getvalue().strip(), "Fixed 1 reference counts and removed 1 files."
+        )
+
+    def test_files_stored_before_keep_working(self):
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.profile_picture.name, "profile_pictures/default_user.png")
+        user.save()
+        self.assertFalse(StoredFile.objects.exists())
@@ -0,0 +1,98 @@
+"""
+Builders for the ``DATABASES`` setting and the SQLite connection hook.
+
+``core/jumcms/settings/database.py`` picks one of the builders according to
+the ``DATABASE_BACKEND`` setting, which like every other setting can be
+overridden through the ``JUMCMSSETTINGS_`` environment variables, e.g.::
+
+    JUMCMSSETTINGS_DATABASE_BACKEND=postgresql
+    JUMCMSSETTINGS_POSTGRES='{"HOST": "db", "PASSWORD": "secret"}'
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def postgresql_database(config):
+    """
+    Build a PostgreSQL database entry from the ``POSTGRES`` setting.
+
+    With ``POOL`` enabled, connections come from a psycopg connection pool
+    which checks every connection before handing it out. Django's pool does
+    not support persistent connections, so ``CONN_MAX_AGE`` only applies
+    without the pool; the connection is then health-checked before being
+    reused by a new request.
+
+    Args:
+        config (dict): The ``POSTGRES`` setting.
+
+    Returns:
+        dict: The ``DATABASES["default"]`` entry.
+    """
+    database = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": config["NAME"],
+        "USER": config["USER"],
+        "PASSWORD": config["PASSWORD"],
+        "HOST": config["HOST"],
+        "PORT": str(config["PORT"]),
+        "CONN_HEALTH_CHECKS": True,
+        "CONN_MAX_AGE": config["CONN_MAX_AGE"],
+        "OPTIONS": {},
+    }
+    if config["POOL"]:
+        pool = {
+            "min_size": config["POOL_MIN_SIZE"],
+            "max_size": config["POOL_MAX_SIZE"],
+            "timeout": config["POOL_TIMEOUT"],
+        }
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError:
+            raise ImproperlyConfigured(
+                'The PostgreSQL connection pool needs "psycopg[binary,pool]"; '
+                "install it with poetry install --extras postgres."
+            )
+        pool["check"] = ConnectionPool.check_connection
+        database["CONN_MAX_AGE"] = 0
+        database["OPTIONS"]["pool"] = pool
+    return database
+
+
+def sqlite_database(path):
+    """
+    Build a SQLite database entry.
+
+    The concurrency PRAGMAs are applied by :func:`configure_sqlite` when
+    each connection is opened.
+
+    Args:
+        path: Path of the database file.
+
+    Returns:
+        dict: The ``DATABASES["default"]`` entry.
+    """
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": str(path),
+        # Wait for the lock when a write transaction starts instead of
+        # failing immediately when another connection is writing.
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+    }
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    ``connection_created`` handler applying ``SQLITE_PRAGMAS`` to SQLite.
+
+    WAL mode lets readers proceed while a write is in progress,
+    ``busy_timeout`` makes writers wait for the lock instead of failing
+    with "database is locked", and ``synchronous=NORMAL`` is safe with WAL
+    while avoiding an fsync on every commit.
+    """
+    from django.conf import settings
+
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
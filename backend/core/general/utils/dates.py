@@ -0,0 +1,21 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def day_bounds(day):
+    """
+    Return the start of a day and of the next one in the current time zone.
+
+    Filtering a datetime column on this range rather than with a ``__date``
+    lookup lets the database use an index on the column.
+
+    Args:
+        day (date): The day.
+
+    Returns:
+        tuple: Two aware datetimes.
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
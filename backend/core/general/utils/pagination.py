@@ -0,0 +1,66 @@
+DEFAULT_PAGE_SIZE = 50
+
+
+class KeysetPage:
+    """
+    One page of a keyset (cursor) paginated queryset.
+
+    Attributes:
+        object_list (list): The rows of this page.
+        next_cursor (str): Cursor of the following page, or None on the last page.
+        cursor (str): Cursor this page was requested with, or None for the first page.
+    """
+
+    def __init__(self, object_list, next_cursor, cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_paginate(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, key="-pk"):
+    """
+    Return one page of ``queryset`` ordered by the unique integer field ``key``.
+
+    Instead of ``OFFSET`` the page starts right after the row whose key equals
+    ``cursor``, so every page costs one indexed range query however deep the
+    caller pages. Invalid cursors fall back to the first page.
+
+    Args:
+        queryset (QuerySet): The rows to paginate.
+        cursor (str): Key of the last row of the previous page.
+        page_size (int): Maximum number of rows per page.
+        key (str): Unique integer field to order by; prefix with "-" for
+            descending order.
+
+    Returns:
+        KeysetPage: The requested page.
+    """
+    field = key.lstrip("-")
+    descending = key.startswith("-")
+
+    try:
+        cursor = int(cursor) if cursor not in (None, "") else None
+    except (TypeError, ValueError):
+        cursor = None
+
+    queryset = queryset.order_by(key)
+    if cursor is not None:
+        lookup = "lt" if descending else "gt"
+        queryset = queryset.filter(**{f"{field}__{lookup}": cursor})
+
+    rows = list(queryset[: page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = str(getattr(rows[-1], field))
+    return KeysetPage(rows, next_cursor, None if cursor is None else str(cursor))
@@ -20,5 +20,7 @@ include(
     'custom.py',
     optional(LOCAL_SETTINGS_PATH),
     'envvars.py',
+    'database.py',
+    'cache.py',
     'docker.py',
 )
\ No newline at end of file
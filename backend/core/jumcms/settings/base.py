@@ -17,6 +17,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "core.general",
     "users",
     "appointments",
     "medical_tests",
@@ -28,6 +29,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.general.middleware.InstrumentationMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -61,13 +63,7 @@ WSGI_APPLICATION = "core.jumcms.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
-
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": "/home/rathi/python-practices/JUMCMS-Jahangirnagar-University-Medical-Center-Management-System/backend/db.sqlite3"
-    }
-}
+# DATABASES is built in database.py from the DATABASE_BACKEND setting.
 
 
 # Password validation
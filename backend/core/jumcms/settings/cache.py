@@ -0,0 +1,25 @@
+from django.core.exceptions import ImproperlyConfigured
+
+# CACHE_BACKEND and CACHE_FILE_PATH come from custom.py, possibly overridden
+# by the local settings or JUMCMSSETTINGS_ environment variables. An explicit
+# CACHES setting wins over both.
+if "CACHES" not in globals():
+    _backend = globals()["CACHE_BACKEND"]
+    if _backend == "locmem":
+        CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "jumcms",
+                "OPTIONS": {"MAX_ENTRIES": 5000},
+            }
+        }
+    elif _backend == "file":
+        CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": str(globals()["CACHE_FILE_PATH"]),
+                "OPTIONS": {"MAX_ENTRIES": 20000},
+            }
+        }
+    else:
+        raise ImproperlyConfigured(f"Unknown CACHE_BACKEND {_backend!r}")
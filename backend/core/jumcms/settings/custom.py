@@ -2,4 +2,54 @@
 Settings specific to this application only(no Django or third-party settings)
 """
 
-IN_DOCKER = False
\ No newline at end of file
+from core.jumcms.settings import BASE_DIR
+
+IN_DOCKER = False
+
+# "sqlite" or "postgresql"; see core/general/utils/database.py
+DATABASE_BACKEND = "sqlite"
+
+POSTGRES = {
+    "NAME": "jumcms",
+    "USER": "jumcms",
+    "PASSWORD": "",
+    "HOST": "localhost",
+    "PORT": 5432,
+    # Use a psycopg connection pool instead of persistent connections
+    "POOL": True,
+    "POOL_MIN_SIZE": 2,
+    "POOL_MAX_SIZE": 20,
+    # Seconds a request waits for a pooled connection
+    "POOL_TIMEOUT": 10,
+    # Lifetime of persistent connections when POOL is disabled
+    "CONN_MAX_AGE": 600,
+}
+
+SQLITE_PATH = BASE_DIR / "db.sqlite3"
+
+# Applied to every new SQLite connection (milliseconds for busy_timeout)
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 5000,
+    "synchronous": "NORMAL",
+}
+
+# "locmem" (per process) or "file" (shared by the processes of one host,
+# needed for invalidation to reach every worker); see settings/cache.py
+CACHE_BACKEND = "locmem"
+CACHE_FILE_PATH = BASE_DIR / "cache"
+
+# Seconds anonymous visitors are served a cached public page
+PAGE_CACHE_TIMEOUT = 300
+
+# Bearer token GPS devices must send to the ambulance ping ingestion API;
+# None disables the API
+AMBULANCE_INGEST_TOKEN = None
+
+# Seconds between flushes of buffered ambulance positions to the database;
+# 0 writes every accepted batch immediately
+AMBULANCE_PING_FLUSH_INTERVAL = 2
+
+# Bearer token Prometheus must send to scrape /metrics; None leaves the
+# endpoint open, so keep it unreachable from outside the monitoring network.
+METRICS_TOKEN = None
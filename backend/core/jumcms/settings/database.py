@@ -0,0 +1,15 @@
+from django.core.exceptions import ImproperlyConfigured
+
+from core.general.utils.database import postgresql_database, sqlite_database
+
+# DATABASE_BACKEND, POSTGRES and SQLITE_PATH come from custom.py, possibly
+# overridden by the local settings or JUMCMSSETTINGS_ environment variables.
+# An explicit DATABASES setting wins over all of them.
+if "DATABASES" not in globals():
+    _backend = globals()["DATABASE_BACKEND"]
+    if _backend == "postgresql":
+        DATABASES = {"default": postgresql_database(globals()["POSTGRES"])}
+    elif _backend == "sqlite":
+        DATABASES = {"default": sqlite_database(globals()["SQLITE_PATH"])}
+    else:
+        raise ImproperlyConfigured(f"Unknown DATABASE_BACKEND {_backend!r}")
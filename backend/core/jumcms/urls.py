@@ -17,6 +17,7 @@ from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from users.controllers import home
+from core.general.metrics import metrics_view
 
 from django.conf.urls.static import static
 from users.controllers import log_in
@@ -32,6 +33,8 @@ urlpatterns = [
     path("medicines/", include("medicines.urls", "medicines")),
     path("accounts/login/", log_in, name="default-log-in"),
     path("certifications/", include("certifications.urls")),
+    path("ambulance/", include("ambulance.urls")),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 if settings.DEBUG:
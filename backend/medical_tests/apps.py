@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MedicalTestsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'medical_tests'
+
+    def ready(self):
+        import medical_tests.signals  # noqa: F401
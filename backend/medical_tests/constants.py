@@ -0,0 +1,38 @@
+PDF_JOB_STATUS_CHOICES = [
+    ("pending", "Pending"),
+    ("running", "Running"),
+    ("done", "Done"),
+    ("failed", "Failed"),
+]
+
+# Attempts before a failing report PDF is given up on
+PDF_JOB_MAX_ATTEMPTS = 3
+
+# Seconds after which a running job is assumed to belong to a dead worker
+PDF_JOB_STALE_AFTER = 600
+
+# Seconds before the first retry of a failed report PDF, doubled after every
+# further failure
+PDF_JOB_RETRY_BACKOFF = 30
+
+# Seconds a queued report PDF may wait for a worker before the download view
+# renders it itself
+PDF_JOB_WORKER_TIMEOUT = 30
+
+# Rows per page of the lab technician lists
+LAB_LIST_PAGE_SIZE = 50
+
+# Worklist states of a prescribed test: waiting for the lab, opened by a
+# lab technician, and reported
+WORKLIST_STATUS_CHOICES = [
+    ("pending", "Pending"),
+    ("in_progress", "In progress"),
+    ("reported", "Reported"),
+]
+
+# Pending prescribed tests listed on the lab technician dashboard
+LAB_WORKLIST_SIZE = 20
+
+# Rows read and updated per batch when backfilling the denormalized patient
+# and test references
+DENORMALIZATION_BATCH_SIZE = 1000
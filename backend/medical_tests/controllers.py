@@ -6,12 +6,17 @@ import logging
 from medical_tests.models import PrescribedTest
 from medical_tests.forms import TestReportForm
 from users.models import LabTechnician
-from django.http import HttpResponse
-from .models import TestReport
-from django.template.loader import render_to_string
-from xhtml2pdf import pisa
+from django.http import FileResponse, JsonResponse
+from django.urls import reverse
+from .models import TestReport, TestReportPdfJob
+from .pdf_jobs import enqueue_report_pdf, render_unclaimed
+from .queries import (
+    patient_test_reports,
+    prescribed_test_list_page,
+    test_report_list_page,
+)
+from .worklist import start_prescribed_test
 from users.models import Patient
-from io import BytesIO
 
 
 @login_required
@@ -19,7 +24,8 @@ def prescribed_test_list(request):
     """
     View function to display the list of prescribed tests for a logged-in lab technician.
 
-    Retrieves a list of prescribed tests available for the lab technician.
+    Shows one keyset page of prescribed tests, newest first, filtered by the
+    status, date range and test given in the query string.
     If the user is not a lab technician, redirects them to the login page with an error message.
 
     :param request: HTTP request object.
@@ -32,13 +38,14 @@ def prescribed_test_list(request):
     except LabTechnician.DoesNotExist:
         messages.error(request, "You do not have permission to view test appointments.")
         return redirect("users:users-login")
-    prescribed_tests = PrescribedTest.objects.all()
+    prescribed_tests, filter_form = prescribed_test_list_page(request.GET)
 
     return render(
         request,
         "lab_technician/list_of_prescribed_test.html",
         {
             "prescribed_tests": prescribed_tests,
+            "filter_form": filter_form,
             "lab_technician": lab_technician,
         },
     )
@@ -49,9 +56,10 @@ def create_test_report(request, prescribed_test_id):
     """
     View function to create a test report for a specific prescribed test.
 
-    Retrieves the prescribed test based on the ID. If a valid POST request is made,
-    the test report is saved and associated with the prescribed test.
-    If the form is invalid, errors are logged, and the form is re-rendered.
+    Retrieves the prescribed test based on the ID. Opening the form moves a pending
+    test to in progress on the lab worklist. If a valid POST request is made,
+    the test report is saved and associated with the prescribed test, which marks
+    the test reported. If the form is invalid, errors are logged, and the form is re-rendered.
 
     :param request: HTTP request object.
     :type request: HttpRequest
@@ -81,6 +89,7 @@ def create_test_report(request, prescribed_test_id):
             logging.error("Form is not valid: %s", form.errors)
     else:
         form = TestReportForm()
+        start_prescribed_test(prescribed_test)
 
     return render(
         request,
@@ -98,7 +107,8 @@ def see_report_list(request):
     """
     View function to display a list of all test reports for the lab technician.
 
-    Retrieves all test reports and renders them on a list page. If the user is not a lab technician,
+    Shows one keyset page of test reports, newest first, filtered by the date
+    range and test given in the query string. If the user is not a lab technician,
     they are redirected with an error message.
 
     :param request: HTTP request object.
@@ -111,7 +121,7 @@ def see_report_list(request):
     except LabTechnician.DoesNotExist:
         messages.error(request, "You do not have permission to view test appointments.")
         return redirect("users:users-login")
-    test_reports = TestReport.objects.all()
+    test_reports, filter_form = test_report_list_page(request.GET)
 
     return render(
         request,
@@ -119,6 +129,7 @@ def see_report_list(request):
         {
             "lab_technician": lab_technician,
             "test_reports": test_reports,
+            "filter_form": filter_form,
         },
     )
 
@@ -140,9 +151,7 @@ def view_test_report(request):
       list of test reports for the patient.
     """
     patient = Patient.objects.get(user=request.user)
-    reports = TestReport.objects.filter(
-        prescribed_test__prescription__doctor_appointment__patient_id=patient.id
-    )
+    reports = patient_test_reports(patient)
     return render(
         request,
         "patients/view_test_report.html",
@@ -150,40 +159,86 @@ def view_test_report(request):
     )
 
 
+def _report_pdf_status(job):
+    """Describe a report's PDF job for the download poll responses."""
+    return {
+        "report_id": job.test_report_id,
+        "status": job.status,
+        "poll_url": reverse(
+            "medical_tests:test-report-pdf-status", args=[job.test_report_id]
+        ),
+        "download_url": reverse(
+            "medical_tests:download-test-report", args=[job.test_report_id]
+        ),
+    }
+
+
+def _open_pdf(job):
+    """Open the rendered PDF of a job, or return None if it is not ready."""
+    if job is None or job.status != "done" or not job.pdf_file:
+        return None
+    try:
+        return job.pdf_file.open("rb")
+    except FileNotFoundError:
+        return None
+
+
 @login_required
 def download_test_report(request, report_id):
     """
-    Generate and download a specific test report as a PDF.
+    Download a specific test report as a PDF.
 
-    This view allows an authenticated patient to download a PDF version of a
-    specific test report, identified by `report_id`. The report is rendered
-    to a PDF format using the xhtml2pdf library.
+    Report PDFs are rendered ahead of time by the ``render_report_pdfs``
+    worker as soon as the report is saved. When the PDF is ready it is
+    served straight from storage; otherwise the rendering is (re)queued and
+    a 202 response tells the client where to poll for it. A failed rendering
+    is queued again, and a job no worker has claimed within
+    ``PDF_JOB_WORKER_TIMEOUT`` seconds is rendered in the request.
 
     Parameters:
     - request: HttpRequest object containing metadata about the request.
     - report_id (int): ID of the TestReport to be downloaded.
 
     Returns:
-    - HttpResponse: PDF response with 'application/pdf' content type if the PDF
-      is successfully generated.
-    - HttpResponse: Returns a 400 error response if PDF generation fails.
+    - FileResponse: The PDF with 'application/pdf' content type if it has been
+      rendered.
+    - JsonResponse: 202 response with the job status and a poll URL while the
+      PDF is being rendered.
     """
     report = get_object_or_404(TestReport, id=report_id)
-    template_path = "patients/pdf_report_template.html"
+    job = TestReportPdfJob.objects.filter(test_report=report).first()
+    if job is not None:
+        render_unclaimed(job)
 
-    # Render HTML to a string
-    html = render_to_string(template_path, {"report": report})
+    pdf_file = _open_pdf(job)
+    if pdf_file is not None:
+        return FileResponse(
+            pdf_file,
+            as_attachment=True,
+            filename=f"TestReport_{report_id}.pdf",
+            content_type="application/pdf",
+        )
 
-    # Generate the PDF
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = (
-        f'attachment; filename="TestReport_{report_id}.pdf"'
-    )
+    if job is None or job.status in ("done", "failed"):
+        job = enqueue_report_pdf(report)
+    return JsonResponse(_report_pdf_status(job), status=202)
 
-    # Use xhtml2pdf to convert HTML to PDF
-    pisa_status = pisa.CreatePDF(BytesIO(html.encode("UTF-8")), dest=response)
 
-    if pisa_status.err:
-        return HttpResponse("Error creating PDF", status=400)
-    else:
-        return response
+@login_required
+def test_report_pdf_status(request, report_id):
+    """
+    Report whether the PDF of a test report is ready for download.
+
+    A job no worker has claimed within ``PDF_JOB_WORKER_TIMEOUT`` seconds is
+    rendered in the request, so polling ends even without a worker.
+
+    Parameters:
+    - request: HttpRequest object containing metadata about the request.
+    - report_id (int): ID of the TestReport whose PDF is polled.
+
+    Returns:
+    - JsonResponse: The job status, this poll URL and the download URL.
+    """
+    job = get_object_or_404(TestReportPdfJob, test_report_id=report_id)
+    render_unclaimed(job)
+    return JsonResponse(_report_pdf_status(job))
@@ -0,0 +1,118 @@
+"""
+Denormalized patient and test references of prescribed tests and reports.
+
+A patient's test reports are otherwise reached through four tables
+(report, prescribed test, prescription, appointment). ``PrescribedTest``
+and ``TestReport`` therefore carry an indexed copy of the patient, and
+``TestReport`` a copy of the test, so a patient's report history is a
+single indexed lookup.
+
+:data:`DENORMALIZED_FIELDS` maps each copy to the lookup it is copied from.
+The ``save()`` of :class:`DenormalizedReferencesMixin` refreshes the copies
+with :func:`denormalize`. Rows written with ``bulk_create`` must set them
+themselves. :func:`backfill_denormalized`, run by the
+``backfill_denormalized_references`` command, fills in the rows saved before
+the copies existed (and fixes any written with ``update()``) in batches.
+"""
+
+from django.db import transaction
+
+from medical_tests.constants import DENORMALIZATION_BATCH_SIZE
+
+# The copied fields of each model, with the lookup they are copied from
+DENORMALIZED_FIELDS = {
+    "medical_tests.PrescribedTest": {
+        "patient": "prescription__doctor_appointment__patient_id",
+    },
+    "medical_tests.TestReport": {
+        "patient": "prescribed_test__prescription__doctor_appointment__patient_id",
+        "test": "prescribed_test__test_id",
+    },
+}
+
+
+def denormalize(instance, update_fields=None):
+    """
+    Copy the denormalized references onto a row about to be saved.
+
+    Runs one query, unless ``update_fields`` leaves the parent row alone.
+
+    Args:
+        instance: The ``PrescribedTest`` or ``TestReport`` being saved.
+        update_fields (iterable): The ``update_fields`` of the save, if any.
+
+    Returns:
+        The ``update_fields`` to save with, including the copies when the
+        parent row changes; None for a full save.
+    """
+    lookups = DENORMALIZED_FIELDS[instance._meta.label]
+    parent, _ = next(iter(lookups.values())).split("__", 1)
+    if update_fields is not None:
+        update_fields = set(update_fields)
+        if not update_fields & {parent, f"{parent}_id"}:
+            return update_fields
+        update_fields.update(lookups)
+
+    parent_field = instance._meta.get_field(parent)
+    paths = {name: lookup.split("__", 1)[1] for name, lookup in lookups.items()}
+    values = (
+        parent_field.related_model.objects.filter(
+            pk=getattr(instance, parent_field.attname)
+        )
+        .values(*paths.values())
+        .first()
+    ) or {}
+    for name, path in paths.items():
+        setattr(instance, instance._meta.get_field(name).attname, values.get(path))
+    return update_fields
+
+
+class DenormalizedReferencesMixin:
+    """Model mixin keeping the references of ``DENORMALIZED_FIELDS`` on save."""
+
+    def save(self, *args, **kwargs):
+        update_fields = denormalize(self, kwargs.get("update_fields"))
+        if update_fields is not None:
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
+
+def backfill_denormalized(model, batch_size=DENORMALIZATION_BATCH_SIZE):
+    """
+    Fill in or fix the denormalized references of every row of a model.
+
+    Rows are read in primary key order, ``batch_size`` at a time, with the
+    current and expected references side by side, and only the rows that
+    differ are written back with ``bulk_update``, one transaction per batch.
+
+    Args:
+        model: ``PrescribedTest`` or ``TestReport``.
+        batch_size (int): Rows per batch.
+
+    Returns:
+        int: Number of rows updated.
+    """
+    lookups = DENORMALIZED_FIELDS[model._meta.label]
+    attnames = [model._meta.get_field(name).attname for name in lookups]
+    count = len(attnames)
+    rows = model.objects.order_by("pk").values_list(
+        "pk", *attnames, *lookups.values()
+    )
+
+    updated = 0
+    last_pk = 0
+    while batch := list(rows.filter(pk__gt=last_pk)[:batch_size]):
+        last_pk = batch[-1][0]
+        changed = []
+        for pk, *values in batch:
+            current, expected = values[:count], values[count:]
+            if current != expected:
+                row = model(pk=pk)
+                for attname, value in zip(attnames, expected):
+                    setattr(row, attname, value)
+                changed.append(row)
+        if changed:
+            with transaction.atomic():
+                model.objects.bulk_update(changed, list(lookups))
+            updated += len(changed)
+    return updated
@@ -1,5 +1,5 @@
 from django import forms
-from .models import TestReport
+from .models import Test, TestReport
 
 class TestReportForm(forms.ModelForm):
     """
@@ -36,3 +36,46 @@ class TestReportForm(forms.ModelForm):
         cleaned_data = super().clean()
         # Add any custom validation here if needed
         return cleaned_data
+
+
+class LabListFilterForm(forms.Form):
+    """
+    Filters of the lab technician lists, read from the query string.
+
+    Fields left empty or holding invalid values do not filter the list.
+
+    :param status: Optional status to keep; only offered when ``status_choices``
+        is given.
+    :type status: ChoiceField
+    :param date_from: Optional first date to include.
+    :type date_from: DateField
+    :param date_to: Optional last date to include.
+    :type date_to: DateField
+    :param test: Optional test type to keep.
+    :type test: ModelChoiceField
+    """
+
+    status = forms.ChoiceField(
+        required=False, widget=forms.Select(attrs={"class": "form-select"})
+    )
+    date_from = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+    )
+    date_to = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+    )
+    test = forms.ModelChoiceField(
+        queryset=Test.objects.order_by("name").only("id", "name"),
+        required=False,
+        empty_label="All tests",
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+
+    def __init__(self, *args, status_choices=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if status_choices:
+            self.fields["status"].choices = [("", "All statuses"), *status_choices]
+        else:
+            del self.fields["status"]
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from medical_tests.constants import DENORMALIZATION_BATCH_SIZE
+from medical_tests.denormalization import backfill_denormalized
+from medical_tests.models import PrescribedTest, TestReport
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill in the denormalized patient and test references of prescribed "
+        "tests and test reports, in batches. Run it once after migrating."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DENORMALIZATION_BATCH_SIZE,
+            help="Rows read and updated per batch.",
+        )
+
+    def handle(self, *args, **options):
+        prescribed_tests = backfill_denormalized(
+            PrescribedTest, options["batch_size"]
+        )
+        test_reports = backfill_denormalized(TestReport, options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated {prescribed_tests} prescribed tests and "
+                f"{test_reports} test reports."
+            )
+        )
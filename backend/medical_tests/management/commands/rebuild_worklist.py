@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from medical_tests.worklist import rebuild_worklist
+
+
+class Command(BaseCommand):
+    help = "Recompute the lab worklist status of prescribed tests from their reports."
+
+    def handle(self, *args, **options):
+        reported, reopened = rebuild_worklist()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Marked {reported} prescribed tests reported and "
+                f"{reopened} pending."
+            )
+        )
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from medical_tests.pdf_jobs import process_jobs
+
+
+class Command(BaseCommand):
+    help = "Run the local worker rendering queued test report PDFs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Render every queued PDF, then exit instead of polling.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls of an empty queue.",
+        )
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            processed = process_jobs()
+            self.stdout.write(self.style.SUCCESS(f"Rendered {processed} report PDFs."))
+            return
+
+        self.stdout.write("Rendering report PDFs, press CTRL-C to stop.")
+        try:
+            while True:
+                if not process_jobs(limit=100):
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
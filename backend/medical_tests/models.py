@@ -1,5 +1,10 @@
 from django.db import models
+from django.utils import timezone
 from medicines.models import Prescription
+from users.models import Patient
+from medical_tests.constants import PDF_JOB_STATUS_CHOICES, WORKLIST_STATUS_CHOICES
+from core.general.storage import content_addressed_storage
+from medical_tests.denormalization import DenormalizedReferencesMixin
 
 
 class Test(models.Model):
@@ -28,19 +33,37 @@ class Test(models.Model):
         return self.name
 
 
-class PrescribedTest(models.Model):
+class PrescribedTest(DenormalizedReferencesMixin, models.Model):
     """
     Model representing a prescribed test linked to a prescription.
 
     Attributes:
         prescription (ForeignKey): Reference to the associated prescription.
         test (ForeignKey): Reference to the test that has been prescribed.
+        status (CharField): Worklist state, one of pending, in_progress or
+            reported; kept up to date by ``medical_tests.worklist``.
+        patient (ForeignKey): The patient of the prescription's appointment,
+            copied on save by ``medical_tests.denormalization``.
     """
 
     prescription = models.ForeignKey(
         Prescription, on_delete=models.CASCADE, related_name="prescribed_tests"
     )
     test = models.ForeignKey(Test, on_delete=models.CASCADE)
+    patient = models.ForeignKey(
+        Patient,
+        on_delete=models.CASCADE,
+        related_name="prescribed_tests",
+        null=True,
+        editable=False,
+    )
+    status = models.CharField(
+        max_length=20, choices=WORKLIST_STATUS_CHOICES, default="pending"
+    )
+
+    class Meta:
+        # The worklist reads one status in id (arrival) order
+        indexes = [models.Index(fields=["status", "id"])]
 
     def __str__(self):
         """
@@ -52,7 +75,7 @@ class PrescribedTest(models.Model):
         return f"{self.test.name} for {self.prescription.doctor_appointment.patient}"
 
 
-class TestReport(models.Model):
+class TestReport(DenormalizedReferencesMixin, models.Model):
     """
     Model representing a test report for a prescribed test.
 
@@ -62,14 +85,36 @@ class TestReport(models.Model):
         result (TextField): The result of the test.
         attached_file (FileField): Optional file attachment for the report.
         notes (TextField): Optional notes about the test or its results.
+        patient (ForeignKey): The patient the test was prescribed to, copied
+            on save by ``medical_tests.denormalization``.
+        test (ForeignKey): The test of the prescribed test, copied likewise.
     """
 
     prescribed_test = models.ForeignKey(
         PrescribedTest, on_delete=models.CASCADE, related_name="test_reports"
     )
+    patient = models.ForeignKey(
+        Patient,
+        on_delete=models.CASCADE,
+        related_name="test_reports",
+        null=True,
+        editable=False,
+    )
+    test = models.ForeignKey(
+        Test,
+        on_delete=models.CASCADE,
+        related_name="test_reports",
+        null=True,
+        editable=False,
+    )
     report_date = models.DateField(auto_now_add=True)
     result = models.TextField()
-    attached_file = models.FileField(upload_to="test_reports/", null=True, blank=True)
+    attached_file = models.FileField(
+        upload_to="test_reports/",
+        storage=content_addressed_storage,
+        null=True,
+        blank=True,
+    )
     notes = models.TextField(null=True, blank=True)
 
     def __str__(self):
@@ -80,3 +125,48 @@ class TestReport(models.Model):
         :rtype: str
         """
         return f"Report for {self.prescribed_test.test.name} on {self.report_date}"
+
+
+class TestReportPdfJob(models.Model):
+    """
+    Model representing the background rendering of a test report's PDF.
+
+    One row exists per report. It is queued when the report is saved and
+    picked up by the ``render_report_pdfs`` worker command, which stores the
+    finished PDF in ``pdf_file``.
+
+    Attributes:
+        test_report (OneToOneField): The report to render.
+        status (CharField): One of pending, running, done or failed.
+        attempts (IntegerField): Number of rendering attempts so far.
+        pdf_file (FileField): The rendered PDF once the job is done.
+        error (TextField): The last rendering error, if any.
+        queued_at (DateTimeField): When the job was last queued.
+        started_at (DateTimeField): When a worker last claimed the job.
+        finished_at (DateTimeField): When the job last finished.
+    """
+
+    test_report = models.OneToOneField(
+        TestReport, on_delete=models.CASCADE, related_name="pdf_job"
+    )
+    status = models.CharField(
+        max_length=20, choices=PDF_JOB_STATUS_CHOICES, default="pending"
+    )
+    attempts = models.IntegerField(default=0)
+    pdf_file = models.FileField(upload_to="test_report_pdfs/", null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    queued_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "queued_at"])]
+
+    def __str__(self):
+        """
+        Returns a string representation of the TestReportPdfJob object.
+
+        :return: The report id and job status.
+        :rtype: str
+        """
+        return f"PDF of report {self.test_report_id} ({self.status})"
@@ -0,0 +1,195 @@
+"""
+Database-backed queue rendering test report PDFs in the background.
+
+Saving a :class:`TestReport` queues a :class:`TestReportPdfJob` (see
+``medical_tests.signals``). The ``render_report_pdfs`` management command
+runs a local worker that claims queued jobs one at a time, renders the PDF
+with xhtml2pdf and stores it, so the download view only has to read a file.
+
+Jobs are claimed with a conditional ``UPDATE`` on their status, so several
+workers can share the queue without a broker and without rendering a
+report twice. Jobs left running by a dead worker are reclaimed after
+``PDF_JOB_STALE_AFTER`` seconds. A failed job is queued again for
+``PDF_JOB_RETRY_BACKOFF`` seconds later, doubled after every failure, until
+``PDF_JOB_MAX_ATTEMPTS`` is reached.
+
+When no worker claims a job within ``PDF_JOB_WORKER_TIMEOUT`` seconds,
+:func:`render_unclaimed` lets the download views render it in the request,
+so downloads keep working while the worker is not running.
+"""
+
+import logging
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from xhtml2pdf import pisa
+
+from medical_tests.constants import (
+    PDF_JOB_MAX_ATTEMPTS,
+    PDF_JOB_RETRY_BACKOFF,
+    PDF_JOB_STALE_AFTER,
+    PDF_JOB_WORKER_TIMEOUT,
+)
+from medical_tests.models import TestReportPdfJob
+
+logger = logging.getLogger(__name__)
+
+
+def render_test_report_pdf(report):
+    """
+    Render a test report to PDF.
+
+    :param report: The report to render.
+    :type report: TestReport
+    :return: The PDF document.
+    :rtype: bytes
+    :raises ValueError: If xhtml2pdf fails to render the report.
+    """
+    html = render_to_string("patients/pdf_report_template.html", {"report": report})
+    buffer = BytesIO()
+    pisa_status = pisa.CreatePDF(BytesIO(html.encode("UTF-8")), dest=buffer)
+    if pisa_status.err:
+        raise ValueError(f"Error creating PDF for report {report.pk}")
+    return buffer.getvalue()
+
+
+def enqueue_report_pdf(report):
+    """
+    Queue (or re-queue) the rendering of a report's PDF.
+
+    :param report: The report to render.
+    :type report: TestReport
+    :return: The queued job.
+    :rtype: TestReportPdfJob
+    """
+    job, _ = TestReportPdfJob.objects.update_or_create(
+        test_report=report,
+        defaults={
+            "status": "pending",
+            "attempts": 0,
+            "error": None,
+            "queued_at": timezone.now(),
+        },
+    )
+    return job
+
+
+def _claim(job):
+    """
+    Mark a job as running, unless another worker changed it meanwhile.
+
+    :param job: The job as last read.
+    :type job: TestReportPdfJob
+    :return: Whether the job was claimed; if so it is refreshed.
+    :rtype: bool
+    """
+    claimed = TestReportPdfJob.objects.filter(
+        pk=job.pk, status=job.status, started_at=job.started_at
+    ).update(status="running", started_at=timezone.now(), attempts=F("attempts") + 1)
+    if claimed:
+        job.refresh_from_db()
+    return bool(claimed)
+
+
+def claim_next_job():
+    """
+    Claim the oldest queued job for this worker.
+
+    :return: The claimed job, or None when the queue is empty.
+    :rtype: TestReportPdfJob
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=PDF_JOB_STALE_AFTER)
+    claimable = TestReportPdfJob.objects.filter(
+        # Failed jobs are queued again with a queued_at in the future
+        Q(status="pending", queued_at__lte=now)
+        | Q(status="running", started_at__lt=stale_before)
+    ).order_by("queued_at")
+    for job in claimable[:10]:
+        if _claim(job):
+            return job
+    return None
+
+
+def run_job(job):
+    """
+    Render the PDF of a claimed job and record the outcome.
+
+    Failed jobs are queued again, after a backoff, until
+    ``PDF_JOB_MAX_ATTEMPTS`` is reached.
+
+    :param job: A job claimed through :func:`claim_next_job`.
+    :type job: TestReportPdfJob
+    """
+    report = job.test_report
+    # The report may have been changed (and the job re-queued or claimed
+    # again) meanwhile; only the claim this worker holds may be finished
+    claim = TestReportPdfJob.objects.filter(
+        pk=job.pk, status="running", started_at=job.started_at
+    )
+    try:
+        pdf = render_test_report_pdf(report)
+    except Exception as e:
+        logger.exception("Rendering the PDF of report %s failed", report.pk)
+        now = timezone.now()
+        if job.attempts >= PDF_JOB_MAX_ATTEMPTS:
+            status, queued_at = "failed", job.queued_at
+        else:
+            backoff = PDF_JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            status, queued_at = "pending", now + timedelta(seconds=backoff)
+        claim.update(status=status, queued_at=queued_at, error=str(e), finished_at=now)
+        return
+
+    previous_file = job.pdf_file.name if job.pdf_file else None
+    job.pdf_file.save(f"TestReport_{report.pk}.pdf", ContentFile(pdf), save=False)
+    updated = claim.update(
+        status="done",
+        pdf_file=job.pdf_file.name,
+        error=None,
+        finished_at=timezone.now(),
+    )
+    if not updated:
+        # Superseded by a newer rendering: nothing references this file
+        job.pdf_file.storage.delete(job.pdf_file.name)
+    elif previous_file and previous_file != job.pdf_file.name:
+        job.pdf_file.storage.delete(previous_file)
+
+
+def render_unclaimed(job):
+    """
+    Render a job in this process if no worker has claimed it in time.
+
+    :param job: The job of a report being downloaded.
+    :type job: TestReportPdfJob
+    :return: Whether the job was rendered here; if so it is refreshed.
+    :rtype: bool
+    """
+    waited_since = timezone.now() - timedelta(seconds=PDF_JOB_WORKER_TIMEOUT)
+    if job.status != "pending" or job.queued_at > waited_since or not _claim(job):
+        return False
+    run_job(job)
+    job.refresh_from_db()
+    return True
+
+
+def process_jobs(limit=None):
+    """
+    Run queued jobs until the queue is empty or ``limit`` jobs were run.
+
+    :param limit: Maximum number of jobs to run, or None for no limit.
+    :type limit: int
+    :return: The number of jobs run.
+    :rtype: int
+    """
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
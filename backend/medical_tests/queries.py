@@ -0,0 +1,166 @@
+"""
+Read-side queries for the lab technician lists and the patients' reports.
+
+The prescribed test and test report lists render the test name and the
+patient of every row. The querysets here join those tables once and load
+just the projected columns, and :func:`lab_list_page` filters them and
+returns one keyset page, so a list page costs a fixed number of queries
+however many rows the lists hold.
+"""
+
+from core.general.utils.pagination import keyset_paginate
+from medical_tests.constants import (
+    LAB_LIST_PAGE_SIZE,
+    WORKLIST_STATUS_CHOICES,
+)
+from medical_tests.forms import LabListFilterForm
+from medical_tests.models import PrescribedTest, TestReport
+
+PRESCRIBED_TEST_LIST_FIELDS = (
+    "id",
+    "status",
+    "test__id",
+    "test__name",
+    "prescription__id",
+    "prescription__date_issued",
+    "prescription__doctor_appointment__id",
+    "prescription__doctor_appointment__patient__id",
+    "prescription__doctor_appointment__patient__user__id",
+    "prescription__doctor_appointment__patient__user__name",
+    "prescription__doctor_appointment__doctor__id",
+    "prescription__doctor_appointment__doctor__user__id",
+    "prescription__doctor_appointment__doctor__user__name",
+)
+
+TEST_REPORT_LIST_FIELDS = (
+    "id",
+    "report_date",
+    "result",
+    "notes",
+    "attached_file",
+    "prescribed_test__id",
+    "prescribed_test__test__id",
+    "prescribed_test__test__name",
+    "prescribed_test__prescription__id",
+    "prescribed_test__prescription__doctor_appointment__id",
+    "prescribed_test__prescription__doctor_appointment__patient__id",
+    "prescribed_test__prescription__doctor_appointment__patient__user__id",
+    "prescribed_test__prescription__doctor_appointment__patient__user__name",
+)
+
+
+def prescribed_test_list_queryset():
+    """
+    Prescribed tests projected for the lab technician list.
+
+    Returns:
+        QuerySet: Prescribed tests with the test, patient and doctor joined in.
+    """
+    return PrescribedTest.objects.select_related(
+        "test",
+        "prescription__doctor_appointment__patient__user",
+        "prescription__doctor_appointment__doctor__user",
+    ).only(*PRESCRIBED_TEST_LIST_FIELDS)
+
+
+def test_report_list_queryset():
+    """
+    Test reports projected for the lab technician list.
+
+    Returns:
+        QuerySet: Test reports with the test and patient joined in.
+    """
+    return TestReport.objects.select_related(
+        "prescribed_test__test",
+        "prescribed_test__prescription__doctor_appointment__patient__user",
+    ).only(*TEST_REPORT_LIST_FIELDS)
+
+
+def patient_test_reports(patient):
+    """
+    Test reports of a patient.
+
+    Reads the denormalized ``TestReport.patient`` and ``TestReport.test``
+    references: an indexed lookup with the test joined in, instead of a join
+    through the prescribed test, prescription and appointment.
+
+    Args:
+        patient (Patient): The patient.
+
+    Returns:
+        QuerySet: The patient's test reports, with their tests.
+    """
+    return TestReport.objects.filter(patient_id=patient.id).select_related("test")
+
+
+def lab_list_page(queryset, params, date_field, test_field, status_choices=None):
+    """
+    Filter a lab technician list and return one keyset page of it.
+
+    Args:
+        queryset (QuerySet): The projected rows of the list.
+        params (QueryDict): The query string, holding the filters of
+            :class:`LabListFilterForm` and the ``cursor`` of the page.
+        date_field (str): Date field the date range applies to.
+        test_field (str): Foreign key to ``Test`` the test filter applies to.
+        status_choices (list): Choices of the ``status`` field of the rows;
+            None hides the status filter.
+
+    Returns:
+        tuple: The :class:`KeysetPage` and the bound filter form.
+    """
+    form = LabListFilterForm(params, status_choices=status_choices)
+    # Only the valid fields end up in cleaned_data, so an invalid value
+    # leaves its filter off instead of failing the page
+    form.is_valid()
+    filters = form.cleaned_data
+    if filters.get("status"):
+        queryset = queryset.filter(status=filters["status"])
+    if filters.get("date_from"):
+        queryset = queryset.filter(**{f"{date_field}__gte": filters["date_from"]})
+    if filters.get("date_to"):
+        queryset = queryset.filter(**{f"{date_field}__lte": filters["date_to"]})
+    if filters.get("test"):
+        queryset = queryset.filter(**{test_field: filters["test"]})
+
+    page = keyset_paginate(
+        queryset, cursor=params.get("cursor"), page_size=LAB_LIST_PAGE_SIZE
+    )
+    return page, form
+
+
+def prescribed_test_list_page(params):
+    """
+    One filtered page of the prescribed test list, newest first.
+
+    Args:
+        params (QueryDict): The query string.
+
+    Returns:
+        tuple: The :class:`KeysetPage` and the bound filter form.
+    """
+    return lab_list_page(
+        prescribed_test_list_queryset(),
+        params,
+        date_field="prescription__date_issued",
+        test_field="test",
+        status_choices=WORKLIST_STATUS_CHOICES,
+    )
+
+
+def test_report_list_page(params):
+    """
+    One filtered page of the test report list, newest first.
+
+    Args:
+        params (QueryDict): The query string.
+
+    Returns:
+        tuple: The :class:`KeysetPage` and the bound filter form.
+    """
+    return lab_list_page(
+        test_report_list_queryset(),
+        params,
+        date_field="report_date",
+        test_field="prescribed_test__test",
+    )
@@ -0,0 +1,31 @@
+"""
+Signal handlers queueing test report PDFs for background rendering and
+moving prescribed tests through the lab worklist.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from medical_tests.models import TestReport
+from medical_tests.pdf_jobs import enqueue_report_pdf
+from medical_tests.worklist import mark_reported, reopen_if_unreported
+
+
+@receiver(post_save, sender=TestReport)
+def queue_report_pdf(sender, instance, raw=False, **kwargs):
+    """Queue the PDF of a created or changed report for rendering."""
+    if not raw:
+        enqueue_report_pdf(instance)
+
+
+@receiver(post_save, sender=TestReport)
+def report_prescribed_test(sender, instance, raw=False, **kwargs):
+    """Take the reported test off the worklist."""
+    if not raw:
+        mark_reported(instance.prescribed_test_id)
+
+
+@receiver(post_delete, sender=TestReport)
+def reopen_prescribed_test(sender, instance, **kwargs):
+    """Put the test back on the worklist when its last report is deleted."""
+    reopen_if_unreported(instance.prescribed_test_id)
@@ -1,5 +1,14 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase, Client
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
@@ -181,10 +190,113 @@ class LabTechnicianControllersTest(TestCase):
             response, "/accounts/login/?next=/medical_test/report-list/"
         )
 
+    @patch("medical_tests.queries.LAB_LIST_PAGE_SIZE", 1)
+    def test_prescribed_test_list_keyset_pages(self):
+        """
+        Test that the prescribed test list is paged newest first through the cursor.
+        """
+        newer = PrescribedTest.objects.create(
+            prescription=self.prescription, test=self.test
+        )
+        response = self.client.get(reverse("medical_tests:test-list"))
+        page = response.context["prescribed_tests"]
+        self.assertEqual([p.id for p in page], [newer.id])
+        self.assertContains(response, f"cursor={page.next_cursor}")
+
+        response = self.client.get(
+            reverse("medical_tests:test-list"), {"cursor": page.next_cursor}
+        )
+        page = response.context["prescribed_tests"]
+        self.assertEqual([p.id for p in page], [self.prescribed_test.id])
+        self.assertFalse(page.has_next)
+
+    def test_prescribed_test_list_filters(self):
+        """
+        Test the status, test type and date range filters of the prescribed test list.
+        """
+        xray = Test.objects.create(name="X-Ray")
+        other = PrescribedTest.objects.create(prescription=self.prescription, test=xray)
+        TestReport.objects.create(prescribed_test=other, result="Clear")
+        url = reverse("medical_tests:test-list")
+
+        def listed(params):
+            response = self.client.get(url, params)
+            return [p.id for p in response.context["prescribed_tests"]]
+
+        self.assertEqual(listed({"status": "pending"}), [self.prescribed_test.id])
+        self.assertEqual(listed({"status": "in_progress"}), [])
+        self.assertEqual(listed({"status": "reported"}), [other.id])
+        self.assertEqual(listed({"test": xray.id}), [other.id])
+        today = self.prescription.date_issued
+        self.assertEqual(
+            listed({"date_from": today, "date_to": today}),
+            [other.id, self.prescribed_test.id],
+        )
+        self.assertEqual(listed({"date_from": today + timedelta(days=1)}), [])
+        # Invalid values leave their filter off
+        self.assertEqual(
+            listed({"status": "lost", "date_to": "soon"}),
+            [other.id, self.prescribed_test.id],
+        )
+
+    def test_see_report_list_filters(self):
+        """
+        Test the test type and date range filters of the report list.
+        """
+        report = TestReport.objects.create(
+            prescribed_test=self.prescribed_test, result="Normal"
+        )
+        url = reverse("medical_tests:see-report-list")
+        response = self.client.get(url, {"test": self.test.id})
+        self.assertEqual([r.id for r in response.context["test_reports"]], [report.id])
+        self.assertNotIn("status", response.context["filter_form"].fields)
+
+        response = self.client.get(
+            url, {"date_to": report.report_date - timedelta(days=1)}
+        )
+        self.assertEqual(list(response.context["test_reports"]), [])
+
+    def test_lab_list_query_counts_are_constant(self):
+        """
+        Test that more rows do not add queries to the lab technician lists.
+        """
+        urls = [
+            reverse("medical_tests:test-list"),
+            reverse("medical_tests:see-report-list"),
+        ]
+        TestReport.objects.create(prescribed_test=self.prescribed_test, result="OK")
+        single = []
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            single.append(len(queries))
+
+        for _ in range(5):
+            prescribed_test = PrescribedTest.objects.create(
+                prescription=self.prescription, test=self.test
+            )
+            TestReport.objects.create(prescribed_test=prescribed_test, result="OK")
+        for url, context_name, expected in zip(
+            urls, ["prescribed_tests", "test_reports"], single
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(len(response.context[context_name]), 6)
+            self.assertEqual(len(queries), expected)
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
 
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
 class TestReportViewTests(TestCase):
     """Test suite for views related to viewing and downloading test reports."""
 
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
     def setUp(self):
         """Set up the necessary objects for testing TestReport-related views, including users, patient, doctor, and test report."""
         # Create a user and patient
@@ -249,6 +361,19 @@ class TestReportViewTests(TestCase):
         self.assertTemplateUsed(response, "patients/view_test_report.html")
         self.assertIn(self.test_report, response.context["reports"])
 
+    def test_view_test_report_query_count(self):
+        """Test that the number of queries does not grow with the reports."""
+        for result in ["Normal", "High"]:
+            TestReport.objects.create(
+                prescribed_test=self.prescribed_test, result=result
+            )
+
+        # Session, user, patient, the patient's user, and the reports with
+        # their tests
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("medical_tests:view-test-report"))
+        self.assertContains(response, "Blood Test", count=3)
+
     def test_view_test_report_unauthenticated(self):
         """Test that unauthenticated users are redirected to login."""
         self.client.logout()
@@ -261,6 +386,7 @@ class TestReportViewTests(TestCase):
     def test_download_test_report_authenticated(self):
         """Test that authenticated users can download a test report."""
         self.client.login(username="patient@example.com", password="asdf1234@")
+        call_command("render_report_pdfs", "--once", stdout=StringIO())
         response = self.client.get(
             reverse("medical_tests:download-test-report", args=[self.test_report.id])
         )
@@ -270,6 +396,21 @@ class TestReportViewTests(TestCase):
             'attachment; filename="TestReport_', response["Content-Disposition"]
         )
 
+    def test_download_test_report_pending(self):
+        """Test that a report whose PDF is not rendered yet answers 202 with a poll URL."""
+        response = self.client.get(
+            reverse("medical_tests:download-test-report", args=[self.test_report.id])
+        )
+        self.assertEqual(response.status_code, 202)
+        poll_url = reverse(
+            "medical_tests:test-report-pdf-status", args=[self.test_report.id]
+        )
+        self.assertEqual(response.json()["poll_url"], poll_url)
+        self.assertEqual(self.client.get(poll_url).json()["status"], "pending")
+
+        call_command("render_report_pdfs", "--once", stdout=StringIO())
+        self.assertEqual(self.client.get(poll_url).json()["status"], "done")
+
     def test_download_test_report_unauthenticated(self):
         """Test that unauthenticated users are redirected to login."""
         self.client.logout()
@@ -0,0 +1,141 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from appointments.models import DoctorAppointment
+from medical_tests.models import PrescribedTest, Test, TestReport
+from medical_tests.queries import patient_test_reports
+from medicines.models import Prescription
+from users.models import Doctor, Patient, User
+
+
+class DenormalizedReferencesTests(TestCase):
+    """Tests for the patient and test copied onto prescribed tests and reports."""
+
+    def setUp(self):
+        self.patient = self.create_patient("denorm-pat", "patient@example.com")
+        self.other_patient = self.create_patient("denorm-pat2", "other@example.com")
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(
+                email="doctor@example.com",
+                name="Doctor",
+                role="Doctor",
+                blood_group="A+",
+                date_of_birth="1999-05-10",
+                gender="Male",
+                phone_number="+8801711111111",
+                role_id="denorm-doc",
+                password="asdf1234@",
+            )
+        )
+        self.blood_test = Test.objects.create(name="Blood Test")
+        self.urine_test = Test.objects.create(name="Urine Test")
+
+    def create_patient(self, role_id, email):
+        return Patient.objects.create(
+            user=User.objects.create_user(
+                email=email,
+                name="John Doe",
+                role="Student",
+                blood_group="B+",
+                date_of_birth="1990-05-10",
+                gender="Male",
+                phone_number="+8801987654321",
+                role_id=role_id,
+                password="asdf1234@",
+            )
+        )
+
+    def prescribe(self, patient, test):
+        # One slot per appointment, as a slot holds a single booking
+        slot = DoctorAppointment.objects.count()
+        prescription = Prescription.objects.create(
+            doctor_appointment=DoctorAppointment.objects.create(
+                doctor=self.doctor,
+                patient=patient,
+                appointment_date_time=f"2024-12-15T10:{slot:02d}:00Z",
+            ),
+            diagnosis="Fever",
+        )
+        return PrescribedTest.objects.create(prescription=prescription, test=test)
+
+    def test_save_copies_the_references(self):
+        prescribed_test = self.prescribe(self.patient, self.blood_test)
+        report = TestReport.objects.create(
+            prescribed_test=prescribed_test, result="Normal"
+        )
+
+        self.assertEqual(prescribed_test.patient_id, self.patient.id)
+        report.refresh_from_db()
+        self.assertEqual(report.patient_id, self.patient.id)
+        self.assertEqual(report.test_id, self.blood_test.id)
+
+    def test_update_fields_follow_the_parent(self):
+        report = TestReport.objects.create(
+            prescribed_test=self.prescribe(self.patient, self.blood_test),
+            result="Normal",
+        )
+
+        # The references are only looked up when the prescribed test changes
+        with CaptureQueriesContext(connection) as queries:
+            report.result = "High"
+            report.save(update_fields=["result"])
+        self.assertFalse(
+            any("prescription" in query["sql"] for query in queries.captured_queries)
+        )
+
+        report.prescribed_test = self.prescribe(self.other_patient, self.urine_test)
+        report.save(update_fields=["prescribed_test"])
+        report.refresh_from_db()
+        self.assertEqual(report.patient_id, self.other_patient.id)
+        self.assertEqual(report.test_id, self.urine_test.id)
+
+    def test_backfill_fills_in_old_rows(self):
+        first = self.prescribe(self.patient, self.blood_test)
+        second = self.prescribe(self.other_patient, self.urine_test)
+        TestReport.objects.create(prescribed_test=first, result="Normal")
+        TestReport.objects.create(prescribed_test=second, result="High")
+        # Rows saved before the copies existed
+        PrescribedTest.objects.update(patient=None)
+        TestReport.objects.update(patient=None, test=None)
+
+        out = StringIO()
+        call_command("backfill_denormalized_references", batch_size=1, stdout=out)
+
+        self.assertIn("Updated 2 prescribed tests and 2 test reports.", out.getvalue())
+        self.assertEqual(
+            sorted(PrescribedTest.objects.values_list("id", "patient_id")),
+            [(first.id, self.patient.id), (second.id, self.other_patient.id)],
+        )
+        self.assertEqual(
+            sorted(TestReport.objects.values_list("patient_id", "test_id")),
+            [
+                (self.patient.id, self.blood_test.id),
+                (self.other_patient.id, self.urine_test.id),
+            ],
+        )
+
+        out = StringIO()
+        call_command("backfill_denormalized_references", stdout=out)
+        self.assertIn("Updated 0 prescribed tests and 0 test reports.", out.getvalue())
+
+    def test_patient_test_reports_read_the_copied_patient(self):
+        TestReport.objects.create(
+            prescribed_test=self.prescribe(self.patient, self.blood_test),
+            result="Normal",
+        )
+        TestReport.objects.create(
+            prescribed_test=self.prescribe(self.other_patient, self.blood_test),
+            result="High",
+        )
+
+        reports = patient_test_reports(self.patient)
+        self.assertEqual([report.result for report in reports], ["Normal"])
+        self.assertEqual(reports[0].test, self.blood_test)
+        # Only the test is joined in, not the prescribed test's chain
+        sql = str(reports.query)
+        self.assertNotIn("medical_tests_prescribedtest", sql)
+        self.assertNotIn("medicines_prescription", sql)
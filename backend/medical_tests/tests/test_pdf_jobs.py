@@ -0,0 +1,199 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from appointments.models import DoctorAppointment
+from medical_tests.constants import (
+    PDF_JOB_MAX_ATTEMPTS,
+    PDF_JOB_RETRY_BACKOFF,
+    PDF_JOB_STALE_AFTER,
+    PDF_JOB_WORKER_TIMEOUT,
+)
+from medical_tests.models import PrescribedTest, Test, TestReport, TestReportPdfJob
+from medical_tests.pdf_jobs import (
+    claim_next_job,
+    process_jobs,
+    render_unclaimed,
+    run_job,
+)
+from medicines.models import Prescription
+from users.models import Doctor, Patient, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class TestReportPdfJobTests(TestCase):
+    """Tests for the background test report PDF queue."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        patient = Patient.objects.create(
+            user=User.objects.create_user(
+                email="patient@example.com",
+                name="John Doe",
+                role="Student",
+                blood_group="B+",
+                date_of_birth="1990-05-10",
+                gender="Male",
+                phone_number="+8801987654321",
+                role_id="pdfjob-pat",
+                password="asdf1234@",
+            )
+        )
+        doctor = Doctor.objects.create(
+            user=User.objects.create_user(
+                email="doctor@example.com",
+                name="Doctor",
+                role="Doctor",
+                blood_group="A+",
+                date_of_birth="1999-05-10",
+                gender="Male",
+                phone_number="+8801711111111",
+                role_id="pdfjob-doc",
+                password="asdf1234@",
+            )
+        )
+        prescription = Prescription.objects.create(
+            doctor_appointment=DoctorAppointment.objects.create(
+                doctor=doctor,
+                patient=patient,
+                appointment_date_time="2024-12-15T10:00:00Z",
+            ),
+            diagnosis="Fever",
+        )
+        self.report = TestReport.objects.create(
+            prescribed_test=PrescribedTest.objects.create(
+                prescription=prescription,
+                test=Test.objects.create(name="Blood Test"),
+            ),
+            result="Normal",
+        )
+
+    def test_saving_report_queues_job(self):
+        job = self.report.pdf_job
+        self.assertEqual(job.status, "pending")
+
+        self.assertEqual(process_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        self.assertTrue(job.pdf_file.read().startswith(b"%PDF"))
+
+        self.report.notes = "Repeat in a week"
+        self.report.save()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "pending")
+        self.assertEqual(job.attempts, 0)
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        self.assertIsNotNone(claim_next_job())
+        self.assertIsNone(claim_next_job())
+
+    def test_stale_running_job_is_reclaimed(self):
+        TestReportPdfJob.objects.update(
+            status="running",
+            started_at=timezone.now() - timedelta(seconds=PDF_JOB_STALE_AFTER + 1),
+        )
+        job = claim_next_job()
+        self.assertEqual(job.test_report_id, self.report.id)
+        self.assertEqual(job.attempts, 1)
+
+    def test_failing_job_gives_up_after_max_attempts(self):
+        with patch(
+            "medical_tests.pdf_jobs.render_test_report_pdf",
+            side_effect=ValueError("broken template"),
+        ):
+            for attempt in range(1, PDF_JOB_MAX_ATTEMPTS + 1):
+                self.assertEqual(process_jobs(), 1)
+                job = TestReportPdfJob.objects.get(test_report=self.report)
+                self.assertEqual(job.attempts, attempt)
+                # Not retried before the backoff has passed
+                self.assertEqual(process_jobs(), 0)
+                TestReportPdfJob.objects.update(queued_at=timezone.now())
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.error, "broken template")
+        self.assertEqual(process_jobs(), 0)
+
+    def test_retry_backoff_doubles(self):
+        with patch(
+            "medical_tests.pdf_jobs.render_test_report_pdf",
+            side_effect=ValueError("broken template"),
+        ):
+            backoffs = []
+            for _ in range(2):
+                start = timezone.now()
+                process_jobs()
+                job = TestReportPdfJob.objects.get(test_report=self.report)
+                backoffs.append(round((job.queued_at - start).total_seconds()))
+                TestReportPdfJob.objects.update(queued_at=timezone.now())
+        self.assertEqual(backoffs, [PDF_JOB_RETRY_BACKOFF, 2 * PDF_JOB_RETRY_BACKOFF])
+
+    def test_superseded_rendering_is_deleted(self):
+        job = claim_next_job()
+        # The report changes while the PDF is being rendered
+        self.report.save()
+        run_job(job)
+
+        self.assertFalse(job.pdf_file.storage.exists(job.pdf_file.name))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "pending")
+        self.assertFalse(job.pdf_file)
+
+    def test_rerendering_deletes_the_previous_file(self):
+        process_jobs()
+        previous = TestReportPdfJob.objects.get(test_report=self.report).pdf_file
+        self.report.save()
+        process_jobs()
+
+        job = TestReportPdfJob.objects.get(test_report=self.report)
+        self.assertNotEqual(job.pdf_file.name, previous.name)
+        self.assertTrue(job.pdf_file.storage.exists(job.pdf_file.name))
+        self.assertFalse(previous.storage.exists(previous.name))
+
+    def test_unclaimed_job_is_rendered_in_the_request(self):
+        job = self.report.pdf_job
+        self.assertFalse(render_unclaimed(job))
+
+        waited = timezone.now() - timedelta(seconds=PDF_JOB_WORKER_TIMEOUT + 1)
+        TestReportPdfJob.objects.update(queued_at=waited)
+        job.refresh_from_db()
+        self.assertTrue(render_unclaimed(job))
+        self.assertEqual(job.status, "done")
+
+
+    def test_poll_renders_a_job_no_worker_claimed(self):
+        # No render_report_pdfs worker is running
+        self.client.force_login(self.report.patient.user)
+        poll_url = reverse(
+            "medical_tests:test-report-pdf-status", args=[self.report.id]
+        )
+        self.assertEqual(self.client.get(poll_url).json()["status"], "pending")
+
+        waited = timezone.now() - timedelta(seconds=PDF_JOB_WORKER_TIMEOUT + 1)
+        TestReportPdfJob.objects.update(queued_at=waited)
+        self.assertEqual(self.client.get(poll_url).json()["status"], "done")
+        response = self.client.get(
+            reverse("medical_tests:download-test-report", args=[self.report.id])
+        )
+        self.assertEqual(response["content-type"], "application/pdf")
+
+    def test_download_requeues_a_failed_job(self):
+        TestReportPdfJob.objects.update(status="failed", attempts=3, error="broken")
+        self.client.force_login(self.report.patient.user)
+
+        response = self.client.get(
+            reverse("medical_tests:download-test-report", args=[self.report.id])
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], "pending")
+        job = TestReportPdfJob.objects.get(test_report=self.report)
+        self.assertEqual((job.attempts, job.error), (0, None))
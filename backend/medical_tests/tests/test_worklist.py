@@ -0,0 +1,150 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from appointments.models import DoctorAppointment
+from medical_tests.models import PrescribedTest, Test, TestReport
+from medical_tests.worklist import pending_worklist
+from medicines.models import Prescription
+from users.models import Doctor, LabTechnician, Patient, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class LabWorklistTests(TestCase):
+    """Tests for the worklist state of prescribed tests."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(
+                email="patient@example.com",
+                name="John Doe",
+                role="Student",
+                blood_group="B+",
+                date_of_birth="1990-05-10",
+                gender="Male",
+                phone_number="+8801987654321",
+                role_id="worklist-pat",
+                password="asdf1234@",
+            )
+        )
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(
+                email="doctor@example.com",
+                name="Doctor",
+                role="Doctor",
+                blood_group="A+",
+                date_of_birth="1999-05-10",
+                gender="Male",
+                phone_number="+8801711111111",
+                role_id="worklist-doc",
+                password="asdf1234@",
+            )
+        )
+        self.technician_user = User.objects.create_user(
+            email="labt@example.com",
+            name="Lab Technician",
+            role="Lab_technician",
+            blood_group="A+",
+            date_of_birth="2000-04-04",
+            gender="Male",
+            phone_number="+8801722222222",
+            role_id="worklist-lab",
+            password="asdf1234@",
+        )
+        LabTechnician.objects.create(user=self.technician_user)
+        self.test = Test.objects.create(name="Blood Test")
+
+    def prescribe(self, is_emergency=False):
+        # One slot per appointment, as a slot holds a single booking
+        slot = DoctorAppointment.objects.count()
+        prescription = Prescription.objects.create(
+            doctor_appointment=DoctorAppointment.objects.create(
+                doctor=self.doctor,
+                patient=self.patient,
+                appointment_date_time=f"2024-12-15T10:{slot:02d}:00Z",
+                is_emergency=is_emergency,
+            ),
+            diagnosis="Fever",
+        )
+        return PrescribedTest.objects.create(prescription=prescription, test=self.test)
+
+    def test_report_form_moves_test_through_the_worklist(self):
+        prescribed_test = self.prescribe()
+        self.assertEqual(prescribed_test.status, "pending")
+        self.client.force_login(self.technician_user)
+        url = reverse("medical_tests:create-test-report", args=[prescribed_test.id])
+
+        self.client.get(url)
+        prescribed_test.refresh_from_db()
+        self.assertEqual(prescribed_test.status, "in_progress")
+
+        self.client.post(url, {"result": "Normal"})
+        prescribed_test.refresh_from_db()
+        self.assertEqual(prescribed_test.status, "reported")
+
+        # Opening the form again does not reopen a reported test
+        self.client.get(url)
+        prescribed_test.refresh_from_db()
+        self.assertEqual(prescribed_test.status, "reported")
+
+    def test_deleting_last_report_reopens_test(self):
+        prescribed_test = self.prescribe()
+        first = TestReport.objects.create(prescribed_test=prescribed_test, result="A")
+        second = TestReport.objects.create(prescribed_test=prescribed_test, result="B")
+
+        first.delete()
+        prescribed_test.refresh_from_db()
+        self.assertEqual(prescribed_test.status, "reported")
+        second.delete()
+        prescribed_test.refresh_from_db()
+        self.assertEqual(prescribed_test.status, "pending")
+
+    def test_pending_worklist_puts_emergencies_first_then_fifo(self):
+        first = self.prescribe()
+        emergency = self.prescribe(is_emergency=True)
+        second = self.prescribe()
+        TestReport.objects.create(prescribed_test=self.prescribe(), result="Normal")
+        started = self.prescribe(is_emergency=True)
+        started.status = "in_progress"
+        started.save()
+
+        with self.assertNumQueries(1):
+            worklist = list(pending_worklist())
+            [p.prescription.doctor_appointment.patient.user.name for p in worklist]
+        self.assertEqual(worklist, [emergency, first, second])
+
+    def test_landing_page_lists_pending_tests(self):
+        pending = self.prescribe(is_emergency=True)
+        TestReport.objects.create(prescribed_test=self.prescribe(), result="Normal")
+        self.client.force_login(self.technician_user)
+
+        response = self.client.get(reverse("appointments:appointment-list"))
+        self.assertEqual(list(response.context["worklist"]), [pending])
+        self.assertContains(response, "Emergency")
+
+    def test_rebuild_worklist_command(self):
+        reported = self.prescribe()
+        TestReport.objects.create(prescribed_test=reported, result="Normal")
+        stale = self.prescribe()
+        PrescribedTest.objects.filter(pk=reported.pk).update(status="pending")
+        PrescribedTest.objects.filter(pk=stale.pk).update(status="reported")
+
+        out = StringIO()
+        call_command("rebuild_worklist", stdout=out)
+        self.assertIn(
+            "Marked 1 prescribed tests reported and 1 pending.", out.getvalue()
+        )
+        reported.refresh_from_db()
+        stale.refresh_from_db()
+        self.assertEqual((reported.status, stale.status), ("reported", "pending"))
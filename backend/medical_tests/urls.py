@@ -14,4 +14,9 @@ urlpatterns = [
         download_test_report,
         name="download-test-report",
     ),
+    path(
+        "Download_test_report/<int:report_id>/status/",
+        test_report_pdf_status,
+        name="test-report-pdf-status",
+    ),
 ]
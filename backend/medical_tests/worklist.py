@@ -0,0 +1,106 @@
+"""
+Lab worklist of prescribed tests.
+
+Every prescribed test carries a worklist ``status``:
+
+- ``pending``: prescribed and waiting for the lab;
+- ``in_progress``: a lab technician opened its report form;
+- ``reported``: at least one test report exists.
+
+The transitions are conditional ``UPDATE`` statements, so they never
+overwrite a later state written concurrently. Saving a test report marks
+its prescribed test reported and deleting the last report puts it back to
+pending (see ``medical_tests.signals``). The ``(status, id)`` index serves
+:func:`pending_worklist` without scanning the tests reported long ago.
+"""
+
+from django.db.models import Exists, OuterRef
+
+from medical_tests.models import PrescribedTest, TestReport
+
+WORKLIST_FIELDS = (
+    "id",
+    "status",
+    "test__id",
+    "test__name",
+    "prescription__id",
+    "prescription__date_issued",
+    "prescription__doctor_appointment__id",
+    "prescription__doctor_appointment__is_emergency",
+    "prescription__doctor_appointment__patient__id",
+    "prescription__doctor_appointment__patient__user__id",
+    "prescription__doctor_appointment__patient__user__name",
+)
+
+
+def pending_worklist():
+    """
+    Pending prescribed tests, emergencies first, then in arrival order.
+
+    Returns:
+        QuerySet: The pending prescribed tests with their test, appointment
+            and patient joined in.
+    """
+    return (
+        PrescribedTest.objects.filter(status="pending")
+        .select_related("test", "prescription__doctor_appointment__patient__user")
+        .only(*WORKLIST_FIELDS)
+        .order_by("-prescription__doctor_appointment__is_emergency", "id")
+    )
+
+
+def start_prescribed_test(prescribed_test):
+    """
+    Move a pending prescribed test to in progress.
+
+    Args:
+        prescribed_test (PrescribedTest): The test a technician starts on.
+
+    Returns:
+        bool: Whether the test was pending.
+    """
+    started = PrescribedTest.objects.filter(
+        pk=prescribed_test.pk, status="pending"
+    ).update(status="in_progress")
+    if started:
+        prescribed_test.status = "in_progress"
+    return bool(started)
+
+
+def mark_reported(prescribed_test_id):
+    """Mark a prescribed test reported."""
+    PrescribedTest.objects.filter(pk=prescribed_test_id).exclude(
+        status="reported"
+    ).update(status="reported")
+
+
+def reopen_if_unreported(prescribed_test_id):
+    """Put a reported prescribed test back to pending once it has no report."""
+    PrescribedTest.objects.filter(pk=prescribed_test_id, status="reported").exclude(
+        Exists(TestReport.objects.filter(prescribed_test=OuterRef("pk")))
+    ).update(status="pending")
+
+
+def rebuild_worklist():
+    """
+    Recompute the reported state of every prescribed test from its reports.
+
+    Used after rows were written without signals (bulk loads, or tests
+    prescribed before the worklist existed). Tests in progress without a
+    report are left as they are.
+
+    Returns:
+        tuple: Numbers of tests marked reported and put back to pending.
+    """
+    has_report = Exists(TestReport.objects.filter(prescribed_test=OuterRef("pk")))
+    reported = (
+        PrescribedTest.objects.filter(has_report)
+        .exclude(status="reported")
+        .update(status="reported")
+    )
+    reopened = (
+        PrescribedTest.objects.filter(status="reported")
+        .exclude(has_report)
+        .update(status="pending")
+    )
+    return reported, reopened
@@ -7,3 +7,7 @@ MEDICINE_FREQUENCY_CHOICES = [
     ("Morning + Night", "Morning + Night"),
     ("Morning + Noon+ Night", "Morning + Noon + Night"),
 ]
+
+PRESCRIPTION_LIST_PAGE_SIZE = 50
+
+TYPEAHEAD_LIMIT = 20
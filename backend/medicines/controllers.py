@@ -1,35 +1,64 @@
 from io import BytesIO
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from django.http import HttpResponse, HttpResponseForbidden
+from django.db import transaction
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.shortcuts import redirect, render, get_object_or_404
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+from medicines.dispensing import StockChanged, dispense_prescription
 from medicines.forms import MedicineForm
 from .models import Prescription, PrescribedMedicine, Medicine
 from medical_tests.models import PrescribedTest, Test
 from appointments.models import DoctorAppointment
+from appointments.triage import triage_board
 from users.models import Doctor, Patient
+from users.counters import adjust_doctor_counters
+from users.search import search_patient_ids
 from appointments.controllers import calculate_detailed_age
-from medicines.constants import MEDICINE_FREQUENCY_CHOICES
+from medicines.constants import (
+    MEDICINE_FREQUENCY_CHOICES,
+    PRESCRIPTION_LIST_PAGE_SIZE,
+    TYPEAHEAD_LIMIT,
+)
+from medicines.pdf_cache import get_or_render_pdf, latest_prescription_pdf
+from medicines.queries import prescription_list_queryset
+from medicines.typeahead import medicine_index, test_index
+from core.general.utils.pagination import keyset_paginate
 from datetime import datetime, timedelta
 from django.utils import timezone
 
 
+# What the PDF prints of each dispensed line. Stock levels are left out:
+# they change with every dispense and would defeat the PDF cache.
+PDF_MEDICINE_FIELDS = (
+    "medicine_name",
+    "required_quantity",
+    "frequency",
+    "instructions",
+)
+
+
 # StoreKeeper Part Start
 @login_required
 def all_prescriptions(request):
     """
-    all prescriptions
-    :param request:
-    :return: list of all prescriptions
+    all prescriptions, newest first, one keyset page at a time
+    :param request: the ``cursor`` query parameter selects the page
+    :return: one page of prescriptions
     """
     if request.user.role != "Storekeeper":
         return HttpResponseForbidden("You are not authorized to view this page.")
-    prescriptions = Prescription.objects.all()
+    prescriptions = keyset_paginate(
+        prescription_list_queryset(),
+        cursor=request.GET.get("cursor"),
+        page_size=PRESCRIPTION_LIST_PAGE_SIZE,
+    )
     context = {
         "prescriptions": prescriptions,
     }
@@ -39,19 +68,29 @@ def all_prescriptions(request):
 @login_required
 def search_prescriptions(request):
     """
-    Allows lab technicians to search for prescriptions by patient name.
+    Allows storekeepers to search for prescriptions by patient name.
+
+    The name is matched through the patient-name trigram index, so prefixes
+    and small typos still find the patient. Results are keyset paginated;
+    the search form posts the name and the page links repeat it as a query
+    parameter.
     :param request:
-    :return: list of all prescriptions
+    :return: one page of matching prescriptions
     """
     if request.user.role != "Storekeeper":
         return HttpResponseForbidden("You are not authorized to view this page.")
-    if request.method == "POST":
-        patient_name = request.POST.get("patient_name")
-        prescriptions = Prescription.objects.filter(
-            Q(doctor_appointment__patient__user__name__icontains=patient_name)
+    patient_name = request.POST.get("patient_name", request.GET.get("patient_name"))
+    if patient_name is not None:
+        prescriptions = keyset_paginate(
+            prescription_list_queryset().filter(
+                doctor_appointment__patient__in=search_patient_ids(patient_name)
+            ),
+            cursor=request.GET.get("cursor"),
+            page_size=PRESCRIPTION_LIST_PAGE_SIZE,
         )
         context = {
             "prescriptions": prescriptions,
+            "patient_name": patient_name,
             "user": request.user,
         }
         return render(request, "storekeeper/prescription_list.html", context)
@@ -102,24 +141,20 @@ def prescription_details(request, prescription_id):
     return render(request, "storekeeper/prescribed_medicine_details.html", context)
 
 
-def generate_pdf(medicines_info, doctor_name, patient_name, prescription_id):
+def render_prescription_pdf(medicines_info, doctor_name, patient_name, prescription_id):
     """
-    Generates a PDF report of dispensed medicines.
-
+    Lays out the PDF report of dispensed medicines.
 
     Args:
-        medicines_info (list): A list of dictionaries containing medicine information.
+        medicines_info (list): A dictionary per dispensed medicine, with the
+            ``PDF_MEDICINE_FIELDS`` keys.
         doctor_name (str): The name of the doctor who issued the prescription.
         patient_name (str): The name of the patient.
         prescription_id (int): The ID of the prescription.
 
     Returns:
-        HttpResponse: An HTTP response containing the generated PDF file.
+        bytes: The rendered PDF document.
     """
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = (
-        f'attachment; filename="prescription_{prescription_id}.pdf"'
-    )
     buffer = BytesIO()
 
     doc = SimpleDocTemplate(buffer, pagesize=letter)
@@ -149,20 +184,16 @@ def generate_pdf(medicines_info, doctor_name, patient_name, prescription_id):
     # Add dispensed medicines details
 
     # Create table data for medicines
-    table_data = [
-        ["Medicine Name", "Required Quantity", "In Stock", "Frequency", "Instructions"]
-    ]
+    table_data = [["Medicine Name", "Required Quantity", "Frequency", "Instructions"]]
     for info in medicines_info:
-        if info["is_stock_sufficient"]:
-            table_data.append(
-                [
-                    info["medicine_name"],
-                    info["required_quantity"],
-                    info["in_stock"],
-                    info["frequency"],
-                    info["instructions"],
-                ]
-            )
+        table_data.append(
+            [
+                info["medicine_name"],
+                info["required_quantity"],
+                info["frequency"],
+                info["instructions"],
+            ]
+        )
 
     # Create table with custom style
     table = Table(table_data)
@@ -185,48 +216,120 @@ def generate_pdf(medicines_info, doctor_name, patient_name, prescription_id):
 
     pdf = buffer.getvalue()
     buffer.close()
-    response.write(pdf)
+    return pdf
+
+
+def generate_pdf(medicines_info, doctor_name, patient_name, prescription_id):
+    """
+    Generates a PDF report of dispensed medicines.
+
+    The PDF is served from the prescription PDF cache and only laid out when
+    nothing identical has been rendered before. The response carries an
+    ``ETag`` (the content hash) and ``Last-Modified`` header, and the file
+    stays available through ``download_prescription_pdf``.
+
+    Args:
+        medicines_info (list): A list of dictionaries containing medicine information.
+        doctor_name (str): The name of the doctor who issued the prescription.
+        patient_name (str): The name of the patient.
+        prescription_id (int): The ID of the prescription.
+
+    Returns:
+        HttpResponse: An HTTP response containing the generated PDF file.
+    """
+    dispensed = [
+        {key: info[key] for key in PDF_MEDICINE_FIELDS}
+        for info in medicines_info
+        if info["is_stock_sufficient"]
+    ]
+    name, digest = get_or_render_pdf(
+        prescription_id,
+        [doctor_name, patient_name, dispensed],
+        lambda: render_prescription_pdf(
+            dispensed, doctor_name, patient_name, prescription_id
+        ),
+    )
+    return serve_cached_pdf(None, name, digest, prescription_id)
+
+
+def serve_cached_pdf(request, name, digest, prescription_id):
+    """
+    Serve a cached prescription PDF with ``ETag``/``Last-Modified`` headers.
+
+    Args:
+        request (HttpRequest): Request whose conditional headers are honoured,
+            or None.
+        name (str): Storage name of the cached PDF.
+        digest (str): Content hash of the PDF, used as the ETag.
+        prescription_id (int): The ID of the prescription.
+
+    Returns:
+        HttpResponse: The PDF, or a 304 response if the client's copy is current.
+    """
+    etag = quote_etag(digest)
+    last_modified = default_storage.get_modified_time(name).timestamp()
+    if request is not None:
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+
+    with default_storage.open(name, "rb") as pdf:
+        response = HttpResponse(pdf.read(), content_type="application/pdf")
+    response["Content-Disposition"] = (
+        f'attachment; filename="prescription_{prescription_id}.pdf"'
+    )
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
     return response
 
 
+@login_required
+def download_prescription_pdf(request, prescription_id):
+    """
+    Download the PDF produced when the prescription was last dispensed.
+
+    The file is read from the prescription PDF cache without laying it out
+    again; conditional requests are answered with 304.
+    :param: request, int
+    :return: pdf
+    """
+    if request.user.role != "Storekeeper":
+        return HttpResponseForbidden("You are not authorized to view this page.")
+    cached = latest_prescription_pdf(prescription_id)
+    if cached is None:
+        raise Http404("This prescription has not been dispensed yet.")
+    name, digest = cached
+    return serve_cached_pdf(request, name, digest, prescription_id)
+
+
 @login_required
 def dispense_medicines(request, prescription_id):
     """
     Dispense medicines to patient
+
+    All prescribed medicines are dispensed in one transaction through
+    :func:`medicines.dispensing.dispense_prescription`; lines without enough
+    stock are skipped.
     :param: request, int
     :return: html
     """
     if request.user.role != "Storekeeper":
         return HttpResponseForbidden("You are not authorized to view this page.")
     if request.method == "POST":
-        prescription = get_object_or_404(Prescription, id=prescription_id)
-        prescribed_medicines = PrescribedMedicine.objects.filter(
-            prescription=prescription
+        prescription = get_object_or_404(
+            Prescription.objects.select_related(
+                "doctor_appointment__doctor__user", "doctor_appointment__patient__user"
+            ),
+            id=prescription_id,
         )
-        medicines_info = []
-        for prescribed_medicine in prescribed_medicines:
-            medicine = prescribed_medicine.medicine
-            required_quantity = (
-                prescribed_medicine.duration
-            )  # Assuming the duration is the quantity needed
-            in_stock = medicine.stock_quantity
-
-            # Check if the stock is sufficient
-            is_stock_sufficient = in_stock >= required_quantity
-
-            if is_stock_sufficient:
-                medicine.stock_quantity -= required_quantity
-                medicine.save()
-                medicines_info.append(
-                    {
-                        "medicine_name": medicine.name,
-                        "required_quantity": required_quantity,
-                        "in_stock": in_stock,
-                        "is_stock_sufficient": is_stock_sufficient,
-                        "frequency": prescribed_medicine.dosage_frequency,
-                        "instructions": prescribed_medicine.instructions,
-                    }
-                )
+        try:
+            outcomes = dispense_prescription(prescription)
+        except StockChanged:
+            messages.error(request, "Stock changed while dispensing, please try again.")
+            return redirect("medicines:prescription-details", prescription_id)
+        medicines_info = [info for info in outcomes if info["is_stock_sufficient"]]
 
         if medicines_info:
             messages.success(request, f"dispensed successfully.")
@@ -280,7 +383,7 @@ def get_information_for_prescription(request, appointment_id):
 
     Returns:
         HttpResponseForbidden: If the user is not a doctor.
-        HttpResponse: Rendered prescription form with patient, doctor, tests, and medicines.
+        HttpResponse: Rendered prescription form with patient and doctor details.
     """
     if request.user.role != "Doctor":
         return HttpResponseForbidden("You are not authorized to view this page.")
@@ -293,9 +396,7 @@ def get_information_for_prescription(request, appointment_id):
     # Calculate the patient's detailed age
     age = calculate_detailed_age(patient.user.date_of_birth, timezone.now().date())
 
-    # Fetch all available tests, medicines, and frequency choices
-    tests = Test.objects.all()
-    medicines = Medicine.objects.all()
+    # Medicines and tests are looked up through the typeahead endpoints
     frequencies = [choice[0] for choice in MEDICINE_FREQUENCY_CHOICES]
 
     # Prepare context for rendering the template
@@ -304,18 +405,92 @@ def get_information_for_prescription(request, appointment_id):
         "doctor": doctor,
         "patient": patient,
         "age": age,
-        "medicines": medicines,
-        "tests": tests,
         "frequencies": frequencies,
     }
     return render(request, "doctors/prescribe_patient.htm", context)
 
 
+def catalog_typeahead(request, index):
+    """
+    Answer a typeahead lookup against one of the in-memory catalog indexes.
+
+    Args:
+        request: The HTTP request object; ``q`` holds the typed text and
+            ``limit`` optionally caps the number of results.
+        index (PrefixIndex): The catalog index to search.
+
+    Returns:
+        HttpResponseForbidden: If the user is not a doctor.
+        JsonResponse: ``{"results": [...]}`` with the matching entries.
+    """
+    if request.user.role != "Doctor":
+        return HttpResponseForbidden("You are not authorized to view this page.")
+    try:
+        limit = min(int(request.GET.get("limit", TYPEAHEAD_LIMIT)), TYPEAHEAD_LIMIT)
+    except ValueError:
+        limit = TYPEAHEAD_LIMIT
+    results = index.search(request.GET.get("q", ""), limit=limit)
+    return JsonResponse({"results": results})
+
+
+@login_required
+def medicine_typeahead(request):
+    """
+    Look up medicines by name, generic name or strength prefix.
+
+    Args:
+        request: The HTTP request object.
+
+    Returns:
+        JsonResponse: The matching medicines.
+    """
+    return catalog_typeahead(request, medicine_index)
+
+
+@login_required
+def test_typeahead(request):
+    """
+    Look up medical tests by name prefix.
+
+    Args:
+        request: The HTTP request object.
+
+    Returns:
+        JsonResponse: The matching tests.
+    """
+    return catalog_typeahead(request, test_index)
+
+
+def resolve_ids(model, ids):
+    """
+    Fetch the objects of ``model`` for the given ids in a single query.
+
+    Args:
+        model: The model class to look the ids up in.
+        ids (list): Primary keys as submitted by the form.
+
+    Returns:
+        tuple: A dictionary of the found objects keyed by integer id and the
+            list of submitted ids that are malformed or do not exist.
+    """
+    valid_ids = {int(pk) for pk in ids if str(pk).isdigit()}
+    objects = model.objects.in_bulk(valid_ids) if valid_ids else {}
+    invalid = [
+        str(pk) for pk in ids if not str(pk).isdigit() or int(pk) not in objects
+    ]
+    return objects, invalid
+
+
 @login_required
 def save_prescription(request, appointment_id):
     """
     Save a prescription along with prescribed tests and medicines.
 
+    All test and medicine ids are resolved before anything is written and
+    invalid ones are reported together. The prescription, its lines and the
+    appointment update are then written in a single transaction, so a
+    failure never leaves a half-written prescription behind.
+
     Args:
         request: The HTTP request object containing form data.
         appointment_id: The ID of the appointment.
@@ -344,65 +519,85 @@ def save_prescription(request, appointment_id):
     ).strftime("%Y-%m-%d")
     is_referred = bool(referral)
 
-    # Create a Prescription instance
-    try:
-        prescription = Prescription.objects.create(
-            doctor_appointment=appointment,
-            complains=complains,
-            diagnosis=diagnosis,
-            vitals=vital_signs,
-            referrals=referral,
-            next_checkup=next_checkup,
-            is_referred=is_referred,
+    # Resolve every prescribed test and medicine up front, one query per model
+    test_ids = request.POST.getlist("tests")
+    medicine_ids = request.POST.getlist("medicines")
+    durations = request.POST.getlist("durations")
+    instructions = request.POST.getlist("instructions")
+    frequencies = request.POST.getlist("frequencies")
+
+    tests, invalid_tests = resolve_ids(Test, test_ids)
+    medicines, invalid_medicines = resolve_ids(Medicine, medicine_ids)
+    errors = []
+    if invalid_tests:
+        errors.append(f"No Test matches the given ids: {', '.join(invalid_tests)}.")
+    if invalid_medicines:
+        errors.append(
+            f"No Medicine matches the given ids: {', '.join(invalid_medicines)}."
         )
-    except Exception as e:
-        messages.error(request, f"An error occurred: {str(e)}")
+    if not len(medicine_ids) == len(durations) == len(instructions) == len(frequencies):
+        errors.append("Every medicine needs a duration, instruction and frequency.")
+    if errors:
+        messages.error(request, f"An error occurred: {' '.join(errors)}")
         return redirect(
             "medicines:get-information-for-prescription", appointment_id=appointment.id
         )
 
-    # Save prescribed tests
-    tests = request.POST.getlist("tests")
-    for test_id in tests:
-        try:
-            test = get_object_or_404(Test, pk=test_id)
-            PrescribedTest.objects.create(prescription=prescription, test=test)
-        except Exception as e:
-            messages.error(request, f"An error occurred: {str(e)}")
-            return redirect(
-                "medicines:get-information-for-prescription",
-                appointment_id=appointment.id,
+    # Write the prescription and all its lines as one unit
+    try:
+        with transaction.atomic():
+            prescription = Prescription.objects.create(
+                doctor_appointment=appointment,
+                complains=complains,
+                diagnosis=diagnosis,
+                vitals=vital_signs,
+                referrals=referral,
+                next_checkup=next_checkup,
+                is_referred=is_referred,
             )
-
-    # Save prescribed medicines
-    medicines = request.POST.getlist("medicines")
-    durations = request.POST.getlist("durations")
-    instructions = request.POST.getlist("instructions")
-    frequencies = request.POST.getlist("frequencies")
-
-    for index, medicine_id in enumerate(medicines):
-        try:
-            medicine = get_object_or_404(Medicine, pk=medicine_id)
-            PrescribedMedicine.objects.create(
-                prescription=prescription,
-                medicine=medicine,
-                duration=durations[index],
-                instructions=instructions[index],
-                dosage_frequency=frequencies[index],
+            PrescribedTest.objects.bulk_create(
+                [
+                    PrescribedTest(
+                        prescription=prescription,
+                        test=tests[int(test_id)],
+                        # bulk_create skips the save() copying the patient
+                        patient_id=appointment.patient_id,
+                    )
+                    for test_id in test_ids
+                ]
             )
-        except Exception as e:
-            messages.error(request, f"An error occurred: {str(e)}")
-            return redirect(
-                "medicines:get-information-for-prescription",
-                appointment_id=appointment.id,
+            PrescribedMedicine.objects.bulk_create(
+                [
+                    PrescribedMedicine(
+                        prescription=prescription,
+                        medicine=medicines[int(medicine_id)],
+                        duration=int(duration),
+                        instructions=instruction,
+                        dosage_frequency=frequency,
+                    )
+                    for medicine_id, duration, instruction, frequency in zip(
+                        medicine_ids, durations, instructions, frequencies
+                    )
+                ]
             )
 
-    # Update appointment and doctor stats
-    appointment.status = "completed"
-    appointment.save()
-    appointment.doctor.no_of_appointments -= 1
-    appointment.doctor.no_of_prescriptions += 1
-    appointment.doctor.save()
+            # Update appointment and doctor stats. Only the first prescription
+            # completes the appointment and takes it off the scheduled count.
+            completed = DoctorAppointment.objects.filter(
+                pk=appointment.pk, status="scheduled"
+            ).update(status="completed")
+            if completed:
+                appointment.status = "completed"
+                # update() sends no post_save to drop it from the triage queue
+                triage_board.update(appointment)
+            adjust_doctor_counters(
+                appointment.doctor_id, appointments=-completed, prescriptions=1
+            )
+    except Exception as e:
+        messages.error(request, f"An error occurred: {str(e)}")
+        return redirect(
+            "medicines:get-information-for-prescription", appointment_id=appointment.id
+        )
 
     messages.success(
         request, f"Prescription for {appointment.patient.user.name} saved successfully."
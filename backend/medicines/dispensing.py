@@ -0,0 +1,146 @@
+"""
+Dispensing engine for prescriptions.
+
+This module decrements medicine stock for a whole prescription inside a
+single transaction. Stock is only taken where it suffices, using a
+conditional ``F()`` update so concurrent storekeepers can never drive the
+stock negative or lose each other's updates.
+
+The number of queries is constant regardless of how many medicines a
+prescription contains:
+
+    1. Read the prescribed lines together with their medicines
+       (rows are locked with ``SELECT ... FOR UPDATE`` where supported).
+    2. Apply every decrement in one conditional ``UPDATE``.
+
+If the ``UPDATE`` touches fewer rows than planned (stock was taken by a
+concurrent transaction between the two queries on a backend without row
+locks) the attempt is rolled back and replanned, up to
+``MAX_DISPENSE_ATTEMPTS`` times.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+
+from medicines.models import Medicine, PrescribedMedicine
+
+MAX_DISPENSE_ATTEMPTS = 3
+
+
+class StockChanged(Exception):
+    """
+    Raised inside a dispensing attempt when the stock changed concurrently
+    between planning and applying the decrements.
+    """
+
+
+def plan_dispense(prescribed_medicines):
+    """
+    Decide which prescribed lines can be dispensed from the current stock.
+
+    Lines are served in order; when several lines share a medicine each one
+    only succeeds if the stock left after the earlier lines still covers it.
+
+    Args:
+        prescribed_medicines (iterable): PrescribedMedicine objects with
+            their ``medicine`` already loaded.
+
+    Returns:
+        tuple: A list of per-line outcome dictionaries and a dictionary
+            mapping medicine id to the total quantity to decrement.
+    """
+    remaining = {}
+    decrements = defaultdict(int)
+    outcomes = []
+    for prescribed_medicine in prescribed_medicines:
+        medicine = prescribed_medicine.medicine
+        required_quantity = (
+            prescribed_medicine.duration
+        )  # Assuming the duration is the quantity needed
+        in_stock = remaining.setdefault(medicine.id, medicine.stock_quantity)
+        is_stock_sufficient = in_stock >= required_quantity
+
+        if is_stock_sufficient:
+            remaining[medicine.id] -= required_quantity
+            decrements[medicine.id] += required_quantity
+
+        outcomes.append(
+            {
+                "prescribed_medicine_id": prescribed_medicine.id,
+                "medicine_id": medicine.id,
+                "medicine_name": medicine.name,
+                "required_quantity": required_quantity,
+                "in_stock": medicine.stock_quantity,
+                "is_stock_sufficient": is_stock_sufficient,
+                "frequency": prescribed_medicine.dosage_frequency,
+                "instructions": prescribed_medicine.instructions,
+            }
+        )
+    return outcomes, dict(decrements)
+
+
+def apply_decrements(decrements):
+    """
+    Decrement stock for several medicines in a single conditional UPDATE.
+
+    Each medicine is only updated while its stock still covers the
+    requested quantity, so the update can never make stock negative.
+
+    Args:
+        decrements (dict): Mapping of medicine id to quantity to remove.
+
+    Returns:
+        int: The number of medicine rows actually decremented.
+    """
+    if not decrements:
+        return 0
+
+    guard = Q()
+    whens = []
+    for medicine_id, quantity in decrements.items():
+        guard |= Q(pk=medicine_id, stock_quantity__gte=quantity)
+        whens.append(When(pk=medicine_id, then=F("stock_quantity") - quantity))
+
+    return Medicine.objects.filter(guard).update(
+        stock_quantity=Case(*whens, default=F("stock_quantity"))
+    )
+
+
+def dispense_prescription(prescription):
+    """
+    Dispense every prescribed medicine of a prescription atomically.
+
+    Args:
+        prescription (Prescription): The prescription to dispense.
+
+    Returns:
+        list: One dictionary per prescribed line, in line order, with the
+            keys ``medicine_name``, ``required_quantity``, ``in_stock``
+            (stock before dispensing), ``is_stock_sufficient`` (whether the
+            line was dispensed), ``frequency`` and ``instructions``.
+
+    Raises:
+        StockChanged: If the stock kept changing concurrently for
+            ``MAX_DISPENSE_ATTEMPTS`` attempts.
+    """
+    lines = (
+        PrescribedMedicine.objects.filter(prescription=prescription)
+        .select_related("medicine")
+        .select_for_update(of=("medicine",))
+        .order_by("id")
+    )
+
+    for attempt in range(MAX_DISPENSE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                outcomes, decrements = plan_dispense(lines.all())
+                if apply_decrements(decrements) != len(decrements):
+                    raise StockChanged(
+                        f"Stock changed while dispensing prescription {prescription.pk}."
+                    )
+                return outcomes
+        except StockChanged:
+            if attempt == MAX_DISPENSE_ATTEMPTS - 1:
+                raise
@@ -0,0 +1,104 @@
+"""
+On-disk cache of rendered prescription PDFs.
+
+Laying out a reportlab document is far more expensive than reading a file,
+so every rendered prescription PDF is stored through the default storage
+under ``prescription_pdfs/<prescription id>/<content hash>.pdf``. The content
+hash covers everything printed on the PDF (doctor, patient and the dispensed
+medicines with their quantity and dose) and nothing else, so dispensing a
+prescription again reuses its file while a changed prescription simply
+misses the cache; the signal handlers in ``medicines.signals`` also delete
+a prescription's files as soon as its prescribed medicines change.
+
+Only the newest PDF of a prescription is kept on disk.
+"""
+
+import hashlib
+import json
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+PDF_CACHE_DIR = "prescription_pdfs"
+
+# Bump whenever the PDF layout changes so older files are not served.
+PDF_LAYOUT_VERSION = 2
+
+
+def pdf_content_hash(payload):
+    """
+    Hash everything that ends up on the PDF.
+
+    Args:
+        payload: JSON-serializable data the PDF is rendered from.
+
+    Returns:
+        str: The hex SHA-256 digest of the payload and the layout version.
+    """
+    encoded = json.dumps(
+        [PDF_LAYOUT_VERSION, payload], sort_keys=True, default=str
+    ).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def prescription_pdf_dir(prescription_id):
+    return f"{PDF_CACHE_DIR}/{prescription_id}"
+
+
+def get_or_render_pdf(prescription_id, payload, render):
+    """
+    Return the cached PDF for ``payload``, rendering and storing it on a miss.
+
+    Args:
+        prescription_id (int): The prescription the PDF belongs to.
+        payload: JSON-serializable data the PDF is rendered from.
+        render (callable): Produces the PDF bytes; only called on a miss.
+
+    Returns:
+        tuple: The storage name of the PDF and its content hash.
+    """
+    digest = pdf_content_hash(payload)
+    name = f"{prescription_pdf_dir(prescription_id)}/{digest}.pdf"
+    if not default_storage.exists(name):
+        invalidate_prescription_pdfs(prescription_id)
+        name = default_storage.save(name, ContentFile(render()))
+    return name, digest
+
+
+def latest_prescription_pdf(prescription_id):
+    """
+    Return the cached PDF of a prescription, if one has been rendered.
+
+    Args:
+        prescription_id (int): The prescription to look up.
+
+    Returns:
+        tuple: The storage name and content hash of the PDF, or None.
+    """
+    directory = prescription_pdf_dir(prescription_id)
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return None
+    files = [filename for filename in files if filename.endswith(".pdf")]
+    if not files:
+        return None
+    names = [f"{directory}/{filename}" for filename in files]
+    name = max(names, key=default_storage.get_modified_time)
+    return name, name.rsplit("/", 1)[1][: -len(".pdf")].split("_")[0]
+
+
+def invalidate_prescription_pdfs(prescription_id):
+    """
+    Delete every cached PDF of a prescription.
+
+    Args:
+        prescription_id (int): The prescription whose PDFs are deleted.
+    """
+    directory = prescription_pdf_dir(prescription_id)
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        default_storage.delete(f"{directory}/{filename}")
@@ -0,0 +1,32 @@
+"""
+Read-side queries for the medicines app.
+
+List pages only need a handful of columns from a prescription and the
+patient it belongs to. The querysets here join those tables once and load
+just the projected columns, so a list page costs a fixed number of queries
+whatever its length.
+"""
+
+from medicines.models import Prescription
+
+PRESCRIPTION_LIST_FIELDS = (
+    "id",
+    "date_issued",
+    "doctor_appointment__id",
+    "doctor_appointment__patient__id",
+    "doctor_appointment__patient__user__id",
+    "doctor_appointment__patient__user__name",
+)
+
+
+def prescription_list_queryset():
+    """
+    Prescriptions projected for list pages.
+
+    Returns:
+        QuerySet: Prescriptions with the patient's user joined in and only the
+            columns rendered by ``storekeeper/prescription_list.html`` loaded.
+    """
+    return Prescription.objects.select_related(
+        "doctor_appointment__patient__user"
+    ).only(*PRESCRIPTION_LIST_FIELDS)
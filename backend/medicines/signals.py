@@ -0,0 +1,39 @@
+"""
+Signal handlers keeping the prescription typeahead indexes and the
+prescription PDF cache fresh.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from medical_tests.models import Test
+from medicines.models import Medicine, PrescribedMedicine, Prescription
+from medicines.pdf_cache import invalidate_prescription_pdfs
+from medicines.typeahead import medicine_index, test_index
+
+
+@receiver(post_save, sender=Medicine)
+@receiver(post_delete, sender=Medicine)
+def invalidate_medicine_index(sender, **kwargs):
+    """Rebuild the medicine typeahead index on its next lookup."""
+    medicine_index.invalidate()
+
+
+@receiver(post_save, sender=Test)
+@receiver(post_delete, sender=Test)
+def invalidate_test_index(sender, **kwargs):
+    """Rebuild the test typeahead index on its next lookup."""
+    test_index.invalidate()
+
+
+@receiver(post_save, sender=PrescribedMedicine)
+@receiver(post_delete, sender=PrescribedMedicine)
+def invalidate_prescription_pdf(sender, instance, **kwargs):
+    """Drop the cached PDFs of a prescription whose medicines changed."""
+    invalidate_prescription_pdfs(instance.prescription_id)
+
+
+@receiver(post_delete, sender=Prescription)
+def delete_prescription_pdf(sender, instance, **kwargs):
+    """Drop the cached PDFs of a deleted prescription."""
+    invalidate_prescription_pdfs(instance.pk)
@@ -2,8 +2,10 @@ from datetime import timedelta, date
 from unittest.mock import patch
 
 from django.contrib import messages
+from django.db import connection
 from django.http import HttpResponse
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
@@ -118,6 +120,45 @@ class StorekeeperControllerTest(TestCase):
         self.assertTemplateUsed(response, "storekeeper/prescription_list.html")
         self.assertIn("prescriptions", response.context)
 
+    @patch("medicines.controllers.PRESCRIPTION_LIST_PAGE_SIZE", 1)
+    def test_all_prescriptions_keyset_pages(self):
+        """
+        All Prescriptions is paged newest first through the cursor parameter
+        :return: Boolean
+        """
+        newer = Prescription.objects.create(
+            doctor_appointment=self.appointment, diagnosis="Fever"
+        )
+        self.client.force_login(self.storekeeper_user)
+        response = self.client.get(reverse("medicines:all_prescriptions"))
+        page = response.context["prescriptions"]
+        self.assertEqual([p.id for p in page], [newer.id])
+        self.assertTrue(page.has_next)
+
+        response = self.client.get(
+            reverse("medicines:all_prescriptions"), {"cursor": page.next_cursor}
+        )
+        page = response.context["prescriptions"]
+        self.assertEqual([p.id for p in page], [self.prescription.id])
+        self.assertFalse(page.has_next)
+
+    def test_all_prescriptions_query_count_is_constant(self):
+        """
+        Rendering more prescriptions does not add queries
+        :return: Boolean
+        """
+        self.client.force_login(self.storekeeper_user)
+        with CaptureQueriesContext(connection) as single:
+            self.client.get(reverse("medicines:all_prescriptions"))
+        for _ in range(5):
+            Prescription.objects.create(
+                doctor_appointment=self.appointment, diagnosis="Fever"
+            )
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse("medicines:all_prescriptions"))
+        self.assertContains(response, "John Doe", count=6)
+        self.assertEqual(len(single), len(many))
+
     def test_search_prescriptions_view_get(self):
         """
         test_search_prescriptions_view_get
@@ -318,8 +359,8 @@ class GetInformationForPrescriptionTests(TestCase):
         self.assertEqual(response.context["appointment"], self.appointment)
         self.assertEqual(response.context["doctor"], self.doctor)
         self.assertEqual(response.context["patient"], self.patient)
-        self.assertIn(self.medicine, response.context["medicines"])
-        self.assertIn(self.test, response.context["tests"])
+        self.assertNotIn("medicines", response.context)
+        self.assertNotIn("tests", response.context)
         self.assertListEqual(
             response.context["frequencies"],
             [choice[0] for choice in MEDICINE_FREQUENCY_CHOICES],
@@ -334,19 +375,44 @@ class GetInformationForPrescriptionTests(TestCase):
         )
         self.assertTemplateUsed(response, "doctors/prescribe_patient.htm")
 
-    def test_no_medicines_or_tests(self):
+    def test_medicine_typeahead(self):
         self.client.login(email="doctoruser@example.com", password="password123")
-        Medicine.objects.all().delete()
-        Test.objects.all().delete()
-        url = reverse(
-            "medicines:get-information-for-prescription", args=[self.appointment.id]
+        Medicine.objects.create(
+            name="Napa",
+            generic_name="Paracetamol",
+            manufacturer="Beximco",
+            dosage_form="Tablet",
+            strength="500mg",
+            price=1.00,
+            stock_quantity=100,
+            expiry_date=date(2025, 12, 31),
         )
-        response = self.client.get(url)
+        url = reverse("medicines:medicine-typeahead")
+
+        response = self.client.get(url, {"q": "para"})
         self.assertEqual(response.status_code, 200)
-        self.assertIn("medicines", response.context)
-        self.assertIn("tests", response.context)
-        self.assertEqual(len(response.context["medicines"]), 0)
-        self.assertEqual(len(response.context["tests"]), 0)
+        self.assertEqual(
+            sorted(m["name"] for m in response.json()["results"]),
+            ["Napa", "Paracetamol"],
+        )
+
+        response = self.client.get(url, {"q": "para 500 nap"})
+        self.assertEqual([m["name"] for m in response.json()["results"]], ["Napa"])
+
+    def test_typeahead_follows_catalog_changes(self):
+        self.client.login(email="doctoruser@example.com", password="password123")
+        url = reverse("medicines:test-typeahead")
+        response = self.client.get(url, {"q": "cb"})
+        self.assertEqual([t["id"] for t in response.json()["results"]], [self.test.id])
+
+        self.test.delete()
+        response = self.client.get(url, {"q": "cb"})
+        self.assertEqual(response.json()["results"], [])
+
+    def test_typeahead_forbidden_for_non_doctor(self):
+        self.client.login(email="patientuser@example.com", password="password123")
+        response = self.client.get(reverse("medicines:medicine-typeahead"), {"q": "p"})
+        self.assertEqual(response.status_code, 403)
 
 
 class SavePrescriptionTests(TestCase):
@@ -482,10 +548,52 @@ class SavePrescriptionTests(TestCase):
             ),
         )
         self.assertIn(
-            "An error occurred: No Medicine matches the given query.",
+            "An error occurred: No Medicine matches the given ids: 9999.",
             [m.message for m in messages.get_messages(response.wsgi_request)],
         )
 
+    def test_invalid_ids_reported_together_and_nothing_saved(self):
+        self.client.login(email="doctoruser@example.com", password="password123")
+        response = self.client.post(
+            reverse("medicines:save-prescription", args=[self.appointment.id]),
+            {
+                "complains": "Headache",
+                "diagnosis": "Migraine",
+                "vital_signs": "Normal",
+                "tests": [self.test.id, 8888],
+                "medicines": [self.medicine.id, 9999, "abc"],
+                "durations": [5, 5, 5],
+                "instructions": ["Take after meals"] * 3,
+                "frequencies": ["Morning + Noon"] * 3,
+            },
+        )
+        self.assertIn(
+            "An error occurred: No Test matches the given ids: 8888. "
+            "No Medicine matches the given ids: 9999, abc.",
+            [m.message for m in messages.get_messages(response.wsgi_request)],
+        )
+        self.assertFalse(Prescription.objects.exists())
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.status, "scheduled")
+
+    def test_failed_line_rolls_back_prescription(self):
+        self.client.login(email="doctoruser@example.com", password="password123")
+        self.client.post(
+            reverse("medicines:save-prescription", args=[self.appointment.id]),
+            {
+                "complains": "Headache",
+                "diagnosis": "Migraine",
+                "vital_signs": "Normal",
+                "tests": [self.test.id],
+                "medicines": [self.medicine.id],
+                "durations": ["five"],
+                "instructions": ["Take after meals"],
+                "frequencies": ["Morning + Noon"],
+            },
+        )
+        self.assertFalse(Prescription.objects.exists())
+        self.assertFalse(PrescribedTest.objects.exists())
+
     def test_handle_appointment_status_and_doctor_count(self):
         self.client.login(email="doctoruser@example.com", password="password123")
         response = self.client.post(
@@ -511,5 +619,33 @@ class SavePrescriptionTests(TestCase):
         self.assertEqual(self.appointment.doctor.no_of_appointments, 0)
         self.assertEqual(self.appointment.doctor.no_of_prescriptions, 1)
 
+    def test_second_prescription_keeps_appointment_count(self):
+        DoctorAppointment.objects.create(
+            patient=self.patient,
+            doctor=self.doctor,
+            appointment_date_time=timezone.now() + timedelta(days=2),
+            status="scheduled",
+        )
+        self.doctor.no_of_appointments = 2
+        self.doctor.save()
+        self.client.login(email="doctoruser@example.com", password="password123")
+        url = reverse("medicines:save-prescription", args=[self.appointment.id])
+        for diagnosis in ("Migraine", "Tension headache"):
+            self.client.post(
+                url,
+                {
+                    "complains": "Headache",
+                    "diagnosis": diagnosis,
+                    "vital_signs": "Normal",
+                    "referral": "",
+                    "next_checkup": "",
+                },
+            )
+
+        self.doctor.refresh_from_db()
+        self.assertEqual(Prescription.objects.count(), 2)
+        self.assertEqual(self.doctor.no_of_appointments, 1)
+        self.assertEqual(self.doctor.no_of_prescriptions, 2)
+
 
 # Doctor part end
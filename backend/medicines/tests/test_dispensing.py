@@ -0,0 +1,129 @@
+from django.test import TestCase
+
+from appointments.models import DoctorAppointment
+from medicines.constants import MEDICINE_FREQUENCY_CHOICES
+from medicines.dispensing import apply_decrements, dispense_prescription
+from medicines.models import Medicine, Prescription, PrescribedMedicine
+from users.models import Doctor, Patient, User
+
+
+class DispensePrescriptionTest(TestCase):
+    """
+    Dispensing engine tests
+    """
+
+    def setUp(self):
+        """
+        Setup
+        :return: objects
+        """
+        self.doctor_user = User.objects.create_user(
+            email="doctor@example.com",
+            name="Dr. Sudipta",
+            role="Doctor",
+            blood_group="A+",
+            date_of_birth="1980-01-01",
+            gender="Male",
+            phone_number="+8801712345678",
+            role_id="disp-doc",
+            password="asdf1234@",
+        )
+        self.patient_user = User.objects.create_user(
+            email="patient@example.com",
+            name="John Doe",
+            role="Student",
+            blood_group="B+",
+            date_of_birth="1990-05-10",
+            gender="Male",
+            phone_number="+8801987654321",
+            role_id="disp-pat",
+            password="asdf1234@",
+        )
+        self.doctor = Doctor.objects.create(user=self.doctor_user)
+        self.patient = Patient.objects.create(user=self.patient_user)
+        self.appointment = DoctorAppointment.objects.create(
+            doctor=self.doctor,
+            patient=self.patient,
+            appointment_date_time="2024-12-15T10:00:00Z",
+            status="scheduled",
+        )
+        self.prescription = Prescription.objects.create(
+            doctor_appointment=self.appointment,
+            diagnosis="Headache",
+        )
+        self.medicines = [
+            Medicine.objects.create(
+                name=f"Medicine {index}",
+                manufacturer="ABC Pharma",
+                dosage_form="Tablet",
+                strength="500mg",
+                price=10.00,
+                stock_quantity=10,
+                expiry_date="2025-12-31",
+            )
+            for index in range(3)
+        ]
+
+    def prescribe(self, medicine, duration):
+        return PrescribedMedicine.objects.create(
+            prescription=self.prescription,
+            medicine=medicine,
+            dosage_frequency=MEDICINE_FREQUENCY_CHOICES[0][0],
+            duration=duration,
+        )
+
+    def test_dispense_decrements_only_sufficient_lines(self):
+        """
+        Lines with enough stock are dispensed, the others are left untouched.
+        """
+        self.prescribe(self.medicines[0], 4)
+        self.prescribe(self.medicines[1], 11)
+
+        outcomes = dispense_prescription(self.prescription)
+
+        self.assertEqual(
+            [info["is_stock_sufficient"] for info in outcomes], [True, False]
+        )
+        self.assertEqual(outcomes[0]["in_stock"], 10)
+        self.medicines[0].refresh_from_db()
+        self.medicines[1].refresh_from_db()
+        self.assertEqual(self.medicines[0].stock_quantity, 6)
+        self.assertEqual(self.medicines[1].stock_quantity, 10)
+
+    def test_dispense_repeated_medicine_shares_stock(self):
+        """
+        Two lines for the same medicine cannot both consume the same stock.
+        """
+        self.prescribe(self.medicines[0], 6)
+        self.prescribe(self.medicines[0], 6)
+
+        outcomes = dispense_prescription(self.prescription)
+
+        self.assertEqual(
+            [info["is_stock_sufficient"] for info in outcomes], [True, False]
+        )
+        self.medicines[0].refresh_from_db()
+        self.assertEqual(self.medicines[0].stock_quantity, 4)
+
+    def test_dispense_uses_constant_number_of_queries(self):
+        """
+        The query count does not grow with the number of prescribed lines.
+        """
+        for medicine in self.medicines:
+            self.prescribe(medicine, 1)
+
+        # SAVEPOINT, SELECT lines, UPDATE stock, RELEASE SAVEPOINT
+        with self.assertNumQueries(4):
+            dispense_prescription(self.prescription)
+
+    def test_apply_decrements_never_goes_negative(self):
+        """
+        The conditional update skips medicines whose stock no longer suffices.
+        """
+        updated = apply_decrements(
+            {self.medicines[0].id: 5, self.medicines[1].id: 50}
+        )
+
+        self.assertEqual(updated, 1)
+        self.medicines[1].refresh_from_db()
+        self.assertEqual(self.medicines[1].stock_quantity, 10)
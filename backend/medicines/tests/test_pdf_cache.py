@@ -0,0 +1,151 @@
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from appointments.models import DoctorAppointment
+from medicines.constants import MEDICINE_FREQUENCY_CHOICES
+from medicines.models import Medicine, Prescription, PrescribedMedicine
+from medicines.pdf_cache import latest_prescription_pdf
+from users.models import Doctor, Patient, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PrescriptionPdfCacheTest(TestCase):
+    """
+    Prescription PDF cache tests
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        """
+        Setup
+        :return: objects
+        """
+        self.storekeeper_user = User.objects.create_user(
+            email="storekeeper@example.com",
+            name="Storekeeper",
+            role="Storekeeper",
+            blood_group="A+",
+            date_of_birth="1980-01-01",
+            gender="Male",
+            phone_number="+8801712345678",
+            role_id="pdf-store",
+            password="asdf1234@",
+        )
+        doctor = Doctor.objects.create(
+            user=User.objects.create_user(
+                email="doctor@example.com",
+                name="Dr. Sudipta",
+                role="Doctor",
+                blood_group="A+",
+                date_of_birth="1980-01-01",
+                gender="Male",
+                phone_number="+8801712345678",
+                role_id="pdf-doc",
+                password="asdf1234@",
+            )
+        )
+        patient = Patient.objects.create(
+            user=User.objects.create_user(
+                email="patient@example.com",
+                name="John Doe",
+                role="Student",
+                blood_group="B+",
+                date_of_birth="1990-05-10",
+                gender="Male",
+                phone_number="+8801987654321",
+                role_id="pdf-pat",
+                password="asdf1234@",
+            )
+        )
+        self.prescription = Prescription.objects.create(
+            doctor_appointment=DoctorAppointment.objects.create(
+                doctor=doctor,
+                patient=patient,
+                appointment_date_time="2024-12-15T10:00:00Z",
+            ),
+            diagnosis="Headache",
+        )
+        self.medicine = Medicine.objects.create(
+            name="Paracetamol",
+            manufacturer="ABC Pharma",
+            dosage_form="Tablet",
+            strength="500mg",
+            price=10.00,
+            stock_quantity=100,
+            expiry_date="2025-12-31",
+        )
+        self.prescribed_medicine = PrescribedMedicine.objects.create(
+            prescription=self.prescription,
+            medicine=self.medicine,
+            dosage_frequency=MEDICINE_FREQUENCY_CHOICES[0][0],
+            duration=5,
+        )
+        self.client.force_login(self.storekeeper_user)
+
+    def dispense(self):
+        return self.client.post(
+            reverse("medicines:dispense-medicines", args=[self.prescription.id])
+        )
+
+    def test_dispense_stores_pdf_with_validators(self):
+        """
+        Dispensing caches the PDF and sends ETag and Last-Modified headers
+        """
+        response = self.dispense()
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+        self.assertIsNotNone(latest_prescription_pdf(self.prescription.id))
+
+    def test_download_reads_cached_pdf(self):
+        """
+        Downloads are served from the cache and honour If-None-Match
+        """
+        dispensed = self.dispense()
+        url = reverse("medicines:download-prescription-pdf", args=[self.prescription.id])
+
+        with patch("medicines.controllers.render_prescription_pdf") as render:
+            response = self.client.get(url)
+            render.assert_not_called()
+        self.assertEqual(response.content, dispensed.content)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=dispensed["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_dispensing_again_reuses_pdf(self):
+        """
+        The stock taken by a dispense does not change the cached PDF
+        """
+        dispensed = self.dispense()
+
+        with patch("medicines.controllers.render_prescription_pdf") as render:
+            response = self.dispense()
+            render.assert_not_called()
+        self.medicine.refresh_from_db()
+        self.assertEqual(self.medicine.stock_quantity, 90)
+        self.assertEqual(response["ETag"], dispensed["ETag"])
+        self.assertEqual(response.content, dispensed.content)
+
+    def test_medicine_change_invalidates_pdf(self):
+        """
+        Changing a prescribed medicine drops the cached PDF
+        """
+        self.dispense()
+        self.prescribed_medicine.duration = 7
+        self.prescribed_medicine.save()
+
+        self.assertIsNone(latest_prescription_pdf(self.prescription.id))
+        response = self.client.get(
+            reverse("medicines:download-prescription-pdf", args=[self.prescription.id])
+        )
+        self.assertEqual(response.status_code, 404)
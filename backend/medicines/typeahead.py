@@ -0,0 +1,138 @@
+"""
+In-memory prefix indexes behind the prescription form's typeahead lookups.
+
+Each catalog (medicines, tests) is held as a sorted list of
+``(word, entry id)`` pairs built from the normalized words of the searchable
+fields. A lookup binary-searches the first pair starting with the typed
+prefix and walks forward, so it never touches the database.
+
+Indexes are rebuilt lazily: the ``post_save``/``post_delete`` handlers in
+``medicines.signals`` mark the index of the changed model stale, and every
+index is also considered stale after ``INDEX_MAX_AGE`` seconds so changes
+made by other worker processes are picked up.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+from medical_tests.models import Test
+from medicines.models import Medicine
+from users.search import normalize_name
+
+INDEX_MAX_AGE = 300
+DEFAULT_LIMIT = 10
+
+
+class PrefixIndex:
+    """
+    A lazily built, thread-safe prefix index over one catalog model.
+
+    Args:
+        load (callable): Returns an iterable of ``(id, words, payload)``
+            tuples, one per catalog entry.
+    """
+
+    def __init__(self, load):
+        self._load = load
+        self._lock = threading.Lock()
+        self._keys = []
+        self._payloads = {}
+        self._words = {}
+        self._built_at = None
+        self._generation = 0
+
+    def invalidate(self):
+        """Mark the index stale; it is rebuilt on the next lookup."""
+        self._generation += 1
+        self._built_at = None
+
+    def _ensure_fresh(self):
+        built_at = self._built_at
+        if built_at is not None and time.monotonic() - built_at < INDEX_MAX_AGE:
+            return
+        with self._lock:
+            if self._built_at is not built_at:
+                return
+            generation = self._generation
+            keys, payloads, words = [], {}, {}
+            for entry_id, entry_words, payload in self._load():
+                payloads[entry_id] = payload
+                words[entry_id] = set(entry_words)
+                keys.extend((word, entry_id) for word in words[entry_id])
+            keys.sort()
+            self._keys, self._payloads, self._words = keys, payloads, words
+            if generation == self._generation:
+                self._built_at = time.monotonic()
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        Return the payloads of entries matching every word of ``query``.
+
+        The first query word is looked up in the index; every other word
+        must prefix one of the entry's words as well.
+
+        Args:
+            query (str): The text typed by the user.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: Matching payloads in index order.
+        """
+        query_words = normalize_name(query)
+        if not query_words:
+            return []
+        self._ensure_fresh()
+        keys, payloads, words = self._keys, self._payloads, self._words
+
+        first, rest = query_words[0], query_words[1:]
+        results, seen = [], set()
+        position = bisect_left(keys, (first,))
+        while position < len(keys) and len(results) < limit:
+            word, entry_id = keys[position]
+            position += 1
+            if not word.startswith(first):
+                break
+            if entry_id in seen:
+                continue
+            seen.add(entry_id)
+            if all(
+                any(entry_word.startswith(q) for entry_word in words[entry_id])
+                for q in rest
+            ):
+                results.append(payloads[entry_id])
+        return results
+
+
+def load_medicines():
+    """Yield the searchable words and JSON payload of every medicine."""
+    rows = Medicine.objects.values_list(
+        "id", "name", "generic_name", "strength", "dosage_form"
+    )
+    for medicine_id, name, generic_name, strength, dosage_form in rows.iterator():
+        words = normalize_name(f"{name} {generic_name or ''} {strength}")
+        yield medicine_id, words, {
+            "id": medicine_id,
+            "name": name,
+            "generic_name": generic_name,
+            "strength": strength,
+            "dosage_form": dosage_form,
+            "label": f"{name} ({strength})",
+        }
+
+
+def load_tests():
+    """Yield the searchable words and JSON payload of every test."""
+    rows = Test.objects.values_list("id", "name", "department", "is_available")
+    for test_id, name, department, is_available in rows.iterator():
+        yield test_id, normalize_name(name), {
+            "id": test_id,
+            "name": name,
+            "department": department,
+            "is_available": is_available,
+            "label": name,
+        }
+
+
+medicine_index = PrefixIndex(load_medicines)
+test_index = PrefixIndex(load_tests)
@@ -25,6 +25,12 @@ Routes:
         Parameters:
             - prescription_id (int): The ID of the prescription.
 
+    - `dispense/<int:prescription_id>/pdf/`:
+        Download the cached PDF of the last dispense of a prescription.
+        View: `download_prescription_pdf`
+        Parameters:
+            - prescription_id (int): The ID of the prescription.
+
     - `add-medicine/`:
         Add a new medicine to the system.
         View: `add_medicine`
@@ -41,6 +47,14 @@ Routes:
         Parameters:
             - appointment_id (int): The ID of the appointment.
 
+    - `typeahead/medicines/`:
+        Look up medicines by prefix for the prescription form (JSON).
+        View: `medicine_typeahead`
+
+    - `typeahead/tests/`:
+        Look up medical tests by prefix for the prescription form (JSON).
+        View: `test_typeahead`
+
 Attributes:
     app_name (str): The namespace for the `medicines` app.
     urlpatterns (list): List of URL patterns for the app.
@@ -54,7 +68,10 @@ from medicines.controllers import (
     search_prescriptions,
     all_prescriptions,
     dispense_medicines,
+    download_prescription_pdf,
     add_medicine,
+    medicine_typeahead,
+    test_typeahead,
 )
 
 app_name = "medicines"
@@ -69,6 +86,11 @@ urlpatterns = [
     path(
         "dispense/<int:prescription_id>/", dispense_medicines, name="dispense-medicines"
     ),
+    path(
+        "dispense/<int:prescription_id>/pdf/",
+        download_prescription_pdf,
+        name="download-prescription-pdf",
+    ),
     path("add-medicine/", add_medicine, name="add-medicine"),
     path(
         "get-information-for-prescription/<int:appointment_id>/",
@@ -80,4 +102,6 @@ urlpatterns = [
         save_prescription,
         name="save-prescription",
     ),
+    path("typeahead/medicines/", medicine_typeahead, name="medicine-typeahead"),
+    path("typeahead/tests/", test_typeahead, name="test-typeahead"),
 ]
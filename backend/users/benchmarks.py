@@ -0,0 +1,225 @@
+"""
+Benchmark harness driving the main views through the Django test client.
+
+Each scenario logs in as the staff member who uses the view (taken from
+the data set created by ``users.synthetic_data``), sends the same kind of
+request repeatedly and records the wall-clock latency and the number of
+SQL queries of every request. :func:`run_benchmarks` summarizes them as
+latency percentiles and query counts per view, in a JSON-serializable
+report that :func:`compare_reports` can diff against an earlier run to
+catch regressions.
+"""
+
+import platform
+import statistics
+import time
+from itertools import cycle
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from medicines.models import Prescription
+from users.constants import SYNTHETIC_EMAIL_DOMAIN
+from users.models import Doctor, LabTechnician, Patient, Storekeeper
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, q):
+    """
+    Return the ``q``-th percentile of ``values`` by linear interpolation.
+
+    Args:
+        values (list): The samples; must not be empty.
+        q (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The interpolated percentile.
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _synthetic(queryset):
+    return queryset.filter(user__email__endswith=f"@{SYNTHETIC_EMAIL_DOMAIN}")
+
+
+def _synthetic_user(queryset):
+    """Return the user of the first synthetic staff member in ``queryset``."""
+    member = _synthetic(queryset).select_related("user").first()
+    if member is None:
+        raise LookupError(
+            f"No synthetic {queryset.model.__name__} found; "
+            "run generate_synthetic_data first."
+        )
+    return member.user
+
+
+def _cycle(requests):
+    """Repeat ``requests`` endlessly, refusing an empty data set."""
+    if not requests:
+        raise LookupError("The synthetic data set has no data for this scenario.")
+    return cycle(requests)
+
+
+def _doctor_dashboard():
+    user = _synthetic_user(Doctor.objects.order_by("-no_of_appointments"))
+    return user, cycle([("get", reverse("users:doctor-dashboard"), None)])
+
+
+def _prescription_list():
+    user = _synthetic_user(Storekeeper.objects)
+    return user, cycle([("get", reverse("medicines:all_prescriptions"), None)])
+
+
+def _prescription_search():
+    user = _synthetic_user(Storekeeper.objects)
+    names = _synthetic(Patient.objects).values_list("user__name", flat=True)[:50]
+    url = reverse("medicines:search-prescriptions")
+    return user, _cycle([("get", url, {"patient_name": name}) for name in names])
+
+
+def _dispense():
+    user = _synthetic_user(Storekeeper.objects)
+    prescription_ids = Prescription.objects.filter(
+        doctor_appointment__doctor__user__email__endswith=f"@{SYNTHETIC_EMAIL_DOMAIN}"
+    ).values_list("pk", flat=True)[:50]
+    return user, _cycle(
+        [
+            ("post", reverse("medicines:dispense-medicines", args=[pk]), None)
+            for pk in prescription_ids
+        ]
+    )
+
+
+def _report_list():
+    user = _synthetic_user(LabTechnician.objects)
+    return user, cycle([("get", reverse("medical_tests:see-report-list"), None)])
+
+
+# Scenario name mapped to a callable returning the user to log in as and an
+# endless iterator of (method, path, data) requests.
+SCENARIOS = {
+    "doctor_dashboard": _doctor_dashboard,
+    "prescription_list": _prescription_list,
+    "prescription_search": _prescription_search,
+    "dispense": _dispense,
+    "report_list": _report_list,
+}
+
+
+def benchmark_scenario(scenario, iterations, warmup=2):
+    """
+    Run one scenario and summarize its latencies and query counts.
+
+    Args:
+        scenario (callable): One of the :data:`SCENARIOS` values.
+        iterations (int): Number of measured requests.
+        warmup (int): Number of unmeasured requests sent first.
+
+    Returns:
+        dict: Request and status code counts, latency percentiles in
+            milliseconds and query count statistics.
+    """
+    user, requests = scenario()
+    client = Client()
+    client.force_login(user)
+
+    latencies, query_counts, status_codes = [], [], {}
+    for index in range(warmup + iterations):
+        method, path, data = next(requests)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method)(path, data)
+            elapsed = time.perf_counter() - started
+        if index < warmup:
+            continue
+        latencies.append(elapsed * 1000)
+        query_counts.append(len(queries))
+        status_codes[str(response.status_code)] = (
+            status_codes.get(str(response.status_code), 0) + 1
+        )
+
+    latency = {f"p{q}": round(percentile(latencies, q), 3) for q in PERCENTILES}
+    latency.update(
+        min=round(min(latencies), 3),
+        max=round(max(latencies), 3),
+        mean=round(statistics.fmean(latencies), 3),
+    )
+    return {
+        "requests": iterations,
+        "status_codes": status_codes,
+        "latency_ms": latency,
+        "queries": {
+            "min": min(query_counts),
+            "max": max(query_counts),
+            "mean": round(statistics.fmean(query_counts), 2),
+        },
+    }
+
+
+def run_benchmarks(names=None, iterations=50, warmup=2):
+    """
+    Run the named scenarios (all by default) against the current database.
+
+    Args:
+        names (list): Scenario names from :data:`SCENARIOS`.
+        iterations (int): Number of measured requests per scenario.
+        warmup (int): Number of unmeasured requests per scenario.
+
+    Returns:
+        dict: The JSON-serializable benchmark report.
+    """
+    names = names or list(SCENARIOS)
+    # The test client always talks to the "testserver" host.
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        results = {
+            name: benchmark_scenario(SCENARIOS[name], iterations, warmup)
+            for name in names
+        }
+    return {
+        "created_at": timezone.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+        },
+        "iterations": iterations,
+        "results": results,
+    }
+
+
+def compare_reports(baseline, current, tolerance=0.2):
+    """
+    List the scenarios that got slower or issue more queries than before.
+
+    Args:
+        baseline (dict): An earlier report of :func:`run_benchmarks`.
+        current (dict): The report to check.
+        tolerance (float): Allowed relative growth of the p95 latency.
+
+    Returns:
+        list: Human-readable descriptions of the regressions.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        old_p95, new_p95 = previous["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        if new_p95 > old_p95 * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 latency {old_p95:.1f}ms -> {new_p95:.1f}ms"
+            )
+        old_queries, new_queries = previous["queries"]["max"], result["queries"]["max"]
+        if new_queries > old_queries:
+            regressions.append(f"{name}: queries {old_queries} -> {new_queries}")
+    return regressions
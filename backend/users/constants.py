@@ -23,3 +23,17 @@ GENDER_CHOICES = [
     ("Female", "Female"),
     ("Others", "Others"),
 ]
+
+DASHBOARD_APPOINTMENTS_PAGE_SIZE = 20
+
+# Synthetic load-testing data (see users.synthetic_data)
+SYNTHETIC_EMAIL_DOMAIN = "synthetic.jumcms.test"
+SYNTHETIC_MARKER = "Synthetic load-testing data"
+SYNTHETIC_PASSWORD = "synthetic1234@"
+SYNTHETIC_BATCH_SIZE = 500
+
+# Patient timeline (see users.timeline)
+TIMELINE_PAGE_SIZE = 20
+MAX_TIMELINE_PAGE_SIZE = 100
+TIMELINE_CACHE_PREFIX = "patient-timeline"
+TIMELINE_CACHE_TIMEOUT = 60 * 60
@@ -1,17 +1,32 @@
 from django.contrib import messages
 from django.contrib.auth import logout, login, authenticate
 from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseForbidden, JsonResponse
 from django.shortcuts import get_object_or_404, render, redirect
+from django.views.decorators.http import require_GET
 from django.contrib import messages
 from users.forms import UserRegistrationForm, LoginForm
 from users.models import Doctor, Patient, Storekeeper, LabTechnician
 from medicines.models import Medicine
 from ambulance.models import Ambulance
-from appointments.controllers import get_doctor_appointments
+from appointments.controllers import (
+    get_doctor_appointments,
+    get_doctor_appointments_on,
+    get_monthly_appointment_counts,
+)
+from appointments.triage import triage_board
 from django.utils import timezone
-from collections import defaultdict
+from django.core.paginator import Paginator
+from users.constants import (
+    DASHBOARD_APPOINTMENTS_PAGE_SIZE,
+    MAX_TIMELINE_PAGE_SIZE,
+    TIMELINE_PAGE_SIZE,
+)
+from users.timeline import patient_timeline
+from core.general.cache import cache_anonymous_page
 
 
+@cache_anonymous_page()
 def home(request):
     """Render the home page.
 
@@ -150,36 +165,34 @@ def unapproved(request):
 def doctor_dashboard(request):
     """Render the doctor's dashboard.
 
-    This function retrieves the doctor's appointments for the current day
-    and aggregates the appointments per month for display in the dashboard.
+    The monthly statistics are aggregated by the database, today's
+    appointments are filtered by the database and the list of waiting
+    patients is paginated, so the cost of the page does not grow with the
+    doctor's appointment history. The number of patients waiting to be
+    called comes from the doctor's in-memory triage queue.
 
     Args:
-        request: The HTTP request object.
+        request: The HTTP request object; ``page`` selects the page of
+            waiting patients.
 
     Returns:
         HttpResponse: The rendered doctor dashboard page with the doctor's
             information and appointments data.
     """
     doctor = get_object_or_404(Doctor, user=request.user)
-    appointments_list = get_doctor_appointments(doctor)
-    today = timezone.now().date()
-    appointments_today = [
-        appointment
-        for appointment in appointments_list
-        if appointment.appointment_date_time.date() == today
-    ]
-
-    appointments_per_month = defaultdict(int)
-
-    for appointment in appointments_list:
-        appointment_year = appointment.appointment_date_time.year
-        appointment_month = appointment.appointment_date_time.month
-        if appointment_year == today.year:
-            appointments_per_month[appointment_month] += 1
-
-    appointments_data = [appointments_per_month[i] for i in range(1, 13)]
+    today = timezone.localdate()
+    scheduled = get_doctor_appointments(doctor).select_related("patient__user")
+    appointments_list = Paginator(
+        scheduled, DASHBOARD_APPOINTMENTS_PAGE_SIZE
+    ).get_page(request.GET.get("page"))
+    appointments_today = get_doctor_appointments_on(doctor, today).select_related(
+        "patient__user"
+    )
+    appointments_data = get_monthly_appointment_counts(doctor, today.year)
+
     context = {
         "doctor": doctor,
+        "waiting_count": triage_board.waiting(doctor.id),
         "appointments_list": appointments_list,
         "today": today,
         "appointments_today": appointments_today,
@@ -214,6 +227,7 @@ def storekeeper_dashboard(request):
 
 
 # Ambulance information(Nahian)
+@cache_anonymous_page(Ambulance)
 def ambulance_info(request):
     user = request.user
     ambulances = Ambulance.objects.all()
@@ -237,4 +251,54 @@ def patient_dashboard(request):
     return render(request, "patients/patient_dashboard.html", context)
 
 
+@login_required
+@require_GET
+def get_patient_timeline(request, patient_id=None):
+    """
+    Returns one page of a patient's medical history as JSON, newest first.
+
+    Patients see their own timeline; doctors may pass the id of any patient.
+
+    Query parameters:
+        cursor (optional): The ``next_cursor`` of the previous page.
+        page_size (optional): Number of appointments, at most
+            ``MAX_TIMELINE_PAGE_SIZE``.
+
+    Args:
+        request (HttpRequest): The request object containing metadata about the request.
+        patient_id (int): Primary key of the patient; the logged-in patient
+            by default.
+
+    Returns:
+        JsonResponse: The appointments with their prescriptions, medicines,
+                      tests and reports, grouped by day, and the cursor of the
+                      next page; a 400 error response if the parameters are
+                      invalid.
+        HttpResponseForbidden: If the user may not see the patient's records.
+    """
+    if patient_id is None:
+        patient = get_object_or_404(Patient, user=request.user)
+    else:
+        patient = get_object_or_404(Patient, pk=patient_id)
+        if request.user.role != "Doctor" and patient.user_id != request.user.id:
+            return HttpResponseForbidden("You are not authorized to view this page.")
+
+    try:
+        page_size = int(request.GET.get("page_size", TIMELINE_PAGE_SIZE))
+    except ValueError:
+        page_size = 0
+    if page_size < 1:
+        return JsonResponse({"error": "The page size must be positive."}, status=400)
+
+    try:
+        page = patient_timeline(
+            patient.id,
+            request.GET.get("cursor") or None,
+            min(page_size, MAX_TIMELINE_PAGE_SIZE),
+        )
+    except ValueError:
+        return JsonResponse({"error": "Invalid cursor."}, status=400)
+    return JsonResponse({"patient_id": patient.id, **page})
+
+
 # Patient part end
@@ -0,0 +1,136 @@
+"""
+Denormalized counters on :class:`users.models.Doctor`.
+
+``Doctor.no_of_appointments``, ``no_of_patients`` and ``no_of_prescriptions``
+are read on every dashboard view, so they are stored on the doctor instead
+of being counted each time. This module keeps them consistent:
+
+* :func:`adjust_doctor_counters` applies deltas with a single atomic ``F()``
+  update, so concurrent requests never overwrite each other's changes.
+* :func:`recompute_doctor_counters` rebuilds the counters from
+  ``DoctorAppointment`` and ``Prescription`` rows in one ``UPDATE``.
+* :func:`find_counter_drift` lists doctors whose stored counters differ from
+  the recomputed values, for the periodic ``check_doctor_counters`` command.
+
+The counters mean:
+
+* ``no_of_appointments``: scheduled (not yet completed or canceled) appointments.
+* ``no_of_patients``: distinct patients who have booked the doctor.
+* ``no_of_prescriptions``: prescriptions written by the doctor.
+"""
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import Doctor
+
+COUNTER_FIELDS = {
+    "appointments": "no_of_appointments",
+    "patients": "no_of_patients",
+    "prescriptions": "no_of_prescriptions",
+}
+
+
+def adjust_doctor_counters(doctor_id, **deltas):
+    """
+    Atomically add deltas to a doctor's counters, never going below zero.
+
+    Args:
+        doctor_id (int): The primary key of the doctor.
+        **deltas: Integer deltas keyed by ``appointments``, ``patients`` or
+            ``prescriptions``.
+
+    Returns:
+        int: The number of doctor rows updated.
+    """
+    updates = {
+        COUNTER_FIELDS[name]: Greatest(F(COUNTER_FIELDS[name]) + delta, Value(0))
+        for name, delta in deltas.items()
+        if delta
+    }
+    if not updates:
+        return 0
+    return Doctor.objects.filter(pk=doctor_id).update(**updates)
+
+
+def _count_subquery(queryset, doctor_field, count_field="pk"):
+    """Wrap a per-doctor count as a correlated subquery defaulting to zero."""
+    counts = (
+        queryset.filter(**{doctor_field: OuterRef("pk")})
+        .order_by()
+        .values(doctor_field)
+        .annotate(total=Count(count_field, distinct=True))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def expected_counters():
+    """
+    Build the expressions computing each counter from the source tables.
+
+    Returns:
+        dict: Counter field name mapped to a correlated subquery expression
+            usable in ``annotate()`` or ``update()`` on ``Doctor``.
+    """
+    from appointments.models import DoctorAppointment
+    from medicines.models import Prescription
+
+    return {
+        "no_of_appointments": _count_subquery(
+            DoctorAppointment.objects.filter(status="scheduled"), "doctor"
+        ),
+        "no_of_patients": _count_subquery(
+            DoctorAppointment.objects.all(), "doctor", "patient"
+        ),
+        "no_of_prescriptions": _count_subquery(
+            Prescription.objects.all(), "doctor_appointment__doctor"
+        ),
+    }
+
+
+def recompute_doctor_counters(doctors=None):
+    """
+    Recompute the counters of the given doctors (all by default) in one UPDATE.
+
+    Args:
+        doctors (QuerySet): Doctors to recompute; defaults to every doctor.
+
+    Returns:
+        int: The number of doctors updated.
+    """
+    doctors = Doctor.objects.all() if doctors is None else doctors
+    return doctors.update(**expected_counters())
+
+
+def find_counter_drift(doctors=None):
+    """
+    List doctors whose stored counters differ from the recomputed values.
+
+    Args:
+        doctors (QuerySet): Doctors to check; defaults to every doctor.
+
+    Returns:
+        list: ``(doctor, {field: (stored, expected)})`` tuples for every
+            doctor with at least one drifted counter.
+    """
+    doctors = Doctor.objects.all() if doctors is None else doctors
+    expected = {
+        f"expected_{field}": value for field, value in expected_counters().items()
+    }
+    drifted_doctors = (
+        doctors.select_related("user")
+        .annotate(**expected)
+        .exclude(**{field: F(f"expected_{field}") for field in COUNTER_FIELDS.values()})
+        .order_by("pk")
+    )
+    drifted = []
+    for doctor in drifted_doctors:
+        fields = {
+            field: (getattr(doctor, field), getattr(doctor, f"expected_{field}"))
+            for field in COUNTER_FIELDS.values()
+            if getattr(doctor, field) != getattr(doctor, f"expected_{field}")
+        }
+        if fields:
+            drifted.append((doctor, fields))
+    return drifted
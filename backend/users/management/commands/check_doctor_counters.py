@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.counters import find_counter_drift, recompute_doctor_counters
+from users.models import Doctor
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the denormalized doctor counters against the appointment and "
+        "prescription tables. Meant to be run periodically (e.g. from cron); "
+        "exits with an error when drift is found unless --fix is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Recompute the counters of the drifted doctors.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = find_counter_drift()
+        for doctor, fields in drifted:
+            details = ", ".join(
+                f"{field} stored={stored} expected={expected}"
+                for field, (stored, expected) in fields.items()
+            )
+            self.stdout.write(f"Doctor {doctor.pk} ({doctor}): {details}")
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Doctor counters are consistent."))
+        elif options["fix"]:
+            recompute_doctor_counters(
+                Doctor.objects.filter(pk__in=[doctor.pk for doctor, _ in drifted])
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f"Fixed counters of {len(drifted)} doctors.")
+            )
+        else:
+            raise CommandError(f"Counters of {len(drifted)} doctors have drifted.")
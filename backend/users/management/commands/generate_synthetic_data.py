@@ -0,0 +1,60 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.constants import SYNTHETIC_EMAIL_DOMAIN
+from users.models import User
+from users.synthetic_data import clear_hospital_data, generate_hospital_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a deterministic synthetic hospital data set "
+        "for load testing. The same --seed and --anchor-date always produce "
+        "the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--doctors", type=int, default=20)
+        parser.add_argument("--patients", type=int, default=500)
+        parser.add_argument("--appointments", type=int, default=5000)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=180,
+            help="Days of appointment history before the anchor date.",
+        )
+        parser.add_argument(
+            "--anchor-date",
+            type=date.fromisoformat,
+            help="The 'today' of the data set (YYYY-MM-DD); defaults to today.",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete a previously generated data set first.",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            deleted = clear_hospital_data()
+            self.stdout.write(f"Deleted {deleted} synthetic rows.")
+        elif User.objects.filter(
+            email__endswith=f"@{SYNTHETIC_EMAIL_DOMAIN}"
+        ).exists():
+            raise CommandError(
+                "A synthetic data set already exists; pass --clear to replace it."
+            )
+
+        counts = generate_hospital_data(
+            seed=options["seed"],
+            doctors=options["doctors"],
+            patients=options["patients"],
+            appointments=options["appointments"],
+            anchor_date=options["anchor_date"],
+            days=options["days"],
+        )
+        for model, count in counts.items():
+            self.stdout.write(f"{model}: {count}")
+        self.stdout.write(self.style.SUCCESS("Synthetic data generated."))
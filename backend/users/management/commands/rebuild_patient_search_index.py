@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from users.models import Patient
+from users.search import index_patients
+
+
+class Command(BaseCommand):
+    help = "Rebuild the patient-name trigram search index from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of patients indexed per batch.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        patients = Patient.objects.select_related("user").order_by("id")
+        last_id = 0
+        indexed = 0
+        while True:
+            batch = list(patients.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            index_patients(batch)
+            indexed += len(batch)
+            last_id = batch[-1].id
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} patients."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from users.counters import recompute_doctor_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every doctor's appointment, patient and prescription "
+        "counters from the appointment and prescription tables."
+    )
+
+    def handle(self, *args, **options):
+        updated = recompute_doctor_counters()
+        self.stdout.write(self.style.SUCCESS(f"Recomputed counters of {updated} doctors."))
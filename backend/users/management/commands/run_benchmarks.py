@@ -0,0 +1,62 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.benchmarks import SCENARIOS, compare_reports, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the main views against the synthetic data set (see "
+        "generate_synthetic_data) and report latency percentiles and query "
+        "counts per view as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "scenarios",
+            nargs="*",
+            help=f"Scenarios to run, among {', '.join(SCENARIOS)}; all by default.",
+        )
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+        parser.add_argument(
+            "--compare",
+            help="Fail when the report regresses against this earlier report.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed relative growth of the p95 latency with --compare.",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["scenarios"]) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        try:
+            report = run_benchmarks(
+                options["scenarios"], options["iterations"], options["warmup"]
+            )
+        except LookupError as e:
+            raise CommandError(str(e))
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output)
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            with open(options["compare"]) as baseline_file:
+                regressions = compare_reports(
+                    json.load(baseline_file), report, options["tolerance"]
+                )
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(f"{len(regressions)} benchmark regressions.")
+            self.stdout.write(self.style.SUCCESS("No benchmark regressions."))
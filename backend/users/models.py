@@ -3,6 +3,7 @@ from django.core.validators import RegexValidator
 from django.contrib.auth.models import AbstractBaseUser
 from users.constants import ROLE_CHOICES, BLOOD_GROUP_CHOICES, GENDER_CHOICES
 from django.contrib.auth.models import BaseUserManager
+from core.general.storage import content_addressed_storage
 
 
 class UserManager(BaseUserManager):
@@ -151,6 +152,7 @@ class User(AbstractBaseUser):
     )
     profile_picture = models.ImageField(
         upload_to="profile_pictures/",
+        storage=content_addressed_storage,
         default="profile_pictures/default_user.png",
         help_text="Path to the user's profile picture.",
     )
@@ -235,7 +237,10 @@ class Doctor(models.Model):
         max_length=200, default="MBBS", help_text="Qualifications of the doctor."
     )
     specialty = models.CharField(
-        max_length=100, default="medicine", help_text="Specialty area of the doctor."
+        max_length=100,
+        default="medicine",
+        db_index=True,
+        help_text="Specialty area of the doctor.",
     )
     experience_years = models.IntegerField(
         default=0, help_text="Years of experience of the doctor."
@@ -280,3 +285,29 @@ class LabTechnician(models.Model):
     def __str__(self):
         """Return the name of the labtechnician"""
         return self.user.name
+
+
+class PatientNameTrigram(models.Model):
+    """
+    Search index entry holding one trigram of a patient's normalized name.
+
+    Rows are maintained by the signal handlers in ``users.signals`` and
+    queried by ``users.search`` so patient-name lookups hit the
+    ``(trigram, patient)`` index instead of scanning joined tables.
+    """
+
+    patient = models.ForeignKey(
+        Patient, on_delete=models.CASCADE, related_name="name_trigrams"
+    )
+    trigram = models.CharField(max_length=3, help_text="Padded name trigram.")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["trigram", "patient"], name="unique_patient_name_trigram"
+            )
+        ]
+
+    def __str__(self):
+        """Returns the trigram and the patient it belongs to."""
+        return f"{self.trigram!r} for patient {self.patient_id}"
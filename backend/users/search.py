@@ -0,0 +1,111 @@
+"""
+Trigram index for patient-name search.
+
+Every patient's name is normalized (lower-cased, accents and punctuation
+stripped) and split into padded trigrams the same way PostgreSQL's
+``pg_trgm`` does: each word gets two leading spaces and one trailing space.
+The trigrams are stored in :class:`users.models.PatientNameTrigram`.
+
+A query is split into trigrams as well and matched through the indexed
+``trigram`` column. Because leading trigrams are padded, a typed prefix
+matches every name starting with it, and because matching only needs a
+share of the trigrams a misspelled name still finds the patient.
+"""
+
+import math
+import unicodedata
+
+from django.db.models import Count
+
+from users.models import Patient, PatientNameTrigram
+
+SIMILARITY_THRESHOLD = 0.5
+
+
+def normalize_name(name):
+    """
+    Lower-case ``name``, strip accents and replace punctuation by spaces.
+
+    Args:
+        name (str): The raw name.
+
+    Returns:
+        list: The words of the normalized name.
+    """
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    cleaned = "".join(
+        char.lower() if char.isalnum() else " "
+        for char in decomposed
+        if not unicodedata.combining(char)
+    )
+    return cleaned.split()
+
+
+def name_trigrams(name, complete=True):
+    """
+    Return the set of padded trigrams of ``name``.
+
+    Args:
+        name (str): The name to split.
+        complete (bool): Whether the last word is complete. Search queries
+            pass False so the unfinished last word is treated as a prefix and
+            does not contribute its end-of-word trigram.
+
+    Returns:
+        set: The trigrams of all words of the name.
+    """
+    words = normalize_name(name)
+    trigrams = set()
+    for index, word in enumerate(words):
+        padded = f"  {word} "
+        if not complete and index == len(words) - 1:
+            padded = padded[:-1]
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def index_patients(patients):
+    """
+    Rebuild the search index rows of the given patients.
+
+    Args:
+        patients (iterable): Patient objects with their ``user`` loaded.
+    """
+    patients = list(patients)
+    PatientNameTrigram.objects.filter(patient__in=patients).delete()
+    PatientNameTrigram.objects.bulk_create(
+        [
+            PatientNameTrigram(patient=patient, trigram=trigram)
+            for patient in patients
+            for trigram in name_trigrams(patient.user.name)
+        ]
+    )
+
+
+def search_patient_ids(query, threshold=SIMILARITY_THRESHOLD):
+    """
+    Return a subquery of the ids of patients whose name matches ``query``.
+
+    A patient matches when at least ``threshold`` of the query's trigrams,
+    and never fewer than two of them, occur in their name.
+
+    Args:
+        query (str): The (possibly partial or misspelled) name typed.
+        threshold (float): Share of query trigrams that must match.
+
+    Returns:
+        QuerySet: Patient ids, unordered; every patient when the query
+            contains no searchable characters.
+    """
+    trigrams = name_trigrams(query, complete=False)
+    if not trigrams:
+        return Patient.objects.values_list("id", flat=True)
+
+    required = max(math.ceil(threshold * len(trigrams)), min(len(trigrams), 2))
+    return (
+        PatientNameTrigram.objects.filter(trigram__in=trigrams)
+        .values("patient")
+        .annotate(matches=Count("trigram"))
+        .filter(matches__gte=required)
+        .values_list("patient", flat=True)
+    )
@@ -0,0 +1,50 @@
+"""
+Signal handlers keeping the patient-name search index in sync and the
+cached patient timelines fresh.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from appointments.models import DoctorAppointment
+from medical_tests.models import PrescribedTest, TestReport
+from medicines.models import PrescribedMedicine, Prescription
+from users.models import Patient, User
+from users.search import index_patients
+from users.timeline import invalidate_patient_timeline
+
+
+@receiver(post_save, sender=Patient)
+def index_new_patient(sender, instance, created, raw=False, **kwargs):
+    """Index a patient's name when the patient is created or re-linked."""
+    if not raw:
+        index_patients([instance])
+
+
+@receiver(post_save, sender=User)
+def reindex_patient_name(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Re-index the patients of a user whose name may have changed."""
+    if raw or created:
+        return
+    if update_fields is not None and "name" not in update_fields:
+        return
+    patients = Patient.objects.filter(user=instance)
+    for patient in patients:
+        patient.user = instance
+    index_patients(patients)
+
+
+@receiver(post_save, sender=DoctorAppointment)
+@receiver(post_delete, sender=DoctorAppointment)
+@receiver(post_save, sender=Prescription)
+@receiver(post_delete, sender=Prescription)
+@receiver(post_save, sender=PrescribedMedicine)
+@receiver(post_delete, sender=PrescribedMedicine)
+@receiver(post_save, sender=PrescribedTest)
+@receiver(post_delete, sender=PrescribedTest)
+@receiver(post_save, sender=TestReport)
+@receiver(post_delete, sender=TestReport)
+def invalidate_timeline(sender, instance, raw=False, **kwargs):
+    """Drop the cached timeline of the patient a row belongs to."""
+    if not raw:
+        invalidate_patient_timeline(instance)
@@ -0,0 +1,411 @@
+"""
+Deterministic generator of synthetic hospital data for load testing.
+
+:func:`generate_hospital_data` fills the database with doctors and their
+working hours, patients, staff, a medicine and test catalog, appointments,
+prescriptions, prescribed medicines and tests, and test reports. Every
+random choice is drawn from a ``random.Random`` seeded by the caller, so the
+same seed and anchor date always produce the same data set.
+
+Rows are written with ``bulk_create`` in batches, which skips ``save()``
+and the ``post_save`` handlers: the denormalized patient and test
+references are set on the rows directly, and the patient search index and
+the doctor counters are rebuilt once at the end instead.
+
+Generated users share the ``SYNTHETIC_EMAIL_DOMAIN`` e-mail domain and the
+generated catalog entries are tagged with ``SYNTHETIC_MARKER``, so
+:func:`clear_hospital_data` can remove a previous data set (everything else
+cascades from the users).
+"""
+
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from appointments.models import DoctorAppointment, DoctorWorkingHours
+from medical_tests.models import PrescribedTest, Test, TestReport
+from medicines.constants import MEDICINE_FREQUENCY_CHOICES
+from medicines.models import Medicine, PrescribedMedicine, Prescription
+from users.constants import (
+    BLOOD_GROUP_CHOICES,
+    GENDER_CHOICES,
+    SYNTHETIC_BATCH_SIZE,
+    SYNTHETIC_EMAIL_DOMAIN,
+    SYNTHETIC_MARKER,
+    SYNTHETIC_PASSWORD,
+)
+from users.counters import recompute_doctor_counters
+from users.models import Doctor, LabTechnician, Patient, Storekeeper, User
+from users.search import index_patients
+
+FIRST_NAMES = [
+    "Abdul", "Afsana", "Anika", "Arif", "Ayesha", "Farhan", "Fatema", "Habib",
+    "Hasan", "Imran", "Jannat", "Kamal", "Karim", "Mahbub", "Maliha", "Mehedi",
+    "Mitu", "Nadia", "Nasrin", "Nusrat", "Rahim", "Rakib", "Rashed", "Rina",
+    "Sabbir", "Sadia", "Shakil", "Sharmin", "Sumaiya", "Tanvir", "Tasnim",
+    "Zahid",
+]
+LAST_NAMES = [
+    "Ahmed", "Akter", "Alam", "Barua", "Begum", "Chowdhury", "Das", "Hossain",
+    "Islam", "Kabir", "Khan", "Mahmud", "Miah", "Rahman", "Roy", "Saha",
+    "Sarker", "Siddique", "Talukder", "Uddin",
+]
+SPECIALTIES = [
+    "medicine", "cardiology", "dermatology", "gynecology", "orthopedics",
+    "pediatrics", "psychiatry", "ent",
+]
+MEDICINES = [
+    ("Napa", "Paracetamol", "Tablet", "500mg"),
+    ("Ace", "Paracetamol", "Syrup", "120mg/5ml"),
+    ("Seclo", "Omeprazole", "Capsule", "20mg"),
+    ("Maxpro", "Esomeprazole", "Tablet", "40mg"),
+    ("Fexo", "Fexofenadine", "Tablet", "120mg"),
+    ("Alatrol", "Cetirizine", "Tablet", "10mg"),
+    ("Azithrocin", "Azithromycin", "Tablet", "500mg"),
+    ("Moxacil", "Amoxicillin", "Capsule", "500mg"),
+    ("Flagyl", "Metronidazole", "Tablet", "400mg"),
+    ("Losectil", "Omeprazole", "Capsule", "40mg"),
+    ("Montene", "Montelukast", "Tablet", "10mg"),
+    ("Entacyd", "Antacid", "Suspension", "200ml"),
+    ("Orsaline", "Oral Rehydration Salts", "Sachet", "25g"),
+    ("Tufnil", "Tolfenamic Acid", "Tablet", "200mg"),
+    ("Ceevit", "Vitamin C", "Tablet", "250mg"),
+    ("Calbo", "Calcium Carbonate", "Tablet", "500mg"),
+]
+TESTS = [
+    ("Complete Blood Count", "Hematology"),
+    ("Blood Sugar (Fasting)", "Biochemistry"),
+    ("Lipid Profile", "Biochemistry"),
+    ("Serum Creatinine", "Biochemistry"),
+    ("Urine Routine Examination", "Pathology"),
+    ("Chest X-Ray", "Radiology"),
+    ("ECG", "Cardiology"),
+    ("Ultrasonography of Whole Abdomen", "Radiology"),
+    ("Widal Test", "Microbiology"),
+    ("Dengue NS1 Antigen", "Microbiology"),
+]
+COMPLAINTS = [
+    "Fever for three days", "Headache and dizziness", "Abdominal pain",
+    "Cough and sore throat", "Skin rash", "Joint pain", "Shortness of breath",
+    "Loss of appetite",
+]
+DIAGNOSES = [
+    "Viral fever", "Migraine", "Gastritis", "Upper respiratory tract infection",
+    "Allergic dermatitis", "Arthralgia", "Bronchial asthma", "Typhoid fever",
+]
+# Doctors see patients from Sunday to Thursday
+WORKING_WEEKDAYS = [6, 0, 1, 2, 3]
+WORKING_HOURS = (time(8, 0), time(17, 0))
+SLOT_MINUTES = 15
+# Four students for every campus employee
+PATIENT_ROLES = ["Student"] * 4 + ["Campus_employee"]
+RESULTS = ["Normal", "Within reference range", "Mildly elevated", "Abnormal"]
+
+
+def _chunks(objects, size):
+    for start in range(0, len(objects), size):
+        yield objects[start : start + size]
+
+
+def _bulk_create(model, objects, batch_size=SYNTHETIC_BATCH_SIZE):
+    """
+    Insert ``objects`` in batches and return them with primary keys set.
+
+    Backends that cannot return the inserted ids from a bulk insert get
+    them back by re-reading the rows in insertion (primary key) order.
+    """
+    created = []
+    for chunk in _chunks(objects, batch_size):
+        created.extend(model.objects.bulk_create(chunk))
+    if created and created[0].pk is None:
+        created = list(model.objects.order_by("-pk")[: len(created)])[::-1]
+    return created
+
+
+def _synthetic_users(rng, roles, prefix, count, password):
+    """Create ``count`` approved users with a role drawn from ``roles``."""
+    users = []
+    for index in range(count):
+        role = rng.choice(roles)
+        if role == "Student":
+            birth_year = rng.randint(1998, 2006)
+        else:
+            birth_year = rng.randint(1960, 2000)
+        users.append(
+            User(
+                email=f"{prefix}{index}@{SYNTHETIC_EMAIL_DOMAIN}",
+                name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                role=role,
+                blood_group=rng.choice(BLOOD_GROUP_CHOICES)[0],
+                date_of_birth=date(birth_year, rng.randint(1, 12), rng.randint(1, 28)),
+                gender=rng.choice(GENDER_CHOICES[:2])[0],
+                phone_number=f"+8801{rng.randint(300000000, 999999999)}",
+                role_id=f"syn-{prefix}{index}",
+                password=password,
+                is_approved=True,
+            )
+        )
+    return _bulk_create(User, users)
+
+
+def clear_hospital_data():
+    """
+    Delete every row created by :func:`generate_hospital_data`.
+
+    Returns:
+        int: The number of rows deleted, including cascades.
+    """
+    deleted = 0
+    with transaction.atomic():
+        for queryset in (
+            User.objects.filter(email__endswith=f"@{SYNTHETIC_EMAIL_DOMAIN}"),
+            Medicine.objects.filter(description=SYNTHETIC_MARKER),
+            Test.objects.filter(description=SYNTHETIC_MARKER),
+        ):
+            deleted += queryset.delete()[0]
+    return deleted
+
+
+def generate_hospital_data(
+    seed=0,
+    doctors=20,
+    patients=500,
+    appointments=5000,
+    prescription_ratio=0.7,
+    report_ratio=0.6,
+    anchor_date=None,
+    days=180,
+):
+    """
+    Generate a synthetic hospital data set.
+
+    Appointments are spread over the ``days`` days before ``anchor_date``
+    (completed, some canceled) and the week after it (scheduled), with a
+    share of them falling on ``anchor_date`` itself so the dashboards have
+    work for today.
+
+    Args:
+        seed (int): Seed of the random generator.
+        doctors (int): Number of doctors.
+        patients (int): Number of patients (students and campus employees).
+        appointments (int): Number of doctor appointments.
+        prescription_ratio (float): Share of completed appointments that get
+            a prescription.
+        report_ratio (float): Share of prescribed tests that get a report.
+        anchor_date (date): The "today" of the data set; defaults to today.
+        days (int): Number of days of appointment history.
+
+    Returns:
+        dict: Number of rows created, keyed by model name.
+    """
+    rng = random.Random(seed)
+    anchor_date = anchor_date or timezone.localdate()
+    password = make_password(SYNTHETIC_PASSWORD)
+    tz = timezone.get_current_timezone()
+
+    with transaction.atomic():
+        doctor_objects = _bulk_create(
+            Doctor,
+            [
+                Doctor(
+                    user=user,
+                    specialty=rng.choice(SPECIALTIES),
+                    qualifications=rng.choice(["MBBS", "MBBS, FCPS", "MBBS, MD"]),
+                    experience_years=rng.randint(1, 30),
+                )
+                for user in _synthetic_users(
+                    rng, ["Doctor"], "doctor", doctors, password
+                )
+            ],
+        )
+        patient_objects = _bulk_create(
+            Patient,
+            [
+                Patient(user=user)
+                for user in _synthetic_users(
+                    rng, PATIENT_ROLES, "patient", patients, password
+                )
+            ],
+        )
+        storekeepers = _bulk_create(
+            Storekeeper,
+            [
+                Storekeeper(user=user)
+                for user in _synthetic_users(
+                    rng, ["Storekeeper"], "storekeeper", 2, password
+                )
+            ],
+        )
+        lab_technicians = _bulk_create(
+            LabTechnician,
+            [
+                LabTechnician(user=user)
+                for user in _synthetic_users(
+                    rng, ["Lab_technician"], "labtech", 2, password
+                )
+            ],
+        )
+
+        medicines = _bulk_create(
+            Medicine,
+            [
+                Medicine(
+                    name=name,
+                    generic_name=generic_name,
+                    manufacturer=rng.choice(["Square", "Beximco", "Incepta", "Renata"]),
+                    dosage_form=dosage_form,
+                    strength=strength,
+                    description=SYNTHETIC_MARKER,
+                    price=rng.randint(2, 200),
+                    stock_quantity=rng.randint(10_000, 100_000),
+                    expiry_date=anchor_date + timedelta(days=rng.randint(90, 720)),
+                )
+                for name, generic_name, dosage_form, strength in MEDICINES
+            ],
+        )
+        tests = _bulk_create(
+            Test,
+            [
+                Test(name=name, department=department, description=SYNTHETIC_MARKER)
+                for name, department in TESTS
+            ],
+        )
+
+        working_hours = _bulk_create(
+            DoctorWorkingHours,
+            [
+                DoctorWorkingHours(
+                    doctor=doctor,
+                    weekday=weekday,
+                    start_time=WORKING_HOURS[0],
+                    end_time=WORKING_HOURS[1],
+                    slot_minutes=SLOT_MINUTES,
+                )
+                for doctor in doctor_objects
+                for weekday in WORKING_WEEKDAYS
+            ],
+        )
+
+        appointment_objects = []
+        booked = set()
+        for _ in range(appointments):
+            roll = rng.random()
+            if roll < 0.1:
+                day, status = anchor_date, "scheduled"
+            elif roll < 0.25:
+                day = anchor_date + timedelta(days=rng.randint(1, 7))
+                status = "scheduled"
+            else:
+                day = anchor_date - timedelta(days=rng.randint(1, days))
+                status = "canceled" if rng.random() < 0.1 else "completed"
+            doctor = rng.choice(doctor_objects)
+            patient = rng.choice(patient_objects)
+            appointment_date_time = timezone.make_aware(
+                datetime.combine(
+                    day, time(rng.randint(8, 16), rng.choice([0, 15, 30, 45]))
+                ),
+                tz,
+            )
+            is_emergency = rng.random() < 0.05
+            if not is_emergency and status != "canceled":
+                # Move to the next free slot, as a slot holds one booking
+                while (doctor.pk, appointment_date_time) in booked:
+                    appointment_date_time += timedelta(minutes=SLOT_MINUTES)
+                booked.add((doctor.pk, appointment_date_time))
+            appointment_objects.append(
+                DoctorAppointment(
+                    doctor=doctor,
+                    patient=patient,
+                    appointment_date_time=appointment_date_time,
+                    status=status,
+                    is_emergency=is_emergency,
+                    reason=rng.choice(COMPLAINTS),
+                )
+            )
+        appointment_objects = _bulk_create(DoctorAppointment, appointment_objects)
+
+        prescriptions = _bulk_create(
+            Prescription,
+            [
+                Prescription(
+                    doctor_appointment=appointment,
+                    complains=appointment.reason,
+                    vitals=f"BP {rng.randint(100, 140)}/{rng.randint(60, 90)}, "
+                    f"Pulse {rng.randint(60, 100)}",
+                    diagnosis=rng.choice(DIAGNOSES),
+                    next_checkup=appointment.appointment_date_time.date()
+                    + timedelta(days=rng.choice([7, 14, 30])),
+                )
+                for appointment in appointment_objects
+                if appointment.status == "completed"
+                and rng.random() < prescription_ratio
+            ],
+        )
+
+        prescribed_medicines, prescribed_tests = [], []
+        for prescription in prescriptions:
+            for medicine in rng.sample(medicines, rng.randint(1, 4)):
+                prescribed_medicines.append(
+                    PrescribedMedicine(
+                        prescription=prescription,
+                        medicine=medicine,
+                        duration=rng.choice([3, 5, 7, 10, 14]),
+                        dosage_frequency=rng.choice(MEDICINE_FREQUENCY_CHOICES)[0],
+                        instructions=rng.choice(["After meal", "Before meal", ""]),
+                    )
+                )
+            for test in rng.sample(tests, rng.choice([0, 0, 1, 1, 2])):
+                prescribed_tests.append(
+                    PrescribedTest(
+                        prescription=prescription,
+                        test=test,
+                        patient_id=prescription.doctor_appointment.patient_id,
+                    )
+                )
+        prescribed_medicines = _bulk_create(PrescribedMedicine, prescribed_medicines)
+        prescribed_tests = _bulk_create(PrescribedTest, prescribed_tests)
+
+        test_reports = _bulk_create(
+            TestReport,
+            [
+                TestReport(
+                    prescribed_test=prescribed_test,
+                    patient_id=prescribed_test.patient_id,
+                    test_id=prescribed_test.test_id,
+                    result=rng.choice(RESULTS),
+                    notes=rng.choice(
+                        ["", "Repeat after two weeks", "Consult physician"]
+                    ),
+                )
+                for prescribed_test in prescribed_tests
+                if rng.random() < report_ratio
+            ],
+        )
+        # bulk_create skips the signals moving reported tests off the worklist
+        reported_ids = [report.prescribed_test_id for report in test_reports]
+        for chunk in _chunks(reported_ids, SYNTHETIC_BATCH_SIZE):
+            PrescribedTest.objects.filter(pk__in=chunk).update(status="reported")
+
+        for chunk in _chunks(patient_objects, SYNTHETIC_BATCH_SIZE):
+            index_patients(chunk)
+        recompute_doctor_counters(
+            Doctor.objects.filter(user__email__endswith=f"@{SYNTHETIC_EMAIL_DOMAIN}")
+        )
+
+    return {
+        "Doctor": len(doctor_objects),
+        "DoctorWorkingHours": len(working_hours),
+        "Patient": len(patient_objects),
+        "Storekeeper": len(storekeepers),
+        "LabTechnician": len(lab_technicians),
+        "Medicine": len(medicines),
+        "Test": len(tests),
+        "DoctorAppointment": len(appointment_objects),
+        "Prescription": len(prescriptions),
+        "PrescribedMedicine": len(prescribed_medicines),
+        "PrescribedTest": len(prescribed_tests),
+        "TestReport": len(test_reports),
+    }
@@ -0,0 +1,115 @@
+import json
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from appointments.models import DoctorAppointment
+from users.benchmarks import SCENARIOS, compare_reports, percentile, run_benchmarks
+from users.counters import find_counter_drift
+from users.models import Patient, User
+from users.synthetic_data import clear_hospital_data, generate_hospital_data
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class SyntheticDataTests(TestCase):
+    def generate(self, seed=7):
+        return generate_hospital_data(
+            seed=seed,
+            doctors=3,
+            patients=20,
+            appointments=120,
+            anchor_date=date(2025, 3, 1),
+        )
+
+    def snapshot(self):
+        return list(
+            DoctorAppointment.objects.order_by("pk").values_list(
+                "doctor__user__email",
+                "patient__user__name",
+                "appointment_date_time",
+                "status",
+            )
+        )
+
+    def test_same_seed_produces_same_data(self):
+        counts = self.generate()
+        self.assertEqual(counts["Doctor"], 3)
+        self.assertEqual(counts["Patient"], 20)
+        self.assertEqual(counts["DoctorAppointment"], 120)
+        first = self.snapshot()
+
+        clear_hospital_data()
+        self.assertFalse(User.objects.exists())
+        self.assertEqual(self.generate(), counts)
+        self.assertEqual(self.snapshot(), first)
+
+        clear_hospital_data()
+        self.generate(seed=8)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_derived_data_is_rebuilt(self):
+        self.generate()
+        self.assertEqual(find_counter_drift(), [])
+        self.assertEqual(
+            Patient.objects.filter(name_trigrams__isnull=False).distinct().count(), 20
+        )
+
+    def test_command_refuses_to_duplicate_data(self):
+        options = ["--doctors", "2", "--patients", "5", "--appointments", "10"]
+        call_command("generate_synthetic_data", *options, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command("generate_synthetic_data", *options, stdout=StringIO())
+        call_command("generate_synthetic_data", "--clear", *options, stdout=StringIO())
+        self.assertEqual(User.objects.filter(role="Doctor").count(), 2)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BenchmarkTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_percentile(self):
+        values = [4, 1, 3, 2]
+        self.assertEqual(percentile(values, 0), 1)
+        self.assertEqual(percentile(values, 50), 2.5)
+        self.assertEqual(percentile(values, 100), 4)
+
+    def test_run_benchmarks(self):
+        generate_hospital_data(seed=1, doctors=2, patients=10, appointments=60)
+        report = run_benchmarks(iterations=3, warmup=1)
+
+        self.assertEqual(set(report["results"]), set(SCENARIOS))
+        for name, result in report["results"].items():
+            self.assertEqual(result["requests"], 3, name)
+            self.assertNotIn("500", result["status_codes"], name)
+            self.assertLessEqual(
+                result["latency_ms"]["p50"], result["latency_ms"]["max"], name
+            )
+            self.assertGreater(result["queries"]["max"], 0, name)
+        json.dumps(report)
+
+    def test_run_benchmarks_without_data(self):
+        with self.assertRaises(CommandError):
+            call_command("run_benchmarks", stdout=StringIO())
+
+    def test_compare_reports(self):
+        def report(p95, queries):
+            return {
+                "results": {
+                    "dispense": {
+                        "latency_ms": {"p95": p95},
+                        "queries": {"max": queries},
+                    }
+                }
+            }
+
+        self.assertEqual(compare_reports(report(10, 5), report(11, 5)), [])
+        self.assertEqual(len(compare_reports(report(10, 5), report(20, 6))), 2)
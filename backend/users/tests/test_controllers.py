@@ -175,6 +175,23 @@ class DoctorDashboardControllerTests(TestCase):
         response = self.client.get(reverse("users:doctor-dashboard"))
         self.assertEqual(response.status_code, 404)
 
+    def test_doctor_dashboard_paginates_waiting_patients(self):
+        DoctorAppointment.objects.bulk_create(
+            DoctorAppointment(
+                patient=self.patient,
+                doctor=self.doctor,
+                appointment_date_time=timezone.now() + timezone.timedelta(days=2),
+            )
+            for _ in range(25)
+        )
+        self.client.login(email="doctoruser@example.com", password="password123")
+
+        response = self.client.get(reverse("users:doctor-dashboard"), {"page": 2})
+        page = response.context["appointments_list"]
+        self.assertEqual(page.number, 2)
+        self.assertEqual(page.paginator.count, 28)
+        self.assertEqual(len(page.object_list), 8)
+
     def test_doctor_dashboard_context_data(self):
         self.client.login(email="doctoruser@example.com", password="password123")
 
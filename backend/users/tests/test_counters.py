@@ -0,0 +1,115 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from appointments.models import DoctorAppointment
+from medicines.models import Prescription
+from users.counters import (
+    adjust_doctor_counters,
+    find_counter_drift,
+    recompute_doctor_counters,
+)
+from users.models import Doctor, Patient, User
+
+
+class DoctorCounterTests(TestCase):
+    def setUp(self):
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(
+                email="doctor@example.com",
+                name="Doctor User",
+                role="Doctor",
+                blood_group="A+",
+                date_of_birth="1985-05-05",
+                gender="Female",
+                phone_number="+8801234567890",
+                role_id="counter-doc",
+                password="password123",
+            )
+        )
+        self.patients = [
+            Patient.objects.create(
+                user=User.objects.create_user(
+                    email=f"patient{index}@example.com",
+                    name=f"Patient {index}",
+                    role="Student",
+                    blood_group="A+",
+                    date_of_birth="1995-05-05",
+                    gender="Male",
+                    phone_number="+8801234567890",
+                    role_id=f"counter-pat{index}",
+                    password="password123",
+                )
+            )
+            for index in range(2)
+        ]
+        when = timezone.now() + timezone.timedelta(days=1)
+        for hour, (patient, status) in enumerate(
+            [
+                (self.patients[0], "scheduled"),
+                (self.patients[0], "completed"),
+                (self.patients[1], "scheduled"),
+            ]
+        ):
+            appointment = DoctorAppointment.objects.create(
+                patient=patient,
+                doctor=self.doctor,
+                appointment_date_time=when + timezone.timedelta(hours=hour),
+                status=status,
+            )
+        Prescription.objects.create(doctor_appointment=appointment, diagnosis="Flu")
+
+    def test_adjust_doctor_counters_never_goes_negative(self):
+        adjust_doctor_counters(self.doctor.id, appointments=2, prescriptions=1)
+        adjust_doctor_counters(self.doctor.id, appointments=-5)
+        self.doctor.refresh_from_db()
+        self.assertEqual(self.doctor.no_of_appointments, 0)
+        self.assertEqual(self.doctor.no_of_prescriptions, 1)
+
+    def test_recompute_doctor_counters(self):
+        recompute_doctor_counters()
+        self.doctor.refresh_from_db()
+        self.assertEqual(self.doctor.no_of_appointments, 2)
+        self.assertEqual(self.doctor.no_of_patients, 2)
+        self.assertEqual(self.doctor.no_of_prescriptions, 1)
+        self.assertEqual(find_counter_drift(), [])
+
+    def test_find_counter_drift(self):
+        drifted = find_counter_drift()
+        self.assertEqual(len(drifted), 1)
+        doctor, fields = drifted[0]
+        self.assertEqual(doctor, self.doctor)
+        self.assertEqual(fields["no_of_patients"], (0, 2))
+
+    def test_check_doctor_counters_command(self):
+        with self.assertRaises(CommandError):
+            call_command("check_doctor_counters", stdout=StringIO())
+
+        call_command("check_doctor_counters", "--fix", stdout=StringIO())
+        call_command("check_doctor_counters", stdout=StringIO())
+        self.doctor.refresh_from_db()
+        self.assertEqual(self.doctor.no_of_appointments, 2)
+
+    def test_deleting_appointments_keeps_counters_consistent(self):
+        recompute_doctor_counters()
+        self.client.force_login(self.doctor.user)
+        scheduled, completed, prescribed = DoctorAppointment.objects.order_by(
+            "appointment_date_time"
+        )
+
+        # Patient 0 keeps the completed appointment; patient 1 had only the
+        # prescribed one, which takes its prescription along
+        for appointment in [scheduled, prescribed, completed]:
+            self.client.get(
+                reverse("appointments:delete-doctor-appointment", args=[appointment.pk])
+            )
+            call_command("check_doctor_counters", stdout=StringIO())
+
+        self.doctor.refresh_from_db()
+        self.assertEqual(self.doctor.no_of_appointments, 0)
+        self.assertEqual(self.doctor.no_of_patients, 0)
+        self.assertEqual(self.doctor.no_of_prescriptions, 0)
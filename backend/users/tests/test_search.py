@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from users.models import Patient, PatientNameTrigram, User
+from users.search import name_trigrams, normalize_name, search_patient_ids
+
+
+class PatientNameSearchTests(TestCase):
+    def setUp(self):
+        self.patients = {}
+        for index, name in enumerate(["John Doe", "Jane Smith", "Rahim Uddin"]):
+            user = User.objects.create_user(
+                email=f"patient{index}@example.com",
+                name=name,
+                role="Student",
+                blood_group="A+",
+                date_of_birth="1990-01-01",
+                gender="Male",
+                phone_number="+8801234567890",
+                role_id=f"search{index}",
+                password="password123",
+            )
+            self.patients[name] = Patient.objects.create(user=user)
+
+    def search(self, query):
+        return set(search_patient_ids(query))
+
+    def test_normalize_name(self):
+        """Names are lower-cased and stripped of accents and punctuation."""
+        self.assertEqual(normalize_name("  Chloé O'Neil "), ["chloe", "o", "neil"])
+
+    def test_prefix_match(self):
+        """A typed prefix matches every name with a word starting with it."""
+        self.assertEqual(
+            self.search("Ja"), {self.patients["Jane Smith"].id}
+        )
+        self.assertEqual(
+            self.search("j"),
+            {self.patients["John Doe"].id, self.patients["Jane Smith"].id},
+        )
+
+    def test_typo_tolerant_match(self):
+        """A small misspelling still finds the patient."""
+        self.assertEqual(self.search("Rahmi"), {self.patients["Rahim Uddin"].id})
+
+    def test_index_follows_name_changes(self):
+        """Renaming the user re-indexes the patient's name."""
+        user = self.patients["John Doe"].user
+        user.name = "Karim Hossain"
+        user.save()
+        self.assertEqual(self.search("john"), set())
+        self.assertEqual(self.search("karim"), {self.patients["John Doe"].id})
+
+    def test_rebuild_command(self):
+        """The management command rebuilds the index from the patients."""
+        PatientNameTrigram.objects.all().delete()
+        call_command("rebuild_patient_search_index", "--batch-size", "2", stdout=StringIO())
+        self.assertEqual(
+            PatientNameTrigram.objects.filter(
+                patient=self.patients["John Doe"]
+            ).count(),
+            len(name_trigrams("John Doe")),
+        )
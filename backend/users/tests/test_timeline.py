@@ -0,0 +1,171 @@
+from datetime import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from appointments.models import DoctorAppointment
+from medical_tests.models import PrescribedTest, Test, TestReport
+from medicines.models import Medicine, PrescribedMedicine, Prescription
+from users.models import Doctor, Patient, User
+from users.timeline import build_timeline, patient_timeline
+
+
+class PatientTimelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.patient_user = self.user("timeline-pat", "Student")
+        self.patient = Patient.objects.create(user=self.patient_user)
+        self.other_user = self.user("timeline-pat2", "Student")
+        self.other_patient = Patient.objects.create(user=self.other_user)
+        self.doctor_user = self.user("timeline-doc", "Doctor")
+        self.doctor = Doctor.objects.create(
+            user=self.doctor_user, specialty="cardiology"
+        )
+        self.test = Test.objects.create(name="Blood Test")
+        self.medicine = Medicine.objects.create(
+            name="Napa",
+            manufacturer="Beximco",
+            dosage_form="Tablet",
+            strength="500mg",
+            price=1,
+            stock_quantity=100,
+            expiry_date="2030-01-01",
+        )
+
+    def user(self, role_id, role):
+        return User.objects.create_user(
+            email=f"{role_id}@example.com",
+            name=f"User {role_id}",
+            role=role,
+            blood_group="B+",
+            date_of_birth="1990-05-10",
+            gender="Male",
+            phone_number="+8801987654321",
+            role_id=role_id,
+            password="asdf1234@",
+        )
+
+    def at(self, day, hour):
+        return timezone.make_aware(datetime(2024, 12, day, hour))
+
+    def visit(self, day, hour, patient=None):
+        """An appointment with a prescription of one medicine and one test."""
+        appointment = DoctorAppointment.objects.create(
+            doctor=self.doctor,
+            patient=patient or self.patient,
+            appointment_date_time=self.at(day, hour),
+            reason="Fever",
+        )
+        prescription = Prescription.objects.create(
+            doctor_appointment=appointment,
+            complains="Headache",
+            vitals="Normal",
+            diagnosis="Flu",
+        )
+        PrescribedMedicine.objects.create(
+            prescription=prescription, medicine=self.medicine, duration=5
+        )
+        prescribed_test = PrescribedTest.objects.create(
+            prescription=prescription, test=self.test
+        )
+        TestReport.objects.create(prescribed_test=prescribed_test, result="Normal")
+        return appointment
+
+    def test_page_is_built_in_a_fixed_number_of_queries(self):
+        for hour in range(8, 12):
+            self.visit(15, hour)
+
+        with self.assertNumQueries(5):
+            page = build_timeline(self.patient.id, page_size=10)
+        appointments = page["days"][0]["appointments"]
+        self.assertEqual(len(appointments), 4)
+        prescription = appointments[0]["prescriptions"][0]
+        self.assertEqual(prescription["diagnosis"], "Flu")
+        self.assertEqual(prescription["medicines"][0]["name"], "Napa")
+        self.assertEqual(prescription["tests"][0]["name"], "Blood Test")
+        self.assertEqual(prescription["tests"][0]["reports"][0]["result"], "Normal")
+
+    def test_pages_follow_the_date_cursor(self):
+        self.visit(14, 9)
+        latest = self.visit(15, 10)
+        self.visit(15, 9)
+        self.visit(13, 9, patient=self.other_patient)
+
+        page = build_timeline(self.patient.id, page_size=2)
+        self.assertEqual([day["date"] for day in page["days"]], ["2024-12-15"])
+        self.assertEqual(page["days"][0]["appointments"][0]["id"], latest.id)
+
+        page = build_timeline(self.patient.id, page["next_cursor"], page_size=2)
+        self.assertEqual([day["date"] for day in page["days"]], ["2024-12-14"])
+        self.assertIsNone(page["next_cursor"])
+
+        with self.assertRaises(ValueError):
+            build_timeline(self.patient.id, "yesterday", page_size=2)
+
+    def test_cache_is_dropped_when_a_record_changes(self):
+        appointment = self.visit(15, 9)
+        patient_timeline(self.patient.id)
+
+        with self.assertNumQueries(0):
+            patient_timeline(self.patient.id)
+
+        prescription = appointment.doctor_appointments.get()
+        prescribed_test = prescription.prescribed_tests.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            TestReport.objects.create(prescribed_test=prescribed_test, result="High")
+        page = patient_timeline(self.patient.id)
+        reports = page["days"][0]["appointments"][0]["prescriptions"][0]["tests"][0][
+            "reports"
+        ]
+        self.assertEqual([report["result"] for report in reports], ["Normal", "High"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PrescribedMedicine.objects.filter(prescription=prescription).get().delete()
+        page = patient_timeline(self.patient.id)
+        self.assertEqual(
+            page["days"][0]["appointments"][0]["prescriptions"][0]["medicines"], []
+        )
+
+    def test_other_patients_keep_their_cache(self):
+        self.visit(15, 9, patient=self.other_patient)
+        patient_timeline(self.other_patient.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.visit(15, 10)
+        with self.assertNumQueries(0):
+            patient_timeline(self.other_patient.id)
+
+    def test_cursor_is_passed_back_as_is(self):
+        self.visit(15, 10)
+        earliest = self.visit(15, 9)
+        url = reverse("users:patient-timeline")
+
+        self.client.force_login(self.patient_user)
+        cursor = self.client.get(url, {"page_size": 1}).json()["next_cursor"]
+        # Copied into the query string by hand, without URL-encoding
+        response = self.client.get(f"{url}?page_size=1&cursor={cursor}")
+        self.assertEqual(response.status_code, 200)
+        appointments = response.json()["days"][0]["appointments"]
+        self.assertEqual([row["id"] for row in appointments], [earliest.id])
+
+    def test_endpoint(self):
+        self.visit(15, 9)
+        url = reverse("users:patient-timeline")
+
+        self.client.force_login(self.patient_user)
+        response = self.client.get(url)
+        self.assertEqual(response.json()["patient_id"], self.patient.id)
+        self.assertEqual(len(response.json()["days"]), 1)
+        self.assertEqual(self.client.get(url, {"page_size": 0}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"cursor": "x/1"}).status_code, 400)
+        other_url = reverse("users:patient-timeline", args=[self.other_patient.id])
+        self.assertEqual(self.client.get(other_url).status_code, 403)
+
+        self.client.force_login(self.doctor_user)
+        response = self.client.get(other_url)
+        self.assertEqual(
+            response.json(),
+            {"patient_id": self.other_patient.id, "days": [], "next_cursor": None},
+        )
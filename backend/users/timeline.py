@@ -0,0 +1,281 @@
+"""
+A patient's full medical history, newest first.
+
+The timeline lists the patient's doctor appointments with their
+prescriptions and, for each prescription, the prescribed medicines, the
+prescribed tests and the tests' reports. A page is built in five queries
+whatever its size: one for the appointments (with their doctors) and one
+``prefetch_related`` query per level below.
+
+Pages are keyed by date: the cursor is the time and id of the last
+appointment of the previous page, so a page is one range read on the
+``(patient, appointment_date_time)`` index of ``DoctorAppointment``.
+Appointments are grouped by local day in the response.
+
+Built pages are cached per patient. The ``post_save``/``post_delete``
+handlers in ``users.signals`` bump the patient's cache version, once the
+transaction commits, whenever one of the models above changes. Names of
+doctors, medicines and tests are refreshed when the cached page expires.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import groupby
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from appointments.models import DoctorAppointment
+from core.general.cache import bump_object_version, object_cache_key
+from medical_tests.models import PrescribedTest, TestReport
+from medicines.models import PrescribedMedicine, Prescription
+from users.constants import (
+    TIMELINE_CACHE_PREFIX,
+    TIMELINE_CACHE_TIMEOUT,
+    TIMELINE_PAGE_SIZE,
+)
+from users.models import Patient
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Rows whose patient is not stored on them: the foreign key to the parent
+# row and the parent's lookup of the patient
+PATIENT_LOOKUPS = {
+    Prescription: ("doctor_appointment", "patient_id"),
+    PrescribedMedicine: ("prescription", "doctor_appointment__patient_id"),
+    PrescribedTest: ("prescription", "doctor_appointment__patient_id"),
+    TestReport: ("prescribed_test", "prescription__doctor_appointment__patient_id"),
+}
+
+
+def encode_cursor(appointment):
+    """
+    Return the cursor of the page following ``appointment``.
+
+    The cursor is the appointment time in microseconds since the epoch and
+    the appointment id, e.g. ``1734256800000000_42``, so it can be passed
+    back in a query string as is.
+    """
+    microseconds = (appointment.appointment_date_time - EPOCH) // timedelta(
+        microseconds=1
+    )
+    return f"{microseconds}_{appointment.pk}"
+
+
+def decode_cursor(cursor):
+    """
+    Split a cursor into the time and id of an appointment.
+
+    Args:
+        cursor (str): A cursor built by :func:`encode_cursor`.
+
+    Returns:
+        tuple: The aware datetime and the id.
+
+    Raises:
+        ValueError: When the cursor is malformed.
+    """
+    microseconds, separator, pk = cursor.partition("_")
+    if not separator:
+        raise ValueError("The cursor has no appointment id.")
+    try:
+        date_time = EPOCH + timedelta(microseconds=int(microseconds))
+    except OverflowError:
+        raise ValueError("The cursor time is out of range.")
+    return date_time, int(pk)
+
+
+def timeline_appointments(patient_id):
+    """
+    Return a patient's appointments with their whole history prefetched.
+
+    Args:
+        patient_id (int): Primary key of the patient.
+
+    Returns:
+        QuerySet: The appointments, newest first.
+    """
+    reports = TestReport.objects.order_by("report_date", "pk")
+    tests = (
+        PrescribedTest.objects.select_related("test")
+        .prefetch_related(Prefetch("test_reports", queryset=reports))
+        .order_by("pk")
+    )
+    medicines = PrescribedMedicine.objects.select_related("medicine").order_by("pk")
+    prescriptions = (
+        Prescription.objects.prefetch_related(
+            Prefetch("medicines", queryset=medicines),
+            Prefetch("prescribed_tests", queryset=tests),
+        )
+        .order_by("date_issued", "time_issued", "pk")
+    )
+    return (
+        DoctorAppointment.objects.filter(patient_id=patient_id)
+        .select_related("doctor__user")
+        .prefetch_related(Prefetch("doctor_appointments", queryset=prescriptions))
+        .order_by("-appointment_date_time", "-pk")
+    )
+
+
+def _report(report):
+    return {
+        "id": report.pk,
+        "report_date": report.report_date.isoformat(),
+        "result": report.result,
+        "notes": report.notes,
+        "attached_file": report.attached_file.url if report.attached_file else None,
+    }
+
+
+def _prescription(prescription):
+    return {
+        "id": prescription.pk,
+        "date_issued": prescription.date_issued.isoformat(),
+        "complains": prescription.complains,
+        "vitals": prescription.vitals,
+        "diagnosis": prescription.diagnosis,
+        "referrals": prescription.referrals,
+        "next_checkup": (
+            prescription.next_checkup.isoformat() if prescription.next_checkup else None
+        ),
+        "medicines": [
+            {
+                "id": line.pk,
+                "name": line.medicine.name,
+                "strength": line.medicine.strength,
+                "duration": line.duration,
+                "dosage_frequency": line.dosage_frequency,
+                "instructions": line.instructions,
+            }
+            for line in prescription.medicines.all()
+        ],
+        "tests": [
+            {
+                "id": prescribed_test.pk,
+                "name": prescribed_test.test.name,
+                "reports": [_report(r) for r in prescribed_test.test_reports.all()],
+            }
+            for prescribed_test in prescription.prescribed_tests.all()
+        ],
+    }
+
+
+def _appointment(appointment):
+    return {
+        "id": appointment.pk,
+        "date_time": appointment.appointment_date_time.isoformat(),
+        "doctor": appointment.doctor.user.name,
+        "specialty": appointment.doctor.specialty,
+        "reason": appointment.reason,
+        "status": appointment.status,
+        "is_emergency": appointment.is_emergency,
+        "prescriptions": [
+            _prescription(prescription)
+            for prescription in appointment.doctor_appointments.all()
+        ],
+    }
+
+
+def build_timeline(patient_id, cursor=None, page_size=TIMELINE_PAGE_SIZE):
+    """
+    Build one page of a patient's timeline.
+
+    Args:
+        patient_id (int): Primary key of the patient.
+        cursor (str): The ``next_cursor`` of the previous page; None for the
+            newest page.
+        page_size (int): Maximum number of appointments on the page.
+
+    Returns:
+        dict: The appointments grouped by day under ``days``, newest first,
+            and the ``next_cursor`` of the following page (None on the last
+            page).
+
+    Raises:
+        ValueError: When the cursor is malformed.
+    """
+    appointments = timeline_appointments(patient_id)
+    if cursor:
+        date_time, pk = decode_cursor(cursor)
+        appointments = appointments.filter(
+            Q(appointment_date_time__lt=date_time)
+            | Q(appointment_date_time=date_time, pk__lt=pk)
+        )
+    rows = list(appointments[: page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    days = groupby(
+        rows[:page_size],
+        key=lambda row: timezone.localdate(row.appointment_date_time),
+    )
+    return {
+        "days": [
+            {
+                "date": day.isoformat(),
+                "appointments": [_appointment(row) for row in appointments_of_day],
+            }
+            for day, appointments_of_day in days
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
+def patient_timeline(patient_id, cursor=None, page_size=TIMELINE_PAGE_SIZE):
+    """
+    Return one page of a patient's timeline, from the cache when possible.
+
+    Args:
+        patient_id (int): Primary key of the patient.
+        cursor (str): The ``next_cursor`` of the previous page; None for the
+            newest page.
+        page_size (int): Maximum number of appointments on the page.
+
+    Returns:
+        dict: The page, as returned by :func:`build_timeline`.
+
+    Raises:
+        ValueError: When the cursor is malformed.
+    """
+    key = object_cache_key(
+        TIMELINE_CACHE_PREFIX, Patient, patient_id, page_size, cursor or ""
+    )
+    page = cache.get(key)
+    if page is None:
+        page = build_timeline(patient_id, cursor, page_size)
+        cache.set(key, page, TIMELINE_CACHE_TIMEOUT)
+    return page
+
+
+def timeline_patient_id(instance):
+    """
+    Return the patient whose timeline shows a row.
+
+    Args:
+        instance: A ``DoctorAppointment``, ``Prescription``,
+            ``PrescribedMedicine``, ``PrescribedTest`` or ``TestReport``.
+
+    Returns:
+        int: Primary key of the patient, or None if the row has none.
+    """
+    patient_id = getattr(instance, "patient_id", None)
+    if patient_id is None and type(instance) in PATIENT_LOOKUPS:
+        parent, lookup = PATIENT_LOOKUPS[type(instance)]
+        field = instance._meta.get_field(parent)
+        patient_id = (
+            field.related_model.objects.filter(pk=getattr(instance, field.attname))
+            .values_list(lookup, flat=True)
+            .first()
+        )
+    return patient_id
+
+
+def invalidate_patient_timeline(instance):
+    """
+    Drop the cached timeline of the patient of a changed row once committed.
+
+    Args:
+        instance: A row shown on the timeline, see :func:`timeline_patient_id`.
+    """
+    patient_id = timeline_patient_id(instance)
+    if patient_id is not None:
+        transaction.on_commit(lambda: bump_object_version(Patient, patient_id))
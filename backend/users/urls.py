@@ -10,6 +10,8 @@ URLs:
 - /logout/ : View for user logout.
 - /unapproved/ : View for handling unapproved users.
 - /doctor-dashboard/ : View for Doctor dashboard.
+- /patient-timeline/ : JSON medical history of the logged-in patient.
+- /patient-timeline/<patient_id>/ : JSON medical history of a patient, for doctors.
 """
 
 from django.urls import path, include
@@ -30,4 +32,10 @@ urlpatterns = [
     path("ambulance-info/", ambulance_info, name="ambulance_info"),
     path("doctor-dashboard/", doctor_dashboard, name="doctor-dashboard"),
     path("patient-dashboard/", patient_dashboard, name="patient-dashboard"),
+    path("patient-timeline/", get_patient_timeline, name="patient-timeline"),
+    path(
+        "patient-timeline/<int:patient_id>/",
+        get_patient_timeline,
+        name="patient-timeline",
+    ),
 ]